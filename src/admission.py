@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Admission control for the chat endpoints
+Per-client token buckets, a global in-flight cap and a short bounded wait
+queue. Requests that cannot be admitted are shed immediately with a
+Retry-After hint instead of piling up until they time out.
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute per client (0 disables the per-client limit) and burst size
+RATE_PER_MINUTE = float(os.getenv('CHAT_RATE_LIMIT', 30))
+BURST = int(os.getenv('CHAT_RATE_BURST', 10))
+# Global cap on chat requests being served, and how many may wait for a slot
+MAX_IN_FLIGHT = int(os.getenv('CHAT_MAX_IN_FLIGHT', os.getenv('QBUSINESS_MAX_CONCURRENCY', 16)))
+MAX_QUEUE = int(os.getenv('CHAT_MAX_QUEUE', 32))
+QUEUE_TIMEOUT = float(os.getenv('CHAT_QUEUE_TIMEOUT', 2))
+# Buckets kept in memory; the least recently seen clients are forgotten first
+MAX_CLIENTS = int(os.getenv('CHAT_MAX_CLIENTS', 10000))
+# Header set by an authenticating proxy; when present it identifies the client instead of the IP
+USER_HEADER = os.getenv('CHAT_USER_HEADER', '')
+# Use X-Forwarded-For behind App Runner/ALB, where the peer address is the proxy. Off by
+# default: without such a proxy clients could pick their own key and escape their limit
+TRUST_FORWARDED = os.getenv('CHAT_TRUST_FORWARDED', 'false').lower() == 'true'
+
+
+def client_key(remote_addr, headers):
+    """
+    Identify the caller for rate limiting
+
+    Args:
+        remote_addr (str): Peer address of the connection
+        headers: Mapping of request headers (case-insensitive lookups)
+    """
+    if USER_HEADER:
+        user = headers.get(USER_HEADER) or headers.get(USER_HEADER.lower())
+        if user:
+            return f'user:{user}'
+
+    if TRUST_FORWARDED:
+        forwarded = headers.get('X-Forwarded-For') or headers.get('x-forwarded-for')
+        if forwarded:
+            # The right-most entry is the one appended by our own proxy and cannot be spoofed
+            return f'ip:{forwarded.split(",")[-1].strip()}'
+
+    return f'ip:{remote_addr or "unknown"}'
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self, count=1):
+        """
+        Take count tokens, or none at all
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until enough are available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= count:
+            self.tokens -= count
+            return 0
+        return (count - self.tokens) / self.rate
+
+    def refund(self, count=1):
+        """Give back tokens taken for a request that was not served"""
+        self.tokens = min(self.capacity, self.tokens + count)
+
+
+class AdmissionController:
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, burst=BURST, max_in_flight=MAX_IN_FLIGHT,
+                 max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT, max_clients=MAX_CLIENTS):
+        """
+        Args:
+            rate_per_minute (float): Sustained requests per minute per client (0 disables)
+            burst (int): Requests a client may send back to back
+            max_in_flight (int): Requests served at once across all clients
+            max_queue (int): Requests allowed to wait for a free slot
+            queue_timeout (float): Seconds a queued request waits before being shed
+            max_clients (int): Client buckets kept in memory
+        """
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = {'rateLimited': 0, 'queueFull': 0, 'queueTimeout': 0}
+
+    def admit(self, client_id):
+        """
+        Admit a request or raise AdmissionRejected; callers must release() once done
+
+        A request shed for lack of a slot gets its token back, so global overload
+        does not use up the client's rate limit.
+
+        Raises:
+            AdmissionRejected: With reason 'rateLimited', 'queueFull' or 'queueTimeout'
+        """
+        with self._lock:
+            bucket = self._take_token(client_id)
+            try:
+                self._acquire_slot(self.queue_timeout, bounded=True)
+            except AdmissionRejected:
+                if bucket is not None:
+                    bucket.refund()
+                raise
+
+    def check_rate(self, client_id, cost=1):
+        """
+        Charge cost requests to the client's bucket without taking an in-flight slot
+
+        Nothing is charged when the bucket cannot cover the whole cost.
+        """
+        with self._lock:
+            self._take_token(client_id, cost)
+
+    def acquire(self):
+        """
+        Wait as long as needed for an in-flight slot (background work such as batches)
+
+        Background callers bypass the bounded queue but compete for the same
+        slots as interactive requests; callers must release() once done.
+        """
+        with self._lock:
+            self._acquire_slot(None, bounded=False)
+
+    def _acquire_slot(self, timeout, bounded):
+        if self.in_flight < self.max_in_flight:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if bounded and self.waiting >= self.max_queue:
+            self.shed['queueFull'] += 1
+            raise AdmissionRejected('queueFull', 1)
+
+        # Only interactive waiters count against the queue bound
+        if bounded:
+            self.waiting += 1
+        self.queued += 1
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            while self.in_flight >= self.max_in_flight:
+                if deadline is None:
+                    self._slot_freed.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.shed['queueTimeout'] += 1
+                    raise AdmissionRejected('queueTimeout', 1)
+                self._slot_freed.wait(remaining)
+        finally:
+            if bounded:
+                self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._slot_freed.notify()
+
+    def _take_token(self, client_id, cost=1):
+        """Charge the client's bucket; returns it, or None when there is no per-client limit"""
+        if self.rate <= 0:
+            return None
+
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+
+        wait = bucket.take(cost)
+        if wait:
+            self.shed['rateLimited'] += 1
+            raise AdmissionRejected('rateLimited', max(1, int(wait + 0.999)))
+        return bucket
+
+    def stats(self):
+        with self._lock:
+            return {
+                'inFlight': self.in_flight,
+                'waiting': self.waiting,
+                'maxInFlight': self.max_in_flight,
+                'maxQueue': self.max_queue,
+                'ratePerMinute': self.rate * 60,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'shed': dict(self.shed)
+            }
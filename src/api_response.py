@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Shared JSON response layer for the Flask APIs and the team Lambda
+Serializes once to bytes (orjson when installed, stdlib json otherwise) so the
+same bytes can be sent, cached and compressed.
+"""
+
+import json
+import datetime
+from decimal import Decimal
+
+from profiling import span
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_MIMETYPE = 'application/json'
+
+
+def _default(obj):
+    """Encode the non-JSON types boto3 hands back"""
+    if isinstance(obj, Decimal):
+        # DynamoDB returns every number as Decimal
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(payload):
+        """Serialize payload to compact UTF-8 JSON bytes"""
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(payload):
+        """Serialize payload to compact UTF-8 JSON bytes"""
+        return json.dumps(payload, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def accepted_encodings(accept_encoding):
+    """Parse an Accept-Encoding header into the set of codings the client allows"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+def json_response(payload, status=200, headers=None):
+    """Flask response carrying payload serialized with dumps()"""
+    from flask import Response
+
+    with span('serialize'):
+        body = dumps(payload)
+    return Response(body, status=status, headers=headers, mimetype=JSON_MIMETYPE)
+
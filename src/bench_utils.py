@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the load test and benchmark scripts
+Stdlib only, so the scripts can import it before any module that reads its
+settings from the environment at import time.
+"""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
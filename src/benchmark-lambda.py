@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the team Lambda (lambda_team_api.py)
+Measures cold-init time and warm per-invocation latency against the local
+DynamoDB stand-in, so no AWS access is needed.
+
+Usage:
+    python3 benchmark-lambda.py --members 2000 --invocations 500 --output lambda-bench.json
+    python3 benchmark-lambda.py --max-cold-ms 300 --max-warm-p99-ms 5   # fail on regressions
+"""
+
+import os
+import sys
+import json
+import contextlib
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import importlib.util
+
+from bench_utils import percentile
+from dynamodb_stub import LocalTable, make_member
+
+EVENT = {'httpMethod': 'GET', 'path': '/team', 'headers': {'Accept': 'application/json'}}
+
+
+def summarize(samples_ms):
+    return {
+        'count': len(samples_ms),
+        'p50Ms': round(percentile(samples_ms, 50), 3),
+        'p99Ms': round(percentile(samples_ms, 99), 3),
+        'meanMs': round(statistics.fmean(samples_ms), 3),
+        'maxMs': round(max(samples_ms), 3)
+    }
+
+
+def build_table(members, scan_latency):
+    return LocalTable((make_member(i) for i in range(members)), latency=scan_latency)
+
+
+def cold_child(args):
+    """Runs in a fresh interpreter: one cold start, reported as JSON on stdout"""
+    table = build_table(args.members, args.scan_latency)
+
+    start = time.perf_counter()
+    import lambda_team_api
+    import_ms = (time.perf_counter() - start) * 1000
+
+    client_ms = None
+    if importlib.util.find_spec('boto3'):
+        # Resource construction only - no request is sent
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+        start = time.perf_counter()
+        lambda_team_api.get_table()
+        client_ms = (time.perf_counter() - start) * 1000
+
+    lambda_team_api._table = table
+    start = time.perf_counter()
+    response = lambda_team_api.lambda_handler(EVENT, None)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        'importMs': import_ms,
+        'clientInitMs': client_ms,
+        'firstInvocationMs': first_ms,
+        'statusCode': response['statusCode']
+    }))
+
+
+def measure_cold(args):
+    """Average several cold starts, each in its own interpreter"""
+    runs = []
+    for _ in range(args.cold_runs):
+        output = subprocess.run(
+            [sys.executable, __file__, '--cold-child',
+             '--members', str(args.members), '--scan-latency', str(args.scan_latency)],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    result = {
+        'runs': len(runs),
+        'importMs': round(statistics.median(r['importMs'] for r in runs), 3),
+        'firstInvocationMs': round(statistics.median(r['firstInvocationMs'] for r in runs), 3)
+    }
+    client_runs = [r['clientInitMs'] for r in runs if r['clientInitMs'] is not None]
+    result['clientInitMs'] = round(statistics.median(client_runs), 3) if client_runs else None
+    return result
+
+
+def measure_warm(args, cached):
+    """Per-invocation latency once the execution environment is initialized"""
+    import lambda_team_api
+
+    lambda_team_api._table = build_table(args.members, args.scan_latency)
+    lambda_team_api._roster.invalidate()
+    # TTL 0 reloads on every call, which is what each invocation paid before the cache
+    lambda_team_api._roster.ttl = args.ttl if cached else 0
+
+    # The handler prints one EMF metrics line per invocation; keep them off the console
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        lambda_team_api.lambda_handler(EVENT, None)
+
+        samples = []
+        for _ in range(args.invocations):
+            start = time.perf_counter()
+            response = lambda_team_api.lambda_handler(EVENT, None)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response['statusCode'] == 200, response
+
+    result = summarize(samples)
+    result['scanCalls'] = lambda_team_api._table.scan_calls
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the team Lambda cold start and warm invocations')
+    parser.add_argument('--members', type=int, default=2000, help='Members in the stand-in table')
+    parser.add_argument('--invocations', type=int, default=500, help='Warm invocations to time')
+    parser.add_argument('--cold-runs', type=int, default=5, help='Cold starts to time')
+    parser.add_argument('--ttl', type=float, default=300, help='Roster cache TTL for the cached warm run')
+    parser.add_argument('--scan-latency', type=float, default=0.005, help='Simulated seconds per scan page')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--max-cold-ms', type=float, help='Fail if the cold first invocation is slower')
+    parser.add_argument('--max-warm-p99-ms', type=float, help='Fail if the cached warm p99 is slower')
+    parser.add_argument('--cold-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_child:
+        cold_child(args)
+        return True
+
+    print("⏱️  Team Lambda Benchmark")
+    print("=" * 50)
+    print(f"Members: {args.members}, warm invocations: {args.invocations}, cold runs: {args.cold_runs}")
+
+    cold = measure_cold(args)
+    warm_uncached = measure_warm(args, cached=False)
+    warm_cached = measure_warm(args, cached=True)
+
+    results = {
+        'benchmark': 'lambda_team_api',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'parameters': {
+            'members': args.members,
+            'invocations': args.invocations,
+            'coldRuns': args.cold_runs,
+            'ttl': args.ttl,
+            'scanLatency': args.scan_latency
+        },
+        'cold': cold,
+        'warmUncached': warm_uncached,
+        'warmCached': warm_cached
+    }
+
+    print(f"\n❄️  Cold start (median of {cold['runs']})")
+    print(f"   Module import:    {cold['importMs']:.1f} ms")
+    if cold['clientInitMs'] is not None:
+        print(f"   Client init:      {cold['clientInitMs']:.1f} ms")
+    print(f"   First invocation: {cold['firstInvocationMs']:.1f} ms")
+    print("\n🔥 Warm invocations")
+    print(f"   No cache: p50 {warm_uncached['p50Ms']:.2f} ms, p99 {warm_uncached['p99Ms']:.2f} ms "
+          f"({warm_uncached['scanCalls']} scan requests)")
+    print(f"   Cached:   p50 {warm_cached['p50Ms']:.2f} ms, p99 {warm_cached['p99Ms']:.2f} ms "
+          f"({warm_cached['scanCalls']} scan requests)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    ok = True
+    if args.max_cold_ms is not None and cold['firstInvocationMs'] > args.max_cold_ms:
+        print(f"\n❌ Cold first invocation {cold['firstInvocationMs']:.1f} ms exceeds {args.max_cold_ms} ms")
+        ok = False
+    if args.max_warm_p99_ms is not None and warm_cached['p99Ms'] > args.max_warm_p99_ms:
+        print(f"\n❌ Warm p99 {warm_cached['p99Ms']:.2f} ms exceeds {args.max_warm_p99_ms} ms")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
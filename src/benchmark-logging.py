@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of request throughput with logging on and off
+Drives the Flask Team Data API, the Flask chatbot /chat route and the team
+Lambda handler from several threads against the local stand-ins
+(dynamodb_stub.py, qbusiness_stub.py) under each logging mode:
+  off        - LOG_LEVEL=CRITICAL, nothing is written (baseline)
+  text-sync  - plain text written on the request thread (the old basicConfig setup)
+  json-sync  - JSON lines written on the request thread (LOG_ASYNC=false)
+  json-async - JSON lines queued and written by the background thread (default)
+
+Log lines go to a sink that sleeps --sink-delay-ms per write, standing in for
+stderr piped to a container log driver or CloudWatch agent under load (0 =
+as fast as memory). Each mode runs in a fresh interpreter, since the logging
+settings are read at import time. The Lambda target is driven from a single
+thread, as an execution environment serves one invocation at a time, and
+waits for the queue to drain before each invocation returns. Reports requests
+per second, p50/p99 latency, lines written and dropped, and how long the
+queue took to drain after the last request.
+
+Usage:
+    python3 benchmark-logging.py --output logging-bench.json
+    python3 benchmark-logging.py --sink-delay-ms 0 --threads 16 --requests 4000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+import contextlib
+
+from bench_utils import percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODES = {
+    'off': {'LOG_LEVEL': 'CRITICAL'},
+    'text-sync': {'LOG_FORMAT': 'text', 'LOG_ASYNC': 'false'},
+    'json-sync': {'LOG_ASYNC': 'false'},
+    'json-async': {}
+}
+TARGETS = ('team', 'chat', 'lambda')
+
+
+class SlowSink:
+    """Text stream that takes delay seconds per write and counts lines"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.lines = 0
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            if self.delay:
+                time.sleep(self.delay)
+            self.lines += text.count('\n')
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def make_callers():
+    """One request function per target; each returns the HTTP status"""
+    from dynamodb_stub import LocalTable, make_member
+    from qbusiness_stub import LatencyModel, QBusinessStub
+
+    table = LocalTable((make_member(i) for i in range(500)), latency=0)
+
+    import team_api
+    import chatbot_backend
+    import lambda_team_api
+
+    team_api.team_api.table = table
+    lambda_team_api._table = table
+    chatbot_backend.chatbot.q_business_client = QBusinessStub(latency=LatencyModel('fixed', 0), seed=1)
+    team_client = team_api.app.test_client()
+    chat_client = chatbot_backend.app.test_client()
+    event = {'httpMethod': 'GET', 'resource': '/api/team', 'queryStringParameters': {'limit': '20'}}
+
+    class Context:
+        aws_request_id = 'benchmark'
+
+    return {
+        'team': lambda n: team_client.get('/api/team?limit=20').status_code,
+        'chat': lambda n: chat_client.post('/chat', json={'message': f'Pergunta {n}', 'cache': False}).status_code,
+        'lambda': lambda n: lambda_team_api.lambda_handler(event, Context())['statusCode']
+    }
+
+
+def run_case(call, args, sink, threads):
+    """Send args.requests requests from several threads; latency and throughput"""
+    import structured_logging
+
+    latencies = []
+    statuses = {}
+    counter = iter(range(args.requests))
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for n in counter:
+            start = time.perf_counter()
+            status = call(n)
+            local.append(time.perf_counter() - start)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local)
+
+    for n in range(args.warmup):
+        call(-n - 1)
+    structured_logging.flush(60)
+    lines_before, dropped_before = sink.lines, structured_logging.log_stats()['dropped']
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    drain_start = time.perf_counter()
+    structured_logging.flush(60)
+    drain = time.perf_counter() - drain_start
+
+    return {
+        'requests': len(latencies),
+        'statuses': {str(k): v for k, v in statuses.items()},
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50Ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99Ms': round(percentile(latencies, 99) * 1000, 3),
+        'lines': sink.lines - lines_before,
+        'dropped': structured_logging.log_stats()['dropped'] - dropped_before,
+        'drainMs': round(drain * 1000, 1)
+    }
+
+
+def child(args):
+    """Runs in a fresh interpreter under one logging mode: every target, results as JSON on stdout"""
+    sink = SlowSink(args.sink_delay_ms / 1000)
+    # Handlers are created at import time and write to whatever sys.stderr is then
+    sys.stderr = sink
+
+    callers = make_callers()
+    results = []
+    # The Lambda prints one EMF metrics line per invocation; keep them out of the JSON output
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for target in args.targets.split(','):
+            threads = 1 if target == 'lambda' else args.threads
+            result = run_case(callers[target], args, sink, threads)
+            results.append(dict({'mode': args.mode, 'target': target, 'threads': threads}, **result))
+
+    stdout.write(json.dumps(results) + '\n')
+
+
+def run_mode(args, mode):
+    command = [
+        sys.executable, __file__, '--child', '--mode', mode, '--targets', args.targets,
+        '--threads', str(args.threads), '--requests', str(args.requests), '--warmup', str(args.warmup),
+        '--sink-delay-ms', str(args.sink_delay_ms)
+    ]
+    env = dict(os.environ, AWS_DEFAULT_REGION='us-east-1', AWS_EC2_METADATA_DISABLED='true',
+               Q_BUSINESS_APPLICATION_ID='logging-benchmark', CHAT_RATE_LIMIT='0',
+               CHAT_MAX_IN_FLIGHT='1000', CHAT_MAX_QUEUE='1000', **MODES[mode])
+    for name in ('LOG_LEVEL', 'LOG_FORMAT', 'LOG_ASYNC'):
+        if name not in MODES[mode]:
+            env.pop(name, None)
+    output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=BASE_DIR, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_results(results, modes):
+    baseline = {r['target']: r for r in results if r['mode'] == 'off'}
+    for target in dict.fromkeys(r['target'] for r in results):
+        print(f"\n🎯 {target}")
+        print(f"   {'mode':<11} {'req/s':>8} {'vs off':>7} {'p50':>9} {'p99':>9} {'lines':>6} {'dropped':>7} {'drain':>8}")
+        for mode in modes:
+            row = next(r for r in results if r['target'] == target and r['mode'] == mode)
+            off = baseline.get(target)
+            relative = f"{row['rps'] / off['rps']:>6.0%}" if off else '     -'
+            line = (f"   {mode:<11} {row['rps']:>8.1f} {relative:>7} {row['p50Ms']:>7.2f}ms {row['p99Ms']:>7.2f}ms "
+                    f"{row['lines']:>6} {row['dropped']:>7} {row['drainMs']:>6.1f}ms")
+            if set(row['statuses']) - {'200'}:
+                line += f"  ⚠️  {row['statuses']}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of request throughput with logging on and off')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated logging modes to run')
+    parser.add_argument('--targets', default=','.join(TARGETS), help='Comma-separated targets: team, chat, lambda')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent client threads (the Lambda target uses one)')
+    parser.add_argument('--requests', type=int, default=4000, help='Timed requests per target')
+    parser.add_argument('--warmup', type=int, default=50, help='Untimed requests per target')
+    parser.add_argument('--sink-delay-ms', type=float, default=0.2, help='Milliseconds each log write takes')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return True
+
+    modes = [name.strip() for name in args.modes.split(',') if name.strip()]
+    for name in modes:
+        if name not in MODES:
+            parser.error(f'Unknown mode: {name}')
+    for name in args.targets.split(','):
+        if name not in TARGETS:
+            parser.error(f'Unknown target: {name}')
+
+    print("📝 Logging Benchmark")
+    print("=" * 50)
+    print(f"Modes: {', '.join(modes)}; {args.threads} threads, {args.requests} requests per target, "
+          f"{args.sink_delay_ms:g} ms per log write")
+
+    started = time.perf_counter()
+    results = []
+    for mode in modes:
+        results += run_mode(args, mode)
+    print_results(results, modes)
+
+    report = {
+        'benchmark': 'logging',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'parameters': {
+            'modes': modes,
+            'targets': args.targets.split(','),
+            'threads': args.threads,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'sinkDelayMs': args.sink_delay_ms
+        },
+        'elapsedSeconds': round(time.perf_counter() - started, 1),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
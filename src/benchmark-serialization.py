@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the shared JSON response layer (api_response.py)
+Compares the previous stdlib json.dumps calls with api_response.dumps on a
+team roster and on chat responses carrying large sourceAttributions.
+
+Usage:
+    python3 benchmark-serialization.py --members 5000 --output serialization-bench.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+from decimal import Decimal
+
+import api_response
+from dynamodb_stub import make_member
+from team_data import normalize_member
+
+
+def build_roster(members):
+    return {'success': True, 'data': [normalize_member(make_member(i)) for i in range(members)]}
+
+
+def build_chat_response(attributions):
+    """Chat response shaped like chat_sync output, including datetimes and Decimals"""
+    return {
+        'success': True,
+        'response': 'Os parceiros do projeto incluem ' * 40,
+        'conversationId': 'c0ffee00-0000-4000-8000-000000000000',
+        'sourceAttributions': [
+            {
+                'title': f'Relatório de parceria {i}',
+                'snippet': 'Trecho do documento com informações sobre o parceiro. ' * 30,
+                'url': f'https://dataiesb.com/parceiros/{i}',
+                'citationNumber': Decimal(i + 1),
+                'updatedAt': datetime.datetime(2024, 5, 1, 12, 0, tzinfo=datetime.timezone.utc),
+                'textMessageSegments': [
+                    {'beginOffset': Decimal(j * 10), 'endOffset': Decimal(j * 10 + 9)} for j in range(10)
+                ]
+            }
+            for i in range(attributions)
+        ]
+    }
+
+
+def time_encoder(encode, payload, iterations):
+    encode(payload)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        size = len(encode(payload))
+    elapsed = time.perf_counter() - start
+    return {
+        'perCallMs': round(elapsed / iterations * 1000, 4),
+        'callsPerSecond': round(iterations / elapsed, 1),
+        'bytes': size
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON serialization of API payloads')
+    parser.add_argument('--members', type=int, default=5000, help='Members in the roster payload')
+    parser.add_argument('--attributions', type=int, default=50, help='sourceAttributions per chat response')
+    parser.add_argument('--iterations', type=int, default=50, help='Serializations timed per case')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    encoders = {
+        # What the APIs did before: jsonify/json.dumps with default=str
+        'stdlib': lambda payload: json.dumps(payload, default=str).encode('utf-8'),
+        'api_response': api_response.dumps
+    }
+
+    payloads = {
+        'teamRoster': build_roster(args.members),
+        'chatResponse': build_chat_response(args.attributions)
+    }
+
+    print("⏱️  Serialization Benchmark")
+    print("=" * 50)
+    print(f"api_response backend: {'orjson' if api_response.orjson else 'stdlib json'}")
+
+    results = {
+        'benchmark': 'serialization',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'backend': 'orjson' if api_response.orjson else 'json',
+        'parameters': vars(args),
+        'cases': {}
+    }
+
+    for payload_name, payload in payloads.items():
+        print(f"\n📦 {payload_name}")
+        case = results['cases'][payload_name] = {}
+        for encoder_name, encode in encoders.items():
+            case[encoder_name] = time_encoder(encode, payload, args.iterations)
+            r = case[encoder_name]
+            print(f"   {encoder_name:<13} {r['perCallMs']:>8.3f} ms/call  {r['bytes']:>9} bytes")
+        speedup = case['stdlib']['perCallMs'] / case['api_response']['perCallMs']
+        case['speedup'] = round(speedup, 2)
+        print(f"   speedup: {speedup:.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark for the Amazon Q Business chatbot
+Measures module import time in fresh interpreters, then starts the ASGI app
+under uvicorn and times how long until GET / answers (liveness) and GET /ready
+reports the Q Business client as warm (readiness). Credentials come from a
+local credential_process, so slow credential lookups can be simulated without
+AWS and no request ever leaves the machine.
+
+Usage:
+    python3 benchmark-startup.py --output startup-bench.json
+    python3 benchmark-startup.py --scenarios static,slow,none --credential-delay 3
+    python3 benchmark-startup.py --max-import-ms 500 --max-live-ms 1500   # fail on regressions
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import http.client
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULES = ['chatbot_backend', 'chatbot_asgi']
+
+# static: credentials resolve at once, slow: after --credential-delay, none: never
+SCENARIOS = ('static', 'slow', 'none')
+
+
+def import_child(module):
+    """Runs in a fresh interpreter: time one import, reported as JSON on stdout"""
+    start = time.perf_counter()
+    __import__(module)
+    print(json.dumps({'importMs': (time.perf_counter() - start) * 1000}))
+
+
+def measure_imports(env, runs):
+    results = {}
+    for module in MODULES:
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, __file__, '--import-child', module],
+                capture_output=True, text=True, check=True, cwd=BASE_DIR, env=env
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1])['importMs'])
+        results[module] = {
+            'runs': runs,
+            'medianMs': round(statistics.median(samples), 3),
+            'maxMs': round(max(samples), 3)
+        }
+    return results
+
+
+def credentials_env(workdir, scenario, delay):
+    """Environment with AWS credentials resolved the way the scenario asks, and no metadata lookups"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith('AWS_')}
+    config_path = os.path.join(workdir, f'aws-config-{scenario}')
+    with open(config_path, 'w') as f:
+        f.write('[default]\nregion = us-east-1\n')
+        if scenario != 'none':
+            # credential_process is a regular botocore credential provider
+            script = (f"import time, json; time.sleep({delay}); "
+                      "print(json.dumps({'Version': 1, 'AccessKeyId': 'benchmark', 'SecretAccessKey': 'benchmark'}))")
+            f.write(f'credential_process = {sys.executable} -c "{script}"\n')
+
+    env.update({
+        'AWS_CONFIG_FILE': config_path,
+        'AWS_SHARED_CREDENTIALS_FILE': os.path.join(workdir, 'missing-credentials'),
+        'AWS_EC2_METADATA_DISABLED': 'true',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'Q_BUSINESS_APPLICATION_ID': 'benchmark',
+        'PYTHONUNBUFFERED': '1'
+    })
+    return env
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get_status(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+
+
+def measure_startup(env, ready_timeout):
+    """Start uvicorn once; ms until / answers 200 and until /ready answers 200 (None if it never does)"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'chatbot_asgi:app', '--host', '127.0.0.1',
+         '--port', str(port), '--log-level', 'warning'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    live_ms = ready_ms = None
+    try:
+        deadline = start + ready_timeout
+        while time.perf_counter() < deadline and server.poll() is None:
+            if live_ms is None and get_status(port, '/') == 200:
+                live_ms = (time.perf_counter() - start) * 1000
+            if live_ms is not None and get_status(port, '/ready') == 200:
+                ready_ms = (time.perf_counter() - start) * 1000
+                break
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return live_ms, ready_ms
+
+
+def summarize_startup(samples):
+    values = [s for s in samples if s is not None]
+    return {
+        'medianMs': round(statistics.median(values), 3) if values else None,
+        'maxMs': round(max(values), 3) if values else None,
+        'missed': len(samples) - len(values)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chatbot import time and time to live/ready')
+    parser.add_argument('--import-runs', type=int, default=5, help='Fresh interpreters per module import')
+    parser.add_argument('--startup-runs', type=int, default=3, help='Server starts per scenario')
+    parser.add_argument('--scenarios', default='static,slow', help='Comma-separated: static, slow, none')
+    parser.add_argument('--credential-delay', type=float, default=2.0, help='Seconds the slow credential lookup takes')
+    parser.add_argument('--ready-timeout', type=float, default=15, help='Seconds to wait for /ready per start')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--max-import-ms', type=float, help='Fail if importing chatbot_asgi takes longer (median)')
+    parser.add_argument('--max-live-ms', type=float, help='Fail if GET / takes longer to answer after start (median)')
+    parser.add_argument('--max-ready-ms', type=float, help='Fail if /ready takes longer with static credentials (median)')
+    parser.add_argument('--import-child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.import_child:
+        import_child(args.import_child)
+        return True
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'Unknown scenario: {name}')
+
+    print("🚀 Chatbot Startup Benchmark")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        imports = measure_imports(credentials_env(workdir, 'static', 0), args.import_runs)
+        print(f"\n📦 Module import (median of {args.import_runs})")
+        for module, result in imports.items():
+            print(f"   {module:<16} {result['medianMs']:>8.1f} ms  (max {result['maxMs']:.1f} ms)")
+
+        startup = {}
+        print(f"\n⏱️  Server start to live / ready (median of {args.startup_runs})")
+        for name in scenarios:
+            delay = args.credential_delay if name == 'slow' else 0.0
+            env = credentials_env(workdir, name, delay)
+            # Without credentials the server never gets ready; a short wait is enough to show it stays live
+            timeout = min(args.ready_timeout, 3) if name == 'none' else args.ready_timeout
+            runs = [measure_startup(env, timeout) for _ in range(args.startup_runs)]
+            startup[name] = {
+                'credentialDelaySeconds': delay if name != 'none' else None,
+                'live': summarize_startup([live for live, _ in runs]),
+                'ready': summarize_startup([ready for _, ready in runs])
+            }
+            live, ready = startup[name]['live'], startup[name]['ready']
+            ready_text = f"{ready['medianMs']:.1f} ms" if ready['medianMs'] is not None else 'never'
+            live_text = f"{live['medianMs']:.1f} ms" if live['medianMs'] is not None else 'never'
+            print(f"   {name:<8} live {live_text:>10}   ready {ready_text:>10}")
+
+    results = {
+        'benchmark': 'chatbot-startup',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'parameters': {
+            'importRuns': args.import_runs,
+            'startupRuns': args.startup_runs,
+            'scenarios': scenarios,
+            'credentialDelay': args.credential_delay
+        },
+        'imports': imports,
+        'startup': startup
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    ok = True
+    import_ms = imports['chatbot_asgi']['medianMs']
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"\n❌ Importing chatbot_asgi takes {import_ms:.1f} ms, budget {args.max_import_ms} ms")
+        ok = False
+    for name, result in startup.items():
+        live_ms = result['live']['medianMs']
+        if args.max_live_ms is not None and (live_ms is None or live_ms > args.max_live_ms):
+            print(f"\n❌ {name}: GET / answered after {live_ms} ms, budget {args.max_live_ms} ms")
+            ok = False
+    static_ready = startup.get('static', {}).get('ready', {}).get('medianMs')
+    if args.max_ready_ms is not None and 'static' in startup and (static_ready is None or static_ready > args.max_ready_ms):
+        print(f"\n❌ static: /ready after {static_ready} ms, budget {args.max_ready_ms} ms")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the team data path, from 10 to 100k members
+Seeds the local DynamoDB stand-in (dynamodb_stub.py) with rosters of each size
+and drives the Flask Team Data API (GET /api/team) and the team Lambda handler
+with every retrieval strategy they support:
+  scan           - full roster, sequential paginated scan on every request (cache off)
+  parallel-scan  - full roster, segmented scan on worker threads (cache off)
+  snapshot       - serialized roster served from memory
+  snapshot-gzip  - same, gzip-compressed variant
+  snapshot-br    - same, brotli variant (only when brotli is installed)
+  not-modified   - conditional request answered 304 from the snapshot's ETag
+  grouped        - ?group=true, grouped by category from the snapshot
+  page           - ?limit=100, first page of a paginated scan
+  category       - ?category=Professores, Query on the category index
+
+Per case it reports latency (p50/p95/mean), DynamoDB calls and time, peak
+memory allocated by one request (tracemalloc) and the response size. For the
+Lambda, the size of the response payload is checked against the 6 MB limit.
+Each configuration runs in a fresh interpreter, since the scan settings are
+read at import time. DynamoDB time includes the stand-in's own per-item work,
+which is of the same order as boto3's response parsing.
+
+Usage:
+    python3 benchmark-team-data.py --output team-bench.json
+    python3 benchmark-team-data.py --sizes 1000,10000 --strategies scan,snapshot,page
+    python3 benchmark-team-data.py --baseline team-bench.json   # compare p50 with an earlier report
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+import tracemalloc
+import importlib.util
+
+from bench_utils import percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SIZES = (10, 100, 1000, 10000, 100000)
+STRATEGIES = ('scan', 'parallel-scan', 'snapshot', 'snapshot-gzip', 'snapshot-br',
+              'not-modified', 'grouped', 'page', 'category')
+# Strategies that read DynamoDB on every request instead of using the roster snapshot
+UNCACHED = ('scan', 'parallel-scan')
+TARGETS = ('flask', 'lambda')
+
+# Synchronous Lambda invocations cannot return more than this
+LAMBDA_PAYLOAD_LIMIT = 6 * 1024 * 1024
+
+
+def strategy_request(strategy, etag=None):
+    """(query parameters, request headers) of one strategy"""
+    params, headers = {}, {'Accept': 'application/json'}
+    if strategy == 'snapshot-gzip':
+        headers['Accept-Encoding'] = 'gzip'
+    elif strategy == 'snapshot-br':
+        headers['Accept-Encoding'] = 'br'
+    elif strategy == 'not-modified':
+        headers['If-None-Match'] = etag or ''
+    elif strategy == 'grouped':
+        params['group'] = 'true'
+    elif strategy == 'page':
+        params['limit'] = '100'
+    elif strategy == 'category':
+        params['category'] = 'Professores'
+    return params, headers
+
+
+def flask_caller(team_api):
+    client = team_api.app.test_client()
+
+    def call(params, headers):
+        response = client.get('/api/team', query_string=params, headers=headers)
+        response.get_data()
+        return response
+
+    def describe(response):
+        body = response.get_data()
+        return response.status_code, body, len(body), response.headers.get('ETag')
+    return call, describe
+
+
+def lambda_caller(lambda_team_api):
+    def call(params, headers):
+        event = {'httpMethod': 'GET', 'path': '/team', 'headers': headers,
+                 'queryStringParameters': params or None}
+        return lambda_team_api.lambda_handler(event, None)
+
+    def describe(response):
+        body = response['body']
+        raw = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+        # What Lambda has to return: the whole response object, base64 body included
+        payload = len(json.dumps(response).encode('utf-8'))
+        return response['statusCode'], raw, payload, response['headers'].get('ETag')
+    return call, describe
+
+
+def set_roster_cache(roster, cached):
+    """TTL 0 (and no stale window) reloads the roster on every request"""
+    roster.ttl = roster.stale_ttl = 3600 if cached else 0
+    roster.invalidate()
+
+
+def run_case(caller, strategy, args, dynamodb_totals):
+    """Time one strategy against one target; the first request warms the snapshot"""
+    call, describe = caller
+    params, headers = strategy_request(strategy)
+    response = call(params, headers)
+    if strategy == 'not-modified':
+        params, headers = strategy_request(strategy, describe(response)[3])
+
+    samples = []
+    calls_before, seconds_before = dynamodb_totals()
+    started = time.perf_counter()
+    while len(samples) < args.max_runs and (
+            len(samples) < args.min_runs or time.perf_counter() - started < args.case_seconds):
+        start = time.perf_counter()
+        response = call(params, headers)
+        samples.append((time.perf_counter() - start) * 1000)
+    calls, seconds = dynamodb_totals()
+    status, body, payload, _ = describe(response)
+
+    # Separate run: tracemalloc slows allocation-heavy code down several times
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    call(params, headers)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'status': status,
+        'runs': len(samples),
+        'p50Ms': round(percentile(samples, 50), 3),
+        'p95Ms': round(percentile(samples, 95), 3),
+        'meanMs': round(statistics.fmean(samples), 3),
+        'maxMs': round(max(samples), 3),
+        'dynamodbCalls': round((calls - calls_before) / len(samples), 2),
+        'dynamodbMs': round((seconds - seconds_before) * 1000 / len(samples), 3),
+        'peakAllocKB': round((peak - baseline) / 1024, 1),
+        'responseBytes': len(body),
+        'payloadBytes': payload
+    }
+
+
+def child(args):
+    """Runs in a fresh interpreter: every strategy of one configuration, results as JSON on stdout"""
+    from dynamodb_stub import LocalTable, make_member
+
+    logging.disable(logging.INFO)
+    table = LocalTable((make_member(i) for i in range(args.members)), latency=args.scan_latency)
+
+    import team_api
+    import lambda_team_api
+    from metrics import UPSTREAM_SECONDS
+
+    team_api.team_api.table = table
+    lambda_team_api._table = table
+    targets = {
+        'flask': (flask_caller(team_api), team_api.team_api.roster),
+        'lambda': (lambda_caller(lambda_team_api), lambda_team_api._roster)
+    }
+
+    def dynamodb_totals():
+        return UPSTREAM_SECONDS.totals(service='dynamodb')
+
+    results = []
+    # The Lambda prints one EMF metrics line per invocation; keep them out of the JSON output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for strategy in args.strategies.split(','):
+            for target in TARGETS:
+                caller, roster = targets[target]
+                set_roster_cache(roster, strategy not in UNCACHED)
+                result = run_case(caller, strategy, args, dynamodb_totals)
+                results.append(dict({'members': args.members, 'target': target, 'strategy': strategy}, **result))
+
+    print(json.dumps(results))
+
+
+def run_configuration(args, members, segments, strategies):
+    command = [
+        sys.executable, __file__, '--child', '--members', str(members), '--strategies', ','.join(strategies),
+        '--scan-latency', str(args.scan_latency), '--min-runs', str(args.min_runs),
+        '--max-runs', str(args.max_runs), '--case-seconds', str(args.case_seconds)
+    ]
+    # Lambda compression is opt-in; turned on so the gzip/br cases measure it on both targets
+    env = dict(os.environ, TEAM_SCAN_SEGMENTS=str(segments), TEAM_LAMBDA_COMPRESSION='true',
+               AWS_DEFAULT_REGION='us-east-1', AWS_EC2_METADATA_DISABLED='true')
+    output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=BASE_DIR, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def load_baseline(path):
+    with open(path) as f:
+        report = json.load(f)
+    return {(r['members'], r['target'], r['strategy']): r for r in report['results']}
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def print_results(members, rows, baseline):
+    print(f"\n👥 {members} members")
+    print(f"   {'strategy':<14} {'flask p50':>10} {'lambda p50':>11} {'ddb calls':>9} "
+          f"{'peak alloc':>11} {'body':>10}{'  vs baseline' if baseline else ''}")
+    by_strategy = {}
+    for row in rows:
+        by_strategy.setdefault(row['strategy'], {})[row['target']] = row
+
+    for strategy, targets in by_strategy.items():
+        flask, lam = targets['flask'], targets['lambda']
+        line = (f"   {strategy:<14} {flask['p50Ms']:>8.2f}ms {lam['p50Ms']:>9.2f}ms {flask['dynamodbCalls']:>9g} "
+                f"{format_size(flask['peakAllocKB'] * 1024):>11} {format_size(flask['responseBytes']):>10}")
+        if baseline:
+            old = baseline.get((members, 'flask', strategy))
+            line += f"  {flask['p50Ms'] / old['p50Ms']:>6.2f}x" if old and old['p50Ms'] else '       -'
+        if lam['payloadBytes'] > LAMBDA_PAYLOAD_LIMIT:
+            line += '  ⚠️  over the Lambda 6 MB limit'
+        elif lam['status'] >= 400:
+            line += f"  ⚠️  HTTP {lam['status']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the team data path (Flask API and Lambda)')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='Comma-separated roster sizes')
+    parser.add_argument('--strategies', default=','.join(STRATEGIES), help='Comma-separated strategies to run')
+    parser.add_argument('--segments', type=int, default=4, help='Scan segments of the parallel-scan strategy')
+    parser.add_argument('--scan-latency', type=float, default=0.005, help='Simulated seconds per DynamoDB request')
+    parser.add_argument('--min-runs', type=int, default=3, help='Timed requests per case, at least')
+    parser.add_argument('--max-runs', type=int, default=200, help='Timed requests per case, at most')
+    parser.add_argument('--case-seconds', type=float, default=0.5, help='Keep timing a case until this many seconds')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare p50 latencies with')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--members', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return True
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    strategies = [name.strip() for name in args.strategies.split(',') if name.strip()]
+    for name in strategies:
+        if name not in STRATEGIES:
+            parser.error(f'Unknown strategy: {name}')
+    if 'snapshot-br' in strategies and not importlib.util.find_spec('brotli'):
+        print("ℹ️  brotli is not installed, skipping snapshot-br")
+        strategies.remove('snapshot-br')
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    sequential = [name for name in strategies if name != 'parallel-scan']
+
+    print("📊 Team Data Benchmark")
+    print("=" * 50)
+    print(f"Sizes: {', '.join(map(str, sizes))}, strategies: {len(strategies)}, "
+          f"{args.scan_latency * 1000:g} ms per DynamoDB request")
+
+    started = time.perf_counter()
+    results = []
+    for members in sizes:
+        rows = []
+        if sequential:
+            rows += run_configuration(args, members, 1, sequential)
+        if 'parallel-scan' in strategies:
+            rows += run_configuration(args, members, args.segments, ['parallel-scan'])
+        print_results(members, rows, baseline)
+        results += rows
+
+    report = {
+        'benchmark': 'team-data',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'parameters': {
+            'sizes': sizes,
+            'strategies': strategies,
+            'segments': args.segments,
+            'scanLatency': args.scan_latency,
+            'minRuns': args.min_runs,
+            'maxRuns': args.max_runs,
+            'caseSeconds': args.case_seconds
+        },
+        'elapsedSeconds': round(time.perf_counter() - started, 1),
+        'results': results
+    }
+    print(f"\n⏱️  Finished in {report['elapsedSeconds']}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    failed = [r for r in results if r['status'] >= 500]
+    for r in failed:
+        print(f"❌ {r['target']} {r['strategy']} @ {r['members']}: HTTP {r['status']}")
+    return not failed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Answer caching and request coalescing for the Amazon Q Business chatbot
+Keeps first-turn answers in memory so repeated questions skip the upstream call
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_message(message):
+    """Normalize a user message so trivially different phrasings share a cache entry"""
+    return ' '.join(message.casefold().split()).rstrip('?!. ')
+
+
+class AnswerCache:
+    def __init__(self, max_size=256, ttl=600):
+        """
+        Size-bounded LRU cache with a per-entry time to live
+
+        Args:
+            max_size (int): Maximum number of answers kept; 0 disables the cache
+            ttl (float): Seconds an answer stays valid after being stored
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    @staticmethod
+    def make_key(message, application_id, user_id):
+        """Build the cache key from the normalized message and the Q Business scope"""
+        return (application_id, user_id, normalize_message(message))
+
+    def get(self, key):
+        """Return the cached answer for key, or None if missing or expired"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                # Expired entries stay until evicted so get_stale() can still use them
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key):
+        """Return the stored answer for key even if expired (fallback while the upstream is down)"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def set(self, key, value):
+        """Store an answer, evicting the least recently used entries when full"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters reported on the health endpoint"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'ttlSeconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces identical concurrent calls into a single upstream call
+
+        While a call for a key is running, other callers with the same key wait
+        for it and receive its result (or its exception) instead of issuing their own.
+        Nothing is kept once the call finishes.
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() for key, or wait for the call already in flight for key
+
+        Returns:
+            tuple: (result, leader) - leader is False when the result was shared
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.upstream_calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = fn()
+            return call.result, True
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'inFlight': len(self._calls),
+                'upstreamCalls': self.upstream_calls,
+                'coalesced': self.coalesced
+            }
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Production ASGI entry point for the Amazon Q Business chatbot
+Serves /chat and the health check natively on the event loop and mounts the
+Flask app for every other route.
+
+Run with: uvicorn chatbot_asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+
+import profiling
+import structured_logging
+from admission import AdmissionRejected, client_key
+from api_response import dumps
+from metrics import HTTP_IN_FLIGHT, record_request
+from chatbot_backend import (
+    app as flask_app, admission, chatbot, health_payload, parse_chat_request, wants_cache
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads running Flask routes (0 = sized from the admission limits). Each open /chat/stream
+# holds one for its whole duration, and so does each chat request waiting in the admission queue
+WSGI_WORKERS = int(os.getenv('WSGI_WORKERS', 0))
+# Threads left for /widget and the other Flask routes when every chat slot and queue place is taken
+WSGI_SPARE_WORKERS = 8
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+]
+
+
+class ChatbotASGI:
+    def __init__(self, wsgi_app, wsgi_workers=WSGI_WORKERS):
+        """
+        ASGI application wrapping the Flask chatbot
+
+        Args:
+            wsgi_app: Flask app that handles every route not served natively
+            wsgi_workers (int): Threads running the Flask routes (0 = sized from the admission limits)
+        """
+        # Chat requests admitted or queued by admission control each hold a Flask thread
+        chat_threads = admission.max_in_flight + admission.max_queue
+        if not wsgi_workers:
+            wsgi_workers = chat_threads + WSGI_SPARE_WORKERS
+        elif wsgi_workers <= chat_threads:
+            logger.warning("WSGI_WORKERS=%s does not exceed CHAT_MAX_IN_FLIGHT + CHAT_MAX_QUEUE (%s): "
+                           "queued chat requests can hold every thread and starve /widget", wsgi_workers, chat_threads)
+        self.wsgi_workers = wsgi_workers
+        # Flask routes run on their own thread pool, in parallel, with streamed bodies
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=wsgi_workers)
+        # boto3 is blocking, so admitted /chat requests run on a pool with a thread for each
+        # in-flight slot; the Q Business concurrency cap itself is applied by the chatbot
+        self.executor = ThreadPoolExecutor(max_workers=admission.max_in_flight, thread_name_prefix='qbusiness')
+        # Requests queued by admission control block a thread while they wait, so they get their own pool
+        self.admission_executor = ThreadPoolExecutor(
+            max_workers=admission.max_queue + 4, thread_name_prefix='admission'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http':
+            path = scope['path']
+            method = scope['method']
+
+            if path == '/' and method == 'GET':
+                await self.record(scope, send, lambda send: self.health_check(send))
+                return
+
+            if path == '/ready' and method == 'GET':
+                await self.record(scope, send, lambda send: self.readiness_check(send))
+                return
+
+            if path == '/chat' and method == 'POST':
+                handler = lambda send: self.chat(receive, send, scope)
+                if profiling.ENABLED:
+                    handler = self.profiled(scope, handler)
+                await self.record(scope, send, handler)
+                return
+
+        # Everything else (widget, streaming, CORS preflight...) goes to Flask
+        await self.wsgi(scope, receive, send)
+
+    @staticmethod
+    async def record(scope, send, handler):
+        """Run a natively served route, recording the same request metrics and access line as the Flask routes"""
+        response = {'status': 500, 'size': 0}
+        headers = dict(scope['headers'])
+        request_id = headers.get(structured_logging.REQUEST_ID_HEADER.lower().encode(), b'').decode('latin-1')
+        request_log, token = structured_logging.begin_request(scope['method'], scope['path'], request_id)
+
+        async def send_recorded(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                message = dict(message, headers=[
+                    *message.get('headers', []),
+                    (structured_logging.REQUEST_ID_HEADER.lower().encode(), request_log.request_id.encode())
+                ])
+            elif message['type'] == 'http.response.body':
+                response['size'] += len(message.get('body', b''))
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await handler(send_recorded)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            record_request(scope['method'], scope['path'], response['status'],
+                           time.perf_counter() - start, response['size'])
+            structured_logging.log_access(response['status'])
+            structured_logging.end_request(token)
+
+    @staticmethod
+    def profiled(scope, handler):
+        """Run a natively served route under a request profile; send_json adds its Server-Timing header"""
+        async def run(send):
+            headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+            started = profiling.begin(f"{scope['method']} {scope['path']}", headers)
+            try:
+                await handler(send)
+            finally:
+                profiling.end(*started)
+        return run
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # uvicorn binds the port only after startup completes, so AWS
+                # client creation runs in the background; /ready reports when it is done
+                chatbot.start_warm_up()
+                logger.info("ASGI chatbot ready (max upstream concurrency %s, %s WSGI workers)",
+                            chatbot.max_concurrency, self.wsgi_workers)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                self.admission_executor.shutdown(wait=False)
+                structured_logging.flush()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def health_check(self, send):
+        """Health check served on the event loop so it never waits behind upstream calls"""
+        await self.send_json(send, 200, health_payload())
+
+    async def readiness_check(self, send):
+        """Readiness probe: 200 once the Q Business client is warm, 503 until then"""
+        ready, checks = chatbot.readiness()
+        await self.send_json(send, 200 if ready else 503, {'ready': ready, 'checks': checks})
+
+    async def chat(self, receive, send, scope):
+        """Async equivalent of the Flask /chat route"""
+        body = await self.read_body(receive)
+        try:
+            with profiling.span('parse'):
+                data = json.loads(body or b'null')
+        except ValueError:
+            data = None
+
+        user_message, conversation_id, invalid = parse_chat_request(data)
+        if invalid:
+            await self.send_json(send, 400, invalid)
+            return
+
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        use_cache = wants_cache(data, headers)
+
+        client = client_key((scope.get('client') or [None])[0], headers)
+        try:
+            loop = asyncio.get_running_loop()
+            with profiling.span('admission'):
+                await loop.run_in_executor(self.admission_executor, admission.admit, client)
+        except AdmissionRejected as e:
+            await self.send_json(send, 429, {
+                'error': 'Too many requests',
+                'message': 'Too many requests, please try again shortly',
+                'reason': e.reason,
+                'retryAfter': e.retry_after
+            }, extra_headers=[(b'retry-after', str(e.retry_after).encode())])
+            return
+
+        try:
+            response = await self.call_upstream(user_message, conversation_id, use_cache)
+        except Exception as e:
+            logger.error("Error in chat endpoint: %s", e)
+            await self.send_json(send, 500, {
+                'error': 'Server error',
+                'message': 'An unexpected error occurred'
+            })
+            return
+        finally:
+            admission.release()
+
+        if response.get('retryAfter'):
+            # Circuit breaker open or every upstream slot taken: tell the client when to come back
+            await self.send_json(send, 503, response,
+                                 extra_headers=[(b'retry-after', str(response['retryAfter']).encode())])
+            return
+
+        await self.send_json(send, 500 if 'error' in response else 200, response)
+
+    async def call_upstream(self, message, conversation_id, use_cache):
+        """Run chat_with_q_business off the event loop"""
+        # Executor threads don't inherit the request's context (request id, profile): hand it over
+        context = contextvars.copy_context()
+        profile = profiling.current()
+        if profile is None:
+            call = lambda *args: context.run(chatbot.chat_with_q_business, *args)
+        else:
+            # Profile the call on the thread that makes it
+            call = lambda *args: context.run(profile.call, chatbot.chat_with_q_business, *args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, call, message, conversation_id, use_cache)
+
+    @staticmethod
+    async def read_body(receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    @staticmethod
+    async def send_json(send, status, payload, extra_headers=()):
+        with profiling.span('serialize'):
+            body = dumps(payload)
+        profile = profiling.current()
+        if profile is not None:
+            extra_headers = [*extra_headers, (b'server-timing', profile.server_timing().encode())]
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                *CORS_HEADERS,
+                *extra_headers
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = ChatbotASGI(flask_app)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('PORT', 5000))
+    print(f"Starting Amazon Q Business Chatbot (ASGI) on port {port}")
+    # Access lines come from structured_logging, off the event loop
+    uvicorn.run(app, host='0.0.0.0', port=port, access_log=False)
@@ -6,85 +6,279 @@ Integrates with Amazon Q Business to provide knowledge-based responses
 
 import os
 import json
-import boto3
-from flask import Flask, request, jsonify, render_template_string
+import hmac
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
-from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.exceptions import ClientError
 import logging
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from admission import AdmissionController, AdmissionRejected, client_key
+from api_response import dumps, json_response
+from chat_cache import AnswerCache, SingleFlight
+from conversation_store import ConversationStore
+from metrics import instrument_flask, track_upstream
+from profiling import profile_flask, span
+from qbusiness_router import EndpointRouter, EndpointUnavailableError, parse_endpoints
+from resilience import CircuitOpenError, RetryPolicy, error_code, is_retryable
+from semantic_cache import DEFAULT_IGNORE_WORDS, SemanticAnswerCache
+from structured_logging import configure_logging, log_flask, log_stats
+from widget_assets import WidgetAssets
+
+# Configure logging: JSON lines written by a background thread
+configure_logging('chatbot')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
+log_flask(app)  # Request ids and one access line per request
+instrument_flask(app)  # Request metrics, served on GET /metrics
+profile_flask(app)  # Server-Timing spans and cProfile dumps, when REQUEST_PROFILING=true
+
+class UpstreamBusyError(CircuitOpenError):
+    """
+    Raised when no upstream slot frees up within QBUSINESS_QUEUE_TIMEOUT
+
+    A CircuitOpenError, so callers answer it the same way: a stale cached
+    answer or 503 with Retry-After.
+    """
 
 class QBusinessChatbot:
     def __init__(self):
-        """Initialize the Amazon Q Business client"""
-        try:
-            # Initialize AWS session
-            self.session = boto3.Session()
-            self.q_business_client = self.session.client('qbusiness')
-            
-            # Configuration - these should be set as environment variables
-            self.application_id = os.getenv('Q_BUSINESS_APPLICATION_ID')
-            self.user_id = os.getenv('Q_BUSINESS_USER_ID', 'default-user')
-            
-            if not self.application_id:
-                logger.warning("Q_BUSINESS_APPLICATION_ID not set. Please configure your environment.")
-                
-        except NoCredentialsError:
-            logger.error("AWS credentials not found. Please configure your AWS credentials.")
-            self.q_business_client = None
-        except Exception as e:
-            logger.error(f"Error initializing Q Business client: {str(e)}")
-            self.q_business_client = None
+        """
+        Read the configuration; the Amazon Q Business clients are created by
+        warm_up() on a background thread, or on first use if that has not
+        finished, so importing this module never waits on AWS
+        """
+        # Configuration - these should be set as environment variables
+        self.application_id = os.getenv('Q_BUSINESS_APPLICATION_ID')
+        self.user_id = os.getenv('Q_BUSINESS_USER_ID', 'default-user')
+
+        # One endpoint per application/region (Q_BUSINESS_ENDPOINTS), or just Q_BUSINESS_APPLICATION_ID
+        self.router = EndpointRouter(parse_endpoints(os.getenv('Q_BUSINESS_ENDPOINTS'), self.application_id))
+        # Cached answers are shared by all endpoints, which serve the same knowledge base
+        self.application_id = self.application_id or self.router.primary.application_id
+
+        if not self.application_id:
+            logger.warning("Q_BUSINESS_APPLICATION_ID not set. Please configure your environment.")
+
+        self._warm_up_lock = threading.Lock()
+        self._warm_up_thread = None
+
+        # Retries for throttling/5xx only; each endpoint has a breaker that fails fast while it is unhealthy
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(os.getenv('QBUSINESS_MAX_ATTEMPTS', 3)),
+            base_delay=float(os.getenv('QBUSINESS_RETRY_BASE_DELAY', 0.2)),
+            max_delay=float(os.getenv('QBUSINESS_RETRY_MAX_DELAY', 2))
+        )
+        # While other endpoints remain, a failed call moves on instead of backing off
+        self.failover_policy = RetryPolicy(max_attempts=1)
+
+        # Q Business calls in flight at once, across every route and endpoint, and how long a call
+        # waits for a free slot; held for the whole call, retries and streamed answers included
+        self.max_concurrency = int(os.getenv('QBUSINESS_MAX_CONCURRENCY', 16))
+        self.queue_timeout = float(os.getenv('QBUSINESS_QUEUE_TIMEOUT', 10))
+        self._upstream_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._upstream_lock = threading.Lock()
+        self.upstream_in_flight = 0
+        self.upstream_waiting = 0
+        self.upstream_rejected = 0
+
+        # First-turn answer cache (ANSWER_CACHE_SIZE=0 disables it)
+        self.answer_cache = AnswerCache(
+            max_size=int(os.getenv('ANSWER_CACHE_SIZE', 256)),
+            ttl=float(os.getenv('ANSWER_CACHE_TTL', 600))
+        )
+        # Reworded repeats of recently answered questions (SEMANTIC_CACHE_SIZE=0 disables it)
+        self.semantic_cache = SemanticAnswerCache(
+            max_size=int(os.getenv('SEMANTIC_CACHE_SIZE', 512)),
+            ttl=float(os.getenv('ANSWER_CACHE_TTL', 600)),
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.8)),
+            dimensions=int(os.getenv('SEMANTIC_CACHE_DIMENSIONS', 2048)),
+            ignore_words=os.getenv('SEMANTIC_CACHE_IGNORE_WORDS', DEFAULT_IGNORE_WORDS)
+        )
+        # Identical first-turn questions asked concurrently share one upstream call
+        self.single_flight = SingleFlight()
+        # Transcripts of the conversations answered here, so history never needs Q Business
+        self.conversations = ConversationStore(
+            max_conversations=int(os.getenv('CONVERSATION_STORE_SIZE', 1000)),
+            max_turns=int(os.getenv('CONVERSATION_MAX_TURNS', 50)),
+            db_path=os.getenv('CONVERSATION_DB_PATH') or None
+        )
+
+    @property
+    def q_business_client(self):
+        """The primary endpoint's client, created here if warm_up() has not finished yet"""
+        return self.router.primary.client
+
+    @q_business_client.setter
+    def q_business_client(self, client):
+        # Tests and the offline load test swap in a stand-in client
+        self.router.primary.client = client
+
+    @property
+    def streaming_mode(self):
+        """
+        'incremental' when the client has the event-stream Chat operation, else 'buffered'
+
+        boto3 does not generate operations with event-stream input, so with the
+        real SDK this is 'buffered': /chat/stream waits for chat_sync and sends
+        the whole answer as one token event. Only clients providing chat()
+        (qbusiness_stub.py) stream the answer piece by piece.
+        """
+        return 'incremental' if hasattr(self.q_business_client, 'chat') else 'buffered'
+
+    @property
+    def breaker(self):
+        return self.router.primary.breaker
+
+    @property
+    def client_state(self):
+        """'ready' once any endpoint can be called, else the primary endpoint's state"""
+        if any(endpoint.client_state == 'ready' for endpoint in self.router.endpoints):
+            return 'ready'
+        return self.router.primary.client_state
+
+    def warm_up(self):
+        """Create the clients (retrying with backoff until they work) and allocate the caches"""
+        self.semantic_cache.warm_up()
+        self.router.init_clients()
+
+    def start_warm_up(self):
+        """Run warm_up() on a background thread, once"""
+        with self._warm_up_lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, name='qbusiness-warm-up', daemon=True)
+                self._warm_up_thread.start()
+
+    def readiness(self):
+        """
+        Whether the upstream client is warm and the app is configured
 
-    def chat_with_q_business(self, message, conversation_id=None):
+        Returns:
+            tuple: (ready, checks) - checks has the state of each dependency
+        """
+        primary = self.router.primary
+        checks = {
+            'applicationId': bool(self.application_id),
+            'qbusinessClient': self.client_state,
+            'semanticCache': self.semantic_cache.stats()['allocated'] or not self.semantic_cache.enabled
+        }
+        if len(self.router.endpoints) > 1:
+            checks['endpoints'] = {endpoint.name: endpoint.client_state for endpoint in self.router.endpoints}
+        if primary.client_error:
+            checks['clientError'] = primary.client_error
+        if primary.client_init_seconds is not None:
+            checks['clientInitSeconds'] = primary.client_init_seconds
+        ready = checks['applicationId'] and self.client_state == 'ready' and checks['semanticCache']
+        return ready, checks
+
+    def chat_with_q_business(self, message, conversation_id=None, use_cache=True):
         """
         Send a message to Amazon Q Business and get a response
         
         Args:
             message (str): User's message
             conversation_id (str): Optional conversation ID for context
+            use_cache (bool): Allow first-turn answers to be served from the answer cache
             
         Returns:
             dict: Response from Q Business or error message
         """
-        if not self.q_business_client or not self.application_id:
+        if not self.application_id or not self.router.available():
             return {
                 'error': 'Amazon Q Business not properly configured',
                 'message': 'Please check your AWS credentials and Q Business application ID'
             }
-        
+
+        # Follow-up turns depend on conversation context and are never cached or coalesced
+        if conversation_id:
+            return self._call_q_business(message, conversation_id)
+
+        cache_key = AnswerCache.make_key(message, self.application_id, self.user_id)
+        if use_cache:
+            with span('cache'):
+                cached = self._cached_answer(message, cache_key)
+            if cached is not None:
+                return cached
+
+        return self._first_turn(message, cache_key)
+
+    def _cached_answer(self, message, cache_key):
+        """Stored answer for the same question, or for a near-duplicate of it"""
+        cached = self.answer_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        match = self.semantic_cache.lookup(message, scope=(self.application_id, self.user_id))
+        if match is not None:
+            return dict(match.answer, similarity=round(match.score, 3))
+        return None
+
+    def _remember_answer(self, message, cache_key, response):
+        """Store a first-turn answer for exact and near-duplicate repeats"""
+        cacheable = self._cacheable(response)
+        self.answer_cache.set(cache_key, cacheable)
+        self.semantic_cache.add(message, cacheable, scope=(self.application_id, self.user_id))
+
+    def _first_turn(self, message, cache_key):
+        """Fetch a first-turn answer, sharing the upstream call with identical concurrent requests"""
+        def fetch():
+            response = self._call_q_business(message)
+            # Errors and stale fallbacks are handed to the waiters but never (re)cached
+            if 'error' not in response and not response.get('degraded'):
+                self._remember_answer(message, cache_key, response)
+            return response
+
+        response, leader = self.single_flight.do(cache_key, fetch)
+        if leader or 'error' in response:
+            return response
+        return self._cacheable(response)
+
+    @staticmethod
+    def _cacheable(response):
+        """
+        Copy of a first-turn answer that is safe to hand to other visitors
+
+        The conversation belongs to whoever asked first, so cached answers start
+        a fresh conversation on the next turn instead of joining that one.
+        """
+        return dict(response, conversationId=None, cached=True)
+
+    def _call_q_business(self, message, conversation_id=None):
+        """Issue a single chat_sync call to Amazon Q Business"""
         try:
             # Prepare the chat request
             chat_params = {
-                'applicationId': self.application_id,
                 'userId': self.user_id,
                 'userMessage': message
             }
             
-            # Add conversation ID if provided for context
-            if conversation_id:
-                chat_params['conversationId'] = conversation_id
-            
-            # Call Amazon Q Business
-            response = self.q_business_client.chat_sync(**chat_params)
+            # Call Amazon Q Business on the best endpoint (the conversation's own for follow-ups)
+            with self.upstream_slot():
+                response, endpoint = self._route('chat_sync', chat_params, conversation_id)
             
             # Extract the response
-            return {
+            result = {
                 'success': True,
                 'response': response.get('systemMessage', 'No response received'),
-                'conversationId': response.get('conversationId'),
+                # Follow-ups keep the id the client sent, so ids issued before routing stay untagged
+                'conversationId': conversation_id or self.router.conversation_id(endpoint, response.get('conversationId')),
                 'sourceAttributions': response.get('sourceAttributions', [])
             }
+            self.conversations.append(result['conversationId'], message, result)
+            return result
+            
+        except CircuitOpenError as e:
+            return self._degraded_response(message, conversation_id, busy=isinstance(e, UpstreamBusyError))
             
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            logger.error(f"AWS Client Error: {error_code} - {error_message}")
+            logger.error("AWS Client Error: %s - %s", error_code, error_message)
             
             return {
                 'error': f'AWS Error: {error_code}',
@@ -92,23 +286,357 @@ class QBusinessChatbot:
             }
             
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error("Unexpected error: %s", e)
+            return {
+                'error': 'Unexpected error occurred',
+                'message': str(e)
+            }
+
+    def _route(self, operation, params, conversation_id=None):
+        """
+        Call operation on the best endpoint, failing over to the next one for first turns
+
+        Every endpoint but the last gets a single attempt; the last one gets the
+        full retry policy. Follow-up turns only have their conversation's endpoint.
+
+        Returns:
+            tuple: (response, endpoint that answered)
+
+        Raises:
+            CircuitOpenError: If every endpoint's breaker refused the call, or
+                              no endpoint the call may use has a client
+            Exception: The last endpoint's error, or any non-retryable error
+        """
+        candidates = self.router.candidates(conversation_id)
+        if not candidates:
+            raise EndpointUnavailableError('No Q Business client available for this conversation')
+        for index, (endpoint, upstream_conversation_id) in enumerate(candidates):
+            last = index + 1 == len(candidates)
+            request = dict(params, applicationId=endpoint.application_id)
+            if upstream_conversation_id:
+                request['conversationId'] = upstream_conversation_id
+            policy = self.retry_policy if last else self.failover_policy
+            try:
+                response = policy.call(lambda: self._upstream(endpoint, operation, request), endpoint.breaker)
+                return response, endpoint
+            except CircuitOpenError:
+                if last:
+                    raise
+            except Exception as e:
+                if last or not is_retryable(e):
+                    raise
+                self.router.record_failover(endpoint, error_code(e))
+
+    @contextmanager
+    def upstream_slot(self):
+        """
+        Hold one of the max_concurrency upstream slots for the duration of the block
+
+        Raises:
+            UpstreamBusyError: If no slot freed up within queue_timeout
+        """
+        with self._upstream_lock:
+            self.upstream_waiting += 1
+        try:
+            with span('queue'):
+                acquired = self._upstream_slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._upstream_lock:
+                self.upstream_waiting -= 1
+
+        if not acquired:
+            with self._upstream_lock:
+                self.upstream_rejected += 1
+            raise UpstreamBusyError('No Q Business call slot freed up in time')
+
+        with self._upstream_lock:
+            self.upstream_in_flight += 1
+        try:
+            yield
+        finally:
+            with self._upstream_lock:
+                self.upstream_in_flight -= 1
+            self._upstream_slots.release()
+
+    def upstream_stats(self):
+        with self._upstream_lock:
             return {
+                'maxConcurrency': self.max_concurrency,
+                'inFlight': self.upstream_in_flight,
+                'waiting': self.upstream_waiting,
+                'rejected': self.upstream_rejected
+            }
+
+    def _upstream(self, endpoint, operation, params):
+        """Make one timed Q Business call (each retry attempt is recorded separately)"""
+        with track_upstream('qbusiness', operation), endpoint.track():
+            return getattr(endpoint.client, operation)(**params)
+
+    def _degraded_response(self, message, conversation_id=None, busy=False):
+        """
+        Answer while the circuit breaker is open or every upstream slot is taken, without calling Q Business
+
+        First-turn questions fall back to a previously cached answer even if it
+        expired; anything else gets an error carrying retryAfter.
+        """
+        if not conversation_id:
+            cached = self.answer_cache.get_stale(
+                AnswerCache.make_key(message, self.application_id, self.user_id)
+            )
+            if cached is not None:
+                return dict(cached, degraded=True)
+
+        if busy:
+            return {
+                'error': 'Service busy',
+                'message': 'Too many requests in progress, please try again shortly',
+                'retryAfter': 1
+            }
+
+        return {
+            'error': 'Service temporarily unavailable',
+            'message': 'Amazon Q Business is not responding, please try again shortly',
+            'retryAfter': max(1, int(self.router.retry_after(conversation_id)))
+        }
+
+    def stream_chat_with_q_business(self, message, conversation_id=None, use_cache=True):
+        """
+        Send a message to Amazon Q Business and yield the answer as it arrives
+
+        Uses the streaming Chat API when the client exposes it. boto3 does not
+        (see streaming_mode), so against AWS this is a single chat_sync call
+        whose whole answer is emitted as one token event once it returns;
+        callers receive the same sequence of events either way.
+
+        Args:
+            message (str): User's message
+            conversation_id (str): Optional conversation ID for context
+            use_cache (bool): Allow first-turn answers to be served from the answer cache
+
+        Yields:
+            tuple: (event_name, payload) pairs - 'token' with partial text,
+                   'sources' with source attributions, 'done' with the
+                   conversationId, or 'error' if the call failed
+        """
+        if not self.application_id or not self.router.available():
+            yield 'error', {
+                'error': 'Amazon Q Business not properly configured',
+                'message': 'Please check your AWS credentials and Q Business application ID'
+            }
+            return
+
+        cache_key = None
+        if not conversation_id and use_cache:
+            cache_key = AnswerCache.make_key(message, self.application_id, self.user_id)
+            cached = self._cached_answer(message, cache_key)
+            if cached is not None:
+                yield from self._replay_response(cached)
+                return
+
+        try:
+            if self.streaming_mode == 'incremental':
+                yield from self._stream_chat_events(message, conversation_id, cache_key)
+                return
+
+            # boto3 has no event-stream Chat operation: emit the full answer at once
+            if conversation_id:
+                response = self._call_q_business(message, conversation_id)
+            else:
+                response = self._first_turn(
+                    message, AnswerCache.make_key(message, self.application_id, self.user_id)
+                )
+
+            if 'error' in response:
+                yield 'error', response
+                return
+
+            yield from self._replay_response(response)
+
+        except CircuitOpenError as e:
+            response = self._degraded_response(message, conversation_id, busy=isinstance(e, UpstreamBusyError))
+            if 'error' in response:
+                yield 'error', response
+            else:
+                yield from self._replay_response(response)
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            logger.error("AWS Client Error: %s - %s", error_code, error_message)
+
+            yield 'error', {
+                'error': f'AWS Error: {error_code}',
+                'message': error_message
+            }
+
+        except Exception as e:
+            logger.error("Unexpected error: %s", e)
+            yield 'error', {
                 'error': 'Unexpected error occurred',
                 'message': str(e)
             }
 
+    @staticmethod
+    def _replay_response(response):
+        """Emit a complete chat response as stream events"""
+        yield 'token', {'text': response['response']}
+        if response['sourceAttributions']:
+            yield 'sources', {'sourceAttributions': response['sourceAttributions']}
+        yield 'done', {'conversationId': response['conversationId']}
+
+    def _stream_chat_events(self, message, conversation_id=None, cache_key=None):
+        """Translate the Q Business Chat output stream into widget events"""
+        # The answer is produced while the stream is read, so the slot is held until it ends
+        with self.upstream_slot():
+            yield from self._read_chat_stream(message, conversation_id, cache_key)
+
+    def _read_chat_stream(self, message, conversation_id, cache_key):
+        chat_params = {
+            'userId': self.user_id,
+            'inputStream': [
+                {'configurationEvent': {'chatMode': 'RETRIEVAL_MODE'}},
+                {'textEvent': {'userMessage': message}},
+                {'endOfInputEvent': {}}
+            ]
+        }
+
+        # Only opening the stream is retried (or failed over); events already sent cannot be replayed
+        response, endpoint = self._route('chat', chat_params, conversation_id)
+
+        final_conversation_id = None
+        text_parts = []
+        source_attributions = []
+        for event in response['outputStream']:
+            if 'textEvent' in event:
+                text_event = event['textEvent']
+                final_conversation_id = text_event.get('conversationId', final_conversation_id)
+                if text_event.get('systemMessage'):
+                    text_parts.append(text_event['systemMessage'])
+                    yield 'token', {'text': text_event['systemMessage']}
+
+            elif 'metadataEvent' in event:
+                metadata = event['metadataEvent']
+                final_conversation_id = metadata.get('conversationId', final_conversation_id)
+                if metadata.get('sourceAttributions'):
+                    source_attributions = metadata['sourceAttributions']
+                    yield 'sources', {'sourceAttributions': source_attributions}
+
+        final_conversation_id = conversation_id or self.router.conversation_id(endpoint, final_conversation_id)
+        result = {
+            'success': True,
+            'response': ''.join(text_parts),
+            'conversationId': final_conversation_id,
+            'sourceAttributions': source_attributions
+        }
+        self.conversations.append(final_conversation_id, message, result)
+        if cache_key:
+            self._remember_answer(message, cache_key, result)
+
+        yield 'done', {'conversationId': final_conversation_id}
+
+
+def format_sse(event, payload):
+    """Format a single Server-Sent Event frame"""
+    return f"event: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+
 # Initialize the chatbot
 chatbot = QBusinessChatbot()
 
+# Widget page, stylesheet and script are rendered and compressed once
+widget_assets = WidgetAssets()
+admission = AdmissionController()
+
+def health_payload():
+    """Body of GET /, shared by the Flask route and chatbot_asgi.py"""
+    return {
+        'status': 'healthy',
+        'service': 'Amazon Q Business Chatbot',
+        'configured': bool(chatbot.application_id),
+        'client': chatbot.client_state,
+        'answerCache': chatbot.answer_cache.stats(),
+        'semanticCache': chatbot.semantic_cache.stats(),
+        'coalescing': chatbot.single_flight.stats(),
+        'conversations': chatbot.conversations.stats(),
+        'circuitBreaker': chatbot.breaker.stats(),
+        'routing': chatbot.router.stats(),
+        'retries': chatbot.retry_policy.retries,
+        'upstream': chatbot.upstream_stats(),
+        'admission': admission.stats(),
+        'logging': log_stats()
+    }
+
 @app.route('/')
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'Amazon Q Business Chatbot',
-        'configured': bool(chatbot.q_business_client and chatbot.application_id)
-    })
+    return json_response(health_payload())
+
+@app.route('/ready')
+def readiness_check():
+    """
+    Readiness probe: 200 once the Q Business client is warm, 503 until then
+
+    GET / only says the process is serving (liveness) and never waits on AWS.
+    """
+    # Servers that never ran warm_up() (gunicorn, tests) start it on the first probe
+    chatbot.start_warm_up()
+    ready, checks = chatbot.readiness()
+    return json_response({'ready': ready, 'checks': checks}, 200 if ready else 503)
+
+def error_response(response):
+    """500 for upstream errors, 503 + Retry-After while the circuit breaker is open"""
+    if response.get('retryAfter'):
+        return json_response(response, 503, headers={'Retry-After': str(response['retryAfter'])})
+    return json_response(response, 500)
+
+def shed_response(rejected):
+    """429 + Retry-After for a request refused by admission control"""
+    return json_response({
+        'error': 'Too many requests',
+        'message': 'Too many requests, please try again shortly',
+        'reason': rejected.reason,
+        'retryAfter': rejected.retry_after
+    }, 429, headers={'Retry-After': str(rejected.retry_after)})
+
+def admit_request():
+    """Admit the current request; returns the 429 response if it was shed, else None"""
+    try:
+        admission.admit(client_key(request.remote_addr, request.headers))
+    except AdmissionRejected as e:
+        return shed_response(e)
+    return None
+
+def wants_cache(data, headers=None):
+    """A request can opt out of the answer cache with "cache": false or Cache-Control: no-cache"""
+    if data.get('cache') is False:
+        return False
+    headers = request.headers if headers is None else headers
+    return 'no-cache' not in headers.get('Cache-Control', headers.get('cache-control', ''))
+
+def parse_chat_request(data):
+    """
+    Validate a /chat or /chat/stream request body (shared with chatbot_asgi.py)
+
+    Args:
+        data: Decoded JSON body, or None if it was missing or malformed
+
+    Returns:
+        tuple: (message, conversation_id, None), or (None, None, error body) for a 400
+    """
+    if not isinstance(data, dict) or 'message' not in data:
+        return None, None, {
+            'error': 'Invalid request',
+            'message': 'Message is required'
+        }
+
+    # null, numbers, lists and objects would otherwise reach Q Business as their repr
+    user_message = data['message'].strip() if isinstance(data['message'], str) else ''
+    if not user_message:
+        return None, None, {
+            'error': 'Empty message',
+            'message': 'Please provide a non-empty message'
+        }
+
+    return user_message, data.get('conversationId'), None
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -117,232 +645,244 @@ def chat():
     Expects JSON: {"message": "user message", "conversationId": "optional"}
     """
     try:
-        data = request.get_json()
+        with span('parse'):
+            data = request.get_json()
         
-        if not data or 'message' not in data:
-            return jsonify({
-                'error': 'Invalid request',
-                'message': 'Message is required'
-            }), 400
+        user_message, conversation_id, invalid = parse_chat_request(data)
+        if invalid:
+            return json_response(invalid, 400)
         
-        user_message = data['message'].strip()
-        conversation_id = data.get('conversationId')
-        
-        if not user_message:
-            return jsonify({
-                'error': 'Empty message',
-                'message': 'Please provide a non-empty message'
-            }), 400
+        with span('admission'):
+            rejected = admit_request()
+        if rejected is not None:
+            return rejected
         
         # Get response from Q Business
-        response = chatbot.chat_with_q_business(user_message, conversation_id)
+        try:
+            response = chatbot.chat_with_q_business(user_message, conversation_id, use_cache=wants_cache(data))
+        finally:
+            admission.release()
         
         if 'error' in response:
-            return jsonify(response), 500
+            return error_response(response)
         
-        return jsonify(response)
+        return json_response(response)
         
     except Exception as e:
-        logger.error(f"Error in chat endpoint: {str(e)}")
-        return jsonify({
+        logger.error("Error in chat endpoint: %s", e)
+        return json_response({
             'error': 'Server error',
             'message': 'An unexpected error occurred'
-        }), 500
+        }, 500)
 
-@app.route('/widget')
-def chatbot_widget():
-    """Serve the chatbot widget HTML"""
-    widget_html = """
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Q Business Chatbot Widget</title>
-    <style>
-        .chatbot-container {
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            width: 350px;
-            height: 500px;
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.15);
-            display: none;
-            flex-direction: column;
-            z-index: 1000;
-        }
-        
-        .chatbot-header {
-            background: #232F3E;
-            color: white;
-            padding: 15px;
-            border-radius: 10px 10px 0 0;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        
-        .chatbot-messages {
-            flex: 1;
-            padding: 15px;
-            overflow-y: auto;
-            max-height: 350px;
-        }
-        
-        .message {
-            margin-bottom: 10px;
-            padding: 8px 12px;
-            border-radius: 8px;
-            max-width: 80%;
-        }
-        
-        .user-message {
-            background: #007DBA;
-            color: white;
-            margin-left: auto;
-        }
-        
-        .bot-message {
-            background: #f1f1f1;
-            color: #333;
-        }
-        
-        .chatbot-input {
-            display: flex;
-            padding: 15px;
-            border-top: 1px solid #eee;
-        }
-        
-        .chatbot-input input {
-            flex: 1;
-            padding: 10px;
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            margin-right: 10px;
-        }
-        
-        .chatbot-input button {
-            background: #007DBA;
-            color: white;
-            border: none;
-            padding: 10px 15px;
-            border-radius: 5px;
-            cursor: pointer;
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    Expects JSON: {"message": "user message", "conversationId": "optional"}
+    Emits 'token', 'sources', 'error' and a final 'done' event carrying conversationId
+    """
+    data = request.get_json(silent=True)
+
+    user_message, conversation_id, invalid = parse_chat_request(data)
+    if invalid:
+        return json_response(invalid, 400)
+
+    use_cache = wants_cache(data)
+
+    rejected = admit_request()
+    if rejected is not None:
+        return rejected
+
+    def generate():
+        # Sends the headers right away so proxies keep the connection open; it is not part of the answer
+        yield ': stream opened\n\n'
+        for event, payload in chatbot.stream_chat_with_q_business(user_message, conversation_id, use_cache):
+            yield format_sse(event, payload)
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            # 'buffered' with boto3: the answer arrives in one token event
+            'X-Stream-Mode': chatbot.streaming_mode
         }
-        
-        .chatbot-toggle {
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            width: 60px;
-            height: 60px;
-            background: #232F3E;
-            color: white;
-            border: none;
-            border-radius: 50%;
-            cursor: pointer;
-            font-size: 24px;
-            z-index: 1001;
+    )
+    # The slot is held until the stream ends, including client disconnects
+    response.call_on_close(admission.release)
+    return response
+
+# Batch limits: questions per request and worker threads per batch
+BATCH_MAX_MESSAGES = int(os.getenv('BATCH_MAX_MESSAGES', 500))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 4))
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 8))
+# Shared by all running batches so interactive requests always keep some in-flight slots
+batch_slots = threading.BoundedSemaphore(BATCH_MAX_CONCURRENCY)
+# Operator key (sent as X-Batch-Key) for batches larger than a client's rate limit allows; empty disables it
+BATCH_API_KEY = os.getenv('BATCH_API_KEY', '')
+
+def has_batch_key(headers):
+    sent = headers.get('X-Batch-Key', '')
+    return bool(BATCH_API_KEY and sent) and hmac.compare_digest(sent.encode(), BATCH_API_KEY.encode())
+
+def parse_batch_items(messages):
+    """
+    Normalize batch input into (id, message, conversationId) tuples
+
+    Accepts plain strings or objects with "message" and optional "id"/"conversationId".
+
+    Raises:
+        ValueError: If an item has no usable message
+    """
+    items = []
+    for index, item in enumerate(messages):
+        if isinstance(item, str):
+            item = {'message': item}
+        if not isinstance(item, dict) or not str(item.get('message') or '').strip():
+            raise ValueError(f'Item {index} has no message')
+        items.append((item.get('id', index), str(item['message']).strip(), item.get('conversationId')))
+    return items
+
+def run_batch_item(index, item_id, message, conversation_id, use_cache):
+    """Answer one batch question inside an admission slot shared with interactive traffic"""
+    with batch_slots:
+        admission.acquire()
+        start = time.perf_counter()
+        try:
+            response = chatbot.chat_with_q_business(message, conversation_id, use_cache=use_cache)
+        except Exception as e:
+            logger.error("Error in batch item %s: %s", item_id, e)
+            response = {'error': 'Server error', 'message': 'An unexpected error occurred'}
+        finally:
+            admission.release()
+
+    return dict(response, index=index, id=item_id, question=message,
+                elapsedMs=round((time.perf_counter() - start) * 1000, 1))
+
+def iter_batch(items, concurrency, use_cache):
+    """Run batch items on a bounded pool, yielding results in completion order"""
+    start = time.perf_counter()
+    failed = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='chat-batch')
+    try:
+        futures = [
+            executor.submit(run_batch_item, index, item_id, message, conversation_id, use_cache)
+            for index, (item_id, message, conversation_id) in enumerate(items)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            failed += 'error' in result
+            yield result
+
+        yield {
+            'done': True,
+            'total': len(items),
+            'succeeded': len(items) - failed,
+            'failed': failed,
+            'elapsedMs': round((time.perf_counter() - start) * 1000, 1)
         }
-        
-        .loading {
-            opacity: 0.6;
+    finally:
+        # Client went away: drop the questions that have not started yet
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Batch chat endpoint (NDJSON)
+    Expects JSON: {"messages": ["question" | {"id": ..., "message": ..., "conversationId": ...}],
+                   "concurrency": optional, "cache": optional (default false)}
+    Emits one JSON line per question in completion order, then a summary line with "done": true
+    """
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data.get('messages'), list) or not data['messages']:
+        return json_response({
+            'error': 'Invalid request',
+            'message': 'A non-empty messages list is required'
+        }, 400)
+
+    if len(data['messages']) > BATCH_MAX_MESSAGES:
+        return json_response({
+            'error': 'Batch too large',
+            'message': f'At most {BATCH_MAX_MESSAGES} messages per batch'
+        }, 413)
+
+    try:
+        items = parse_batch_items(data['messages'])
+        concurrency = int(data.get('concurrency', BATCH_CONCURRENCY))
+    except (TypeError, ValueError) as e:
+        return json_response({
+            'error': 'Invalid request',
+            'message': str(e)
+        }, 400)
+
+    # Each question costs one token from the caller's bucket, like a /chat request;
+    # only the operator key skips the per-client limit
+    if not has_batch_key(request.headers):
+        if admission.rate > 0 and len(items) > admission.burst:
+            return json_response({
+                'error': 'Batch too large',
+                'message': f'At most {admission.burst} messages per batch without the batch key'
+            }, 413)
+        try:
+            admission.check_rate(client_key(request.remote_addr, request.headers), cost=len(items))
+        except AdmissionRejected as e:
+            return shed_response(e)
+
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY, len(items)))
+    # Batches are mostly regression checks, so they ask Q Business unless told otherwise
+    use_cache = data.get('cache') is True
+
+    def generate():
+        for result in iter_batch(items, concurrency, use_cache):
+            yield dumps(result) + b'\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
         }
-    </style>
-</head>
-<body>
-    <button class="chatbot-toggle" onclick="toggleChatbot()">💬</button>
+    )
+
+@app.route('/conversations/<conversation_id>', methods=['GET'])
+def get_conversation(conversation_id):
+    """Return the locally recorded turns of a conversation (no Q Business call)"""
+    turns = chatbot.conversations.get(conversation_id)
     
-    <div class="chatbot-container" id="chatbotContainer">
-        <div class="chatbot-header">
-            <h3>Assistente Q Business</h3>
-            <button onclick="toggleChatbot()" style="background: none; border: none; color: white; font-size: 18px; cursor: pointer;">×</button>
-        </div>
-        
-        <div class="chatbot-messages" id="chatbotMessages">
-            <div class="message bot-message">
-                Olá! Sou seu assistente baseado no Amazon Q Business. Como posso ajudá-lo com informações sobre nossos parceiros?
-            </div>
-        </div>
-        
-        <div class="chatbot-input">
-            <input type="text" id="messageInput" placeholder="Digite sua pergunta..." onkeypress="handleKeyPress(event)">
-            <button onclick="sendMessage()">Enviar</button>
-        </div>
-    </div>
-
-    <script>
-        let conversationId = null;
-        
-        function toggleChatbot() {
-            const container = document.getElementById('chatbotContainer');
-            container.style.display = container.style.display === 'none' || container.style.display === '' ? 'flex' : 'none';
-        }
-        
-        function handleKeyPress(event) {
-            if (event.key === 'Enter') {
-                sendMessage();
-            }
-        }
-        
-        async function sendMessage() {
-            const input = document.getElementById('messageInput');
-            const message = input.value.trim();
-            
-            if (!message) return;
-            
-            // Add user message to chat
-            addMessage(message, 'user');
-            input.value = '';
-            
-            // Show loading
-            const messagesContainer = document.getElementById('chatbotMessages');
-            messagesContainer.classList.add('loading');
-            
-            try {
-                const response = await fetch('/chat', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        message: message,
-                        conversationId: conversationId
-                    })
-                });
-                
-                const data = await response.json();
-                
-                if (data.success) {
-                    addMessage(data.response, 'bot');
-                    conversationId = data.conversationId;
-                } else {
-                    addMessage('Desculpe, ocorreu um erro: ' + (data.message || 'Erro desconhecido'), 'bot');
-                }
-                
-            } catch (error) {
-                addMessage('Erro de conexão. Tente novamente.', 'bot');
-                console.error('Error:', error);
-            } finally {
-                messagesContainer.classList.remove('loading');
-            }
-        }
-        
-        function addMessage(text, sender) {
-            const messagesContainer = document.getElementById('chatbotMessages');
-            const messageDiv = document.createElement('div');
-            messageDiv.className = `message ${sender}-message`;
-            messageDiv.textContent = text;
-            messagesContainer.appendChild(messageDiv);
-            messagesContainer.scrollTop = messagesContainer.scrollHeight;
-        }
-    </script>
-</body>
-</html>
-    """
-    return render_template_string(widget_html)
+    if turns is None:
+        return json_response({
+            'error': 'Not found',
+            'message': 'Unknown conversation'
+        }, 404)
+    
+    return json_response({
+        'success': True,
+        'conversationId': conversation_id,
+        'turns': turns
+    })
+
+@app.route('/widget')
+def chatbot_widget():
+    """Serve the chatbot widget HTML (prebuilt at startup)"""
+    return serve_widget_asset(widget_assets.page)
+
+@app.route('/widget/static/<name>')
+def chatbot_widget_static(name):
+    """Serve a versioned widget stylesheet or script"""
+    asset = widget_assets.assets.get(name)
+    if asset is None:
+        return json_response({'error': 'Not found', 'message': f'Unknown widget asset: {name}'}, 404)
+    return serve_widget_asset(asset)
+
+def serve_widget_asset(asset):
+    status, body, headers = widget_assets.select(
+        asset, request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match')
+    )
+    return Response(body, status=status, headers=headers)
 
 if __name__ == '__main__':
     # Check if running in development
@@ -352,5 +892,7 @@ if __name__ == '__main__':
     print(f"Starting Amazon Q Business Chatbot on port {port}")
     print(f"Debug mode: {debug_mode}")
     print(f"Q Business Application ID: {chatbot.application_id or 'Not configured'}")
-    
+
+    # The client is created in the background while the server starts listening
+    chatbot.start_warm_up()
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
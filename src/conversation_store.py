@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Local transcript store for Amazon Q Business conversations
+Records every turn answered by the backend so history can be rendered without
+calling Q Business again. Recent conversations live in memory (LRU); an
+optional SQLite file keeps evicted ones and survives restarts.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+from api_response import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationStore:
+    def __init__(self, max_conversations=1000, max_turns=50, db_path=None):
+        """
+        Args:
+            max_conversations (int): Conversations kept in memory before LRU eviction
+            max_turns (int): Most recent turns kept per conversation
+            db_path (str): Optional SQLite file backing the in-memory tier
+        """
+        self.max_conversations = max_conversations
+        self.max_turns = max_turns
+        self._conversations = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS turns ('
+                    ' conversation_id TEXT NOT NULL,'
+                    ' seq INTEGER NOT NULL,'
+                    ' turn TEXT NOT NULL,'
+                    ' PRIMARY KEY (conversation_id, seq))'
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error("Conversation database unavailable, using memory only: %s", e)
+                self._db = None
+
+    def append(self, conversation_id, user_message, response):
+        """Record one question/answer turn of a conversation"""
+        if not conversation_id:
+            return
+
+        turn = {
+            'userMessage': user_message,
+            'systemMessage': response.get('response', ''),
+            'sourceAttributions': response.get('sourceAttributions', []),
+            'timestamp': time.time()
+        }
+
+        with self._lock:
+            turns = self._conversations.get(conversation_id)
+            if turns is None:
+                turns = self._load(conversation_id) or []
+            turns.append(turn)
+            del turns[:-self.max_turns]
+            self._remember(conversation_id, turns)
+
+            if self._db is not None:
+                self._persist(conversation_id, turns)
+
+    def get(self, conversation_id):
+        """Return the recorded turns of a conversation, or None if unknown"""
+        with self._lock:
+            turns = self._conversations.get(conversation_id)
+            if turns is not None:
+                self._conversations.move_to_end(conversation_id)
+                self.memory_hits += 1
+                return list(turns)
+
+            turns = self._load(conversation_id)
+            if turns is None:
+                self.misses += 1
+                return None
+
+            self.db_hits += 1
+            self._remember(conversation_id, turns)
+            return list(turns)
+
+    def _remember(self, conversation_id, turns):
+        self._conversations[conversation_id] = turns
+        self._conversations.move_to_end(conversation_id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, conversation_id):
+        if self._db is None:
+            return None
+        try:
+            rows = self._db.execute(
+                'SELECT turn FROM turns WHERE conversation_id = ? ORDER BY seq', (conversation_id,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error reading conversation %s: %s", conversation_id, e)
+            return None
+        return [json.loads(row[0]) for row in rows] or None
+
+    def _persist(self, conversation_id, turns):
+        try:
+            self._db.execute(
+                'INSERT INTO turns (conversation_id, seq, turn) VALUES (?, '
+                '(SELECT COALESCE(MAX(seq), 0) + 1 FROM turns WHERE conversation_id = ?), ?)',
+                (conversation_id, conversation_id, dumps(turns[-1]).decode('utf-8'))
+            )
+            # Keep the same window as the in-memory tier
+            self._db.execute(
+                'DELETE FROM turns WHERE conversation_id = ? AND seq NOT IN '
+                '(SELECT seq FROM turns WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?)',
+                (conversation_id, conversation_id, self.max_turns)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error("Error saving conversation %s: %s", conversation_id, e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'conversations': len(self._conversations),
+                'maxConversations': self.max_conversations,
+                'sqlite': self._db is not None,
+                'memoryHits': self.memory_hits,
+                'dbHits': self.db_hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
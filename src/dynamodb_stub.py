@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the DataIESB-TeamMembers DynamoDB table
+Used by the offline tests and benchmarks; mimics the parts of the boto3 Table
+resource the team APIs and the importer rely on, including 1 MB scan pages,
+segmented scans and batch writes that come back partly unprocessed when the
+table's write capacity is exceeded.
+"""
+
+import bisect
+import json
+import math
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+from botocore.exceptions import ClientError
+
+# DynamoDB stops a scan page once it has read 1 MB of data
+PAGE_SIZE_BYTES = 1024 * 1024
+
+
+def item_size(item):
+    """Approximate DynamoDB item size (attribute names plus values)"""
+    return len(json.dumps(item, default=str).encode('utf-8'))
+
+
+def make_member(index, category=None, padding=0):
+    """Build a synthetic team member item, optionally padded with an extra large attribute"""
+    categories = ['Coordenação', 'Professores', 'Pesquisadores', 'Alunos', 'Outros']
+    item = {
+        'email': f'member{index:06d}@iesb.edu.br',
+        'name': f'Membro {index}',
+        'role': 'Pesquisador',
+        'category': category or categories[index % len(categories)],
+        'escavador': f'https://www.escavador.com/sobre/member{index}',
+        'linkedin': None
+    }
+    if padding:
+        item['bio'] = 'x' * padding
+    return item
+
+
+def check_types(value):
+    """Reject floats anywhere in an item, as boto3's serializer does before sending a request"""
+    if isinstance(value, float):
+        raise TypeError('Float types are not supported. Use Decimal types instead.')
+    if isinstance(value, dict):
+        for nested in value.values():
+            check_types(nested)
+    elif isinstance(value, (list, set, tuple)):
+        for nested in value:
+            check_types(nested)
+
+
+def write_units(item):
+    """Write capacity units a put consumes: one per started KB"""
+    return max(1, math.ceil(item_size(item) / 1024))
+
+
+class LocalClient:
+    def __init__(self, table):
+        """The table.meta.client calls the importer uses, bound to one LocalTable"""
+        self._table = table
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        return self._table.batch_write(RequestItems)
+
+    def describe_table(self, TableName):
+        table = {'TableName': TableName, 'ItemCount': len(self._table)}
+        if self._table.write_capacity:
+            table['ProvisionedThroughput'] = {'WriteCapacityUnits': self._table.write_capacity}
+        else:
+            table['BillingModeSummary'] = {'BillingMode': 'PAY_PER_REQUEST'}
+        return {'Table': table}
+
+
+class LocalTable:
+    def __init__(self, items=(), key='email', page_size_bytes=PAGE_SIZE_BYTES, latency=0.0,
+                 write_capacity=0, name='DataIESB-TeamMembers', indexes=('category-index',)):
+        """
+        In-memory table with DynamoDB-like scan semantics
+
+        Args:
+            items: Initial items
+            key (str): Partition key attribute name
+            page_size_bytes (int): Data read per scan page before LastEvaluatedKey is returned
+            latency (float): Seconds slept per request to simulate network round trips
+            write_capacity (int): Write capacity units per second (0 = on-demand, unlimited);
+                                  batch writes beyond it come back as UnprocessedItems
+            name (str): Table name expected in batch write requests
+            indexes (tuple): Names of the global secondary indexes queries may use
+        """
+        self.key = key
+        self.name = name
+        self.page_size_bytes = page_size_bytes
+        self.latency = latency
+        self.write_capacity = write_capacity
+        self.indexes = tuple(indexes)
+        self.meta = SimpleNamespace(client=LocalClient(self))
+        self._items = {}
+        # Item sizes and the key order are kept up to date on writes, so large tables scan quickly
+        self._sizes = {}
+        self._sorted_keys = None
+        self._lock = threading.Lock()
+        # One second of burst capacity, refilled continuously
+        self._write_tokens = float(write_capacity)
+        self._write_refilled = time.monotonic()
+        self.scan_calls = 0
+        self.query_calls = 0
+        self.read_bytes = 0
+        self.returned_bytes = 0
+        self.batch_write_calls = 0
+        self.written_items = 0
+        self.unprocessed_items = 0
+        for item in items:
+            self.put_item(Item=item)
+
+    def put_item(self, Item):
+        with self._lock:
+            self._store(Item)
+        return {}
+
+    def _store(self, item):
+        key_value = item[self.key]
+        if key_value not in self._items:
+            self._sorted_keys = None
+        self._items[key_value] = dict(item)
+        self._sizes[key_value] = item_size(item)
+
+    def _keys(self):
+        """Table keys in scan order (call with the lock held)"""
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self._items)
+        return self._sorted_keys
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key_value):
+        return self._items.get(key_value)
+
+    def batch_write(self, request_items):
+        """BatchWriteItem with PutRequests: up to 25 items, the rest of the capacity budget is unprocessed"""
+        requests = request_items.get(self.name, [])
+        if not requests or len(requests) > 25:
+            raise ValueError('BatchWriteItem takes between 1 and 25 requests')
+        for request in requests:
+            check_types(request['PutRequest']['Item'])
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        unprocessed = []
+        with self._lock:
+            self.batch_write_calls += 1
+            if self.write_capacity:
+                now = time.monotonic()
+                self._write_tokens = min(self.write_capacity,
+                                         self._write_tokens + (now - self._write_refilled) * self.write_capacity)
+                self._write_refilled = now
+
+            for request in requests:
+                item = request['PutRequest']['Item']
+                units = write_units(item)
+                if self.write_capacity and self._write_tokens < units:
+                    unprocessed.append(request)
+                    continue
+                if self.write_capacity:
+                    self._write_tokens -= units
+                self._store(item)
+                self.written_items += 1
+            self.unprocessed_items += len(unprocessed)
+
+        return {'UnprocessedItems': {self.name: unprocessed} if unprocessed else {}}
+
+    def _segment_of(self, key_value, total_segments):
+        return zlib.crc32(str(key_value).encode('utf-8')) % total_segments
+
+    @staticmethod
+    def _project(item, projection, names):
+        """Apply a ProjectionExpression such as '#n, email' to an item"""
+        if not projection:
+            return dict(item)
+        attributes = [names.get(a.strip(), a.strip()) for a in projection.split(',')]
+        return {a: item[a] for a in attributes if a in item}
+
+    @staticmethod
+    def _condition(expression, names, values):
+        """(attribute, value) of the simple '#attr = :value' conditions the team APIs use"""
+        left, _, right = (expression or '').partition('=')
+        return names.get(left.strip(), left.strip()), values[right.strip()]
+
+    def scan(self, ExclusiveStartKey=None, Segment=None, TotalSegments=None, Limit=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None, FilterExpression=None,
+             ExpressionAttributeValues=None, **kwargs):
+        if (Segment is None) != (TotalSegments is None):
+            raise ValueError('Segment and TotalSegments must be provided together')
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.scan_calls += 1
+            keys = self._keys()
+
+        if TotalSegments:
+            keys = [k for k in keys if self._segment_of(k, TotalSegments) == Segment]
+
+        start = 0
+        if ExclusiveStartKey:
+            start = bisect.bisect_right(keys, ExclusiveStartKey[self.key])
+
+        names = ExpressionAttributeNames or {}
+        if FilterExpression:
+            attribute, value = self._condition(FilterExpression, names, ExpressionAttributeValues or {})
+
+        # Limit and the page size count evaluated items; the filter only drops them from the page
+        page, consumed, evaluated = [], 0, 0
+        for k in keys[start:]:
+            item = self._items[k]
+            evaluated += 1
+            if not FilterExpression or item.get(attribute) == value:
+                page.append(self._project(item, ProjectionExpression, names))
+            # Capacity is consumed for the whole item, projected or not
+            consumed += self._sizes[k]
+            if consumed >= self.page_size_bytes or (Limit and evaluated >= Limit):
+                break
+
+        with self._lock:
+            self.read_bytes += consumed
+            self.returned_bytes += sum(item_size(item) for item in page)
+
+        response = {'Items': page, 'Count': len(page), 'ScannedCount': evaluated}
+        last_key = keys[start + evaluated - 1] if evaluated else None
+        if evaluated and last_key != keys[-1]:
+            response['LastEvaluatedKey'] = {self.key: last_key}
+        return response
+
+    def query(self, IndexName=None, KeyConditionExpression=None, ExpressionAttributeNames=None,
+              ExpressionAttributeValues=None, ExclusiveStartKey=None, Limit=None,
+              ProjectionExpression=None, **kwargs):
+        """
+        Query a global secondary index partitioned on a single attribute
+
+        Only the simple '#attr = :value' key condition used by the team APIs is supported.
+        """
+        names = ExpressionAttributeNames or {}
+        attribute, value = self._condition(KeyConditionExpression, names, ExpressionAttributeValues or {})
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.query_calls += 1
+            if IndexName not in self.indexes:
+                raise ClientError({'Error': {
+                    'Code': 'ValidationException',
+                    'Message': f'The table does not have the specified index: {IndexName}'
+                }}, 'Query')
+            # Index order: partition value, then the table key
+            keys = sorted(k for k, item in self._items.items() if item.get(attribute) == value)
+
+        start = 0
+        if ExclusiveStartKey:
+            start = bisect.bisect_right(keys, ExclusiveStartKey[self.key])
+
+        page, consumed = [], 0
+        for k in keys[start:]:
+            item = self._items[k]
+            page.append(self._project(item, ProjectionExpression, names))
+            consumed += self._sizes[k]
+            if consumed >= self.page_size_bytes or (Limit and len(page) >= Limit):
+                break
+
+        with self._lock:
+            self.read_bytes += consumed
+            self.returned_bytes += sum(item_size(item) for item in page)
+
+        response = {'Items': page, 'Count': len(page), 'ScannedCount': len(page)}
+        last_key = keys[start + len(page) - 1] if page else None
+        if page and last_key != keys[-1]:
+            response['LastEvaluatedKey'] = {self.key: last_key, attribute: value}
+        return response
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation of the semantic answer cache (semantic_cache.py)
+Indexes one phrasing of some intents, asks the other phrasings plus questions
+about intents that were never answered, and reports per threshold, summed over
+several random answered/unanswered splits:
+  hit rate         - paraphrases of answered intents served from the cache
+  false-match rate - answers served from the cache that belong to another intent
+  hard negatives   - pairs of near-identical questions asking different things,
+                     each must miss the cache when the other one is answered
+
+Usage:
+    python3 evaluate-semantic-cache.py
+    python3 evaluate-semantic-cache.py --dataset questions.json --output semantic-eval.json
+    (dataset: [{"intent": "parceiros", "questions": ["quais são os parceiros?", ...]}, ...])
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+
+from semantic_cache import SemanticAnswerCache
+
+# Paraphrase groups; neighbouring intents share templates on purpose, so a
+# matcher that only looks at the phrasing shows up as false matches
+DATASET = [
+    {'intent': 'parceiros', 'questions': [
+        'Quais são os parceiros?', 'quem são os parceiros do projeto', 'Quais os parceiros do Data IESB?',
+        'me fala os parceiros', 'quais instituições são parceiras?', 'Lista de parceiros do projeto']},
+    {'intent': 'equipe', 'questions': [
+        'Quem faz parte da equipe?', 'quem são os membros da equipe', 'Quais são os integrantes da equipe do Data IESB?',
+        'me mostre a equipe', 'quem trabalha na equipe?']},
+    {'intent': 'coordenador', 'questions': [
+        'Quem é o coordenador do projeto?', 'quem coordena o Data IESB', 'Qual o nome do coordenador?',
+        'quem é a coordenação do projeto']},
+    {'intent': 'contato', 'questions': [
+        'Como entro em contato?', 'qual o contato do Data IESB', 'Como falar com a equipe por email?',
+        'Qual é o email de contato?', 'contato do projeto']},
+    {'intent': 'relatorio-pib', 'questions': [
+        'Onde encontro o relatório do PIB?', 'relatório sobre o PIB do DF', 'Quero ver o relatório do PIB',
+        'tem relatório do produto interno bruto?', 'relatorio pib']},
+    {'intent': 'relatorio-saude', 'questions': [
+        'Onde encontro o relatório de saúde?', 'relatório sobre saúde pública', 'Quero ver o relatório da saúde',
+        'tem relatório sobre saúde no DF?']},
+    {'intent': 'relatorio-educacao', 'questions': [
+        'Onde encontro o relatório de educação?', 'relatório sobre educação básica', 'Quero ver o relatório da educação',
+        'tem relatório sobre escolas do DF?']},
+    {'intent': 'relatorio-mobilidade', 'questions': [
+        'Onde encontro o relatório de mobilidade?', 'relatório sobre mobilidade urbana', 'Quero ver o relatório de transporte',
+        'tem relatório sobre o trânsito no DF?']},
+    {'intent': 'participar', 'questions': [
+        'Como posso participar do projeto?', 'como participar do Data IESB', 'Quero participar, como faço?',
+        'Como fazer parte do projeto?', 'posso me inscrever no projeto?']},
+    {'intent': 'dados-abertos', 'questions': [
+        'Onde baixar os dados abertos?', 'como faço download dos dados', 'Os dados estão disponíveis para download?',
+        'onde ficam os dados abertos do projeto']},
+    {'intent': 'o-que-e', 'questions': [
+        'O que é o Data IESB?', 'o que é esse projeto?', 'Me explica o que faz o Data IESB',
+        'qual o objetivo do Data IESB?']},
+    {'intent': 'localizacao', 'questions': [
+        'Onde fica o IESB?', 'qual o endereço do IESB', 'Onde é o campus?', 'endereço do campus do IESB']},
+    {'intent': 'parceiros-saude', 'questions': [
+        'Quais são os parceiros na área de saúde?', 'parceiros do projeto de saúde', 'quem são os parceiros da saúde']},
+    {'intent': 'parceiros-educacao', 'questions': [
+        'Quais são os parceiros na área de educação?', 'parceiros do projeto de educação', 'quem são os parceiros da educação']},
+    {'intent': 'pesquisa-seguranca', 'questions': [
+        'Como participar da pesquisa em segurança?', 'pesquisa sobre segurança pública', 'quero participar da pesquisa de segurança']},
+    {'intent': 'pesquisa-turismo', 'questions': [
+        'Como participar da pesquisa em turismo?', 'pesquisa sobre turismo', 'quero participar da pesquisa de turismo']},
+    {'intent': 'horario', 'questions': [
+        'Qual o horário de atendimento?', 'que horas vocês atendem', 'horário de funcionamento do laboratório']},
+    {'intent': 'estagio', 'questions': [
+        'Tem vaga de estágio?', 'vagas de estágio no Data IESB', 'como conseguir estágio no projeto?']},
+    {'intent': 'laboratorio-acesso', 'questions': [
+        'Como faço para entrar no laboratório?', 'como entro no laboratório', 'Como faço para acessar o laboratório?']},
+    {'intent': 'laboratorio-local', 'questions': [
+        'Onde fica o laboratório?', 'onde é o laboratório', 'Em que sala fica o laboratório?']},
+    {'intent': 'parceiros-quantidade', 'questions': [
+        'Quantos parceiros o projeto tem?', 'quantos parceiros existem', 'número de parceiros do projeto']},
+]
+
+# (answered, asked) pairs that share nearly every word but not the question:
+# the asked one must never get the answered one's answer
+HARD_NEGATIVES = [
+    ('Onde fica o laboratório?', 'Como faço para entrar no laboratório?'),
+    ('Como faço para entrar no laboratório?', 'Onde fica o laboratório?'),
+    ('Quantos parceiros o projeto tem?', 'Quem são os parceiros?'),
+    ('Quem são os parceiros?', 'Quantos parceiros o projeto tem?'),
+    ('Quantos parceiros existem?', 'Quais são os parceiros?'),
+    ('Onde encontro o relatório do PIB?', 'Quando sai o relatório do PIB?'),
+]
+
+THRESHOLDS = [0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95]
+
+
+def load_dataset(path):
+    if not path:
+        return DATASET
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def split_intents(dataset, answered_fraction, seed):
+    """Pick the intents whose first phrasing gets answered (and cached) before the queries"""
+    rng = random.Random(seed)
+    intents = [group['intent'] for group in dataset]
+    rng.shuffle(intents)
+    return set(intents[:max(1, round(len(intents) * answered_fraction))])
+
+
+def evaluate(dataset, splits, threshold, dimensions):
+    """
+    Args:
+        splits (list): Sets of answered intents, one evaluation round each
+
+    Returns:
+        dict: counts and rates for one threshold
+    """
+    queried = paraphrases = correct = wrong = served = 0
+    false_matches = []
+    for answered in splits:
+        cache = SemanticAnswerCache(max_size=1024, ttl=3600, threshold=threshold, dimensions=dimensions)
+        queries = []
+        for group in dataset:
+            questions = group['questions']
+            if group['intent'] in answered:
+                cache.add(questions[0], group['intent'])
+                queries.extend((q, group['intent'], True) for q in questions[1:])
+            else:
+                queries.extend((q, group['intent'], False) for q in questions)
+
+        matches = cache.lookup_many([q for q, _, _ in queries])
+        queried += len(queries)
+
+        for (question, intent, answerable), match in zip(queries, matches):
+            paraphrases += answerable
+            if match is None:
+                continue
+            served += 1
+            if match.answer == intent:
+                correct += 1
+            else:
+                wrong += 1
+                false_matches.append({'question': question, 'matched': match.question, 'score': round(match.score, 3)})
+
+    return {
+        'threshold': threshold,
+        'queries': queried,
+        'paraphrases': paraphrases,
+        'served': served,
+        'correct': correct,
+        'falseMatches': wrong,
+        'hitRate': round(correct / paraphrases, 4) if paraphrases else None,
+        'falseMatchRate': round(wrong / served, 4) if served else 0.0,
+        'falseMatchExamples': false_matches[:5]
+    }
+
+
+def hard_negative_matches(threshold, dimensions):
+    """Hard negative pairs whose asked question was served the answered one's answer"""
+    matched = []
+    for answered, asked in HARD_NEGATIVES:
+        cache = SemanticAnswerCache(max_size=8, ttl=3600, threshold=threshold, dimensions=dimensions)
+        cache.add(answered, answered)
+        match = cache.lookup(asked)
+        if match is not None:
+            matched.append({'question': asked, 'matched': answered, 'score': round(match.score, 3)})
+    return matched
+
+
+def lookup_latency(size, dimensions, rounds=200):
+    """Average ms per lookup with a full index of size questions"""
+    cache = SemanticAnswerCache(max_size=size, ttl=3600, threshold=0.8, dimensions=dimensions)
+    groups = [group['questions'] for group in DATASET]
+    for i in range(size):
+        questions = groups[i % len(groups)]
+        cache.add(f'{questions[i % len(questions)]} {i}', i)
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        cache.lookup(groups[i % len(groups)][0])
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline evaluation of the semantic answer cache')
+    parser.add_argument('--dataset', help='JSON list of {"intent", "questions"} groups (default: built-in set)')
+    parser.add_argument('--answered-fraction', type=float, default=0.6, help='Share of intents answered before the queries')
+    parser.add_argument('--dimensions', type=int, default=2048, help='Hashed vector length')
+    parser.add_argument('--splits', type=int, default=5, help='Random answered/unanswered splits to sum over')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed of the first split')
+    parser.add_argument('--max-false-match-rate', type=float, default=0.05, help='Budget used to recommend a threshold')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    splits = [split_intents(dataset, args.answered_fraction, args.seed + i) for i in range(args.splits)]
+
+    print("🔎 Semantic Answer Cache Evaluation")
+    print("=" * 50)
+    print(f"Intents: {len(dataset)} ({len(splits[0])} answered per split, {len(splits)} splits), "
+          f"questions: {sum(len(g['questions']) for g in dataset)}")
+    print(f"\n{'threshold':>9}  {'hit rate':>8}  {'false match':>11}  {'served':>6}  {'hard negatives':>14}")
+
+    results = [evaluate(dataset, splits, threshold, args.dimensions) for threshold in THRESHOLDS]
+    for r in results:
+        r['hardNegativeMatches'] = hard_negative_matches(r['threshold'], args.dimensions)
+        print(f"{r['threshold']:>9.2f}  {r['hitRate']:>8.1%}  {r['falseMatchRate']:>11.1%}  {r['served']:>6}  "
+              f"{len(r['hardNegativeMatches']):>6}/{len(HARD_NEGATIVES)} hit")
+
+    within_budget = [r for r in results
+                     if r['falseMatchRate'] <= args.max_false_match_rate and not r['hardNegativeMatches']]
+    best = max(within_budget, key=lambda r: (r['hitRate'], r['threshold'])) if within_budget else None
+    if best:
+        print(f"\n✅ Best threshold within {args.max_false_match_rate:.0%} false matches and no hard negative: "
+              f"{best['threshold']} (hit rate {best['hitRate']:.1%})")
+    else:
+        print(f"\n❌ No threshold keeps false matches within {args.max_false_match_rate:.0%} "
+              f"with every hard negative missing the cache")
+
+    latencies = {size: round(lookup_latency(size, args.dimensions), 4) for size in (128, 512, 2048)}
+    print("\n⚡ Lookup latency: " + ', '.join(f"{ms:.3f} ms @ {size}" for size, ms in latencies.items()))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'benchmark': 'semantic-cache',
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'parameters': vars(args),
+                'answeredIntents': [sorted(answered) for answered in splits],
+                'results': results,
+                'recommendedThreshold': best['threshold'] if best else None,
+                'lookupLatencyMs': latencies
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results written to {args.output}")
+
+    return best is not None
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,149 @@
+const CONVERSATION_KEY = 'qbConversationId';
+let conversationId = localStorage.getItem(CONVERSATION_KEY);
+
+// Restore the previous conversation from the backend's local transcript store
+async function loadHistory() {
+    if (!conversationId) return;
+    
+    try {
+        const response = await fetch('/conversations/' + encodeURIComponent(conversationId));
+        if (!response.ok) {
+            setConversationId(null);
+            return;
+        }
+        
+        const data = await response.json();
+        data.turns.forEach(turn => {
+            addMessage(turn.userMessage, 'user');
+            addMessage(turn.systemMessage, 'bot');
+        });
+    } catch (error) {
+        console.error('Error loading history:', error);
+    }
+}
+
+function setConversationId(id) {
+    conversationId = id;
+    if (id) {
+        localStorage.setItem(CONVERSATION_KEY, id);
+    } else {
+        localStorage.removeItem(CONVERSATION_KEY);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', loadHistory);
+
+function toggleChatbot() {
+    const container = document.getElementById('chatbotContainer');
+    container.style.display = container.style.display === 'none' || container.style.display === '' ? 'flex' : 'none';
+}
+
+function handleKeyPress(event) {
+    if (event.key === 'Enter') {
+        sendMessage();
+    }
+}
+
+async function sendMessage() {
+    const input = document.getElementById('messageInput');
+    const message = input.value.trim();
+    
+    if (!message) return;
+    
+    // Add user message to chat
+    addMessage(message, 'user');
+    input.value = '';
+    
+    // Show loading
+    const messagesContainer = document.getElementById('chatbotMessages');
+    messagesContainer.classList.add('loading');
+    
+    // Bot bubble that is filled in as tokens arrive
+    const botDiv = addMessage('', 'bot');
+    let answer = '';
+    
+    try {
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                message: message,
+                conversationId: conversationId
+            })
+        });
+        
+        if (!response.ok || !response.body) {
+            const data = await response.json();
+            botDiv.textContent = 'Desculpe, ocorreu um erro: ' + (data.message || 'Erro desconhecido');
+            return;
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            
+            // SSE frames are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                const sse = parseEvent(frame);
+                if (!sse) continue;
+                
+                if (sse.event === 'token') {
+                    answer += sse.data.text;
+                    botDiv.textContent = answer;
+                    messagesContainer.classList.remove('loading');
+                    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                } else if (sse.event === 'done') {
+                    setConversationId(sse.data.conversationId);
+                } else if (sse.event === 'error') {
+                    botDiv.textContent = 'Desculpe, ocorreu um erro: ' + (sse.data.message || 'Erro desconhecido');
+                }
+            }
+        }
+        
+    } catch (error) {
+        botDiv.textContent = 'Erro de conexão. Tente novamente.';
+        console.error('Error:', error);
+    } finally {
+        messagesContainer.classList.remove('loading');
+    }
+}
+
+function parseEvent(frame) {
+    let event = 'message';
+    let data = '';
+    
+    for (const line of frame.split('\n')) {
+        if (line.startsWith('event:')) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            data += line.slice(5).trim();
+        }
+    }
+    
+    // Comment-only frames (keep-alives) carry no data
+    if (!data) return null;
+    
+    return { event: event, data: JSON.parse(data) };
+}
+
+function addMessage(text, sender) {
+    const messagesContainer = document.getElementById('chatbotMessages');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${sender}-message`;
+    messageDiv.textContent = text;
+    messagesContainer.appendChild(messageDiv);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    return messageDiv;
+}
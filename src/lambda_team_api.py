@@ -1,22 +1,142 @@
-import json
-import boto3
-from botocore.exceptions import ClientError
+import os
+import time
+import base64
 import logging
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from api_response import dumps
+from metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS, emf_line
+from structured_logging import begin_request, configure_logging, end_request, flush
+from team_data import (
+    TABLE_NAME, REGION, RosterSnapshot, encoded_snapshot, fetch_members_page,
+    group_members, iter_team_members, parse_page_params
+)
+
+# JSON lines written by a background thread, flushed before each invocation returns
+configure_logging('team-lambda')
+logger = logging.getLogger(__name__)
+
+# CloudWatch namespace of the per-invocation metric lines
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'DataIESB/TeamApi')
+
+# gzip/br bodies for clients that accept them. They are returned base64-encoded, which a
+# REST API only decodes with binaryMediaTypes set (README, "Team Data Lambda"); off by default
+RESPONSE_COMPRESSION = os.getenv('TEAM_LAMBDA_COMPRESSION', 'false').lower() == 'true'
+
+# Created once per execution environment and reused by warm invocations
+_table = None
+
+
+def get_table():
+    """Return the DynamoDB table, building the boto3 resource on first use"""
+    global _table
+    if _table is None:
+        # boto3 is imported here so module init stays cheap on cold starts
+        import boto3
+        dynamodb = boto3.resource('dynamodb', region_name=REGION)
+        _table = dynamodb.Table(TABLE_NAME)
+    return _table
+
+
+def load_team_members():
+    """Scan and normalize the whole team table"""
+    from botocore.exceptions import ClientError
+
+    try:
+        # Scan the whole table (following LastEvaluatedKey), normalizing as pages arrive
+        processed_items = list(iter_team_members(get_table()))
+        
+        logger.info("Retrieved %s team members", len(processed_items))
+        return {'success': True, 'data': processed_items}
+        
+    except ClientError as e:
+        logger.error("DynamoDB error: %s", e)
+        return {'error': 'Database error', 'message': str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {'error': 'Server error', 'message': str(e)}
+
+
+def load_team_page(category=None, limit=None, cursor=None):
+    """Read one page of team members, querying the category index when filtered"""
+    from botocore.exceptions import ClientError
+
+    try:
+        result = fetch_members_page(get_table(), category=category, limit=limit, cursor=cursor)
+        
+        logger.info("Retrieved %s team members (category=%s)", len(result['data']), category)
+        return result
+        
+    except ClientError as e:
+        logger.error("DynamoDB error: %s", e)
+        return {'error': 'Database error', 'message': str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {'error': 'Server error', 'message': str(e)}
+
+
+# Serialized roster shared by warm invocations for TEAM_CACHE_TTL seconds.
+# Background threads do not run while the environment is frozen, so stale
+# snapshots are reloaded inline (stale_ttl=0) instead of revalidated.
+_roster = RosterSnapshot(load_team_members, stale_ttl=0)
+
 
 def lambda_handler(event, context):
     """
     AWS Lambda function to serve team data from DynamoDB
+    Emits one CloudWatch EMF metrics line per invocation, which is also its access line
     """
+    start = time.perf_counter()
+    calls_before, seconds_before = UPSTREAM_SECONDS.totals(service='dynamodb')
+    errors_before = UPSTREAM_ERRORS.values()
+    request_id = getattr(context, 'aws_request_id', None)
+    route = event.get('resource') or event.get('path')
+    request_log, token = begin_request(event.get('httpMethod'), route, request_id)
+    
+    try:
+        response = handle_request(event)
+    finally:
+        end_request(token)
+    
+    calls, seconds = UPSTREAM_SECONDS.totals(service='dynamodb')
+    error_codes = {
+        labels[2]: value - errors_before.get(labels, 0)
+        for labels, value in UPSTREAM_ERRORS.values().items()
+        if labels[0] == 'dynamodb' and value > errors_before.get(labels, 0)
+    }
+    
+    # Printed rather than logged: EMF records must be the whole log line
+    print(emf_line(METRICS_NAMESPACE, {'Service': 'TeamApi'}, {
+        'Requests': (1, 'Count'),
+        'ServerErrors': (int(response['statusCode'] >= 500), 'Count'),
+        'Latency': (round((time.perf_counter() - start) * 1000, 3), 'Milliseconds'),
+        'ResponseBytes': (len(response['body']), 'Bytes'),
+        'DynamoDBCalls': (calls - calls_before, 'Count'),
+        'DynamoDBLatency': (round((seconds - seconds_before) * 1000, 3), 'Milliseconds'),
+        'DynamoDBErrors': (sum(error_codes.values()), 'Count')
+    }, {
+        'statusCode': response['statusCode'],
+        'requestId': request_log.request_id,
+        'route': route,
+        'upstreamErrorCode': request_log.upstream_error,
+        'dynamoDbErrorCodes': error_codes
+    }), flush=True)
+    
+    # The environment is frozen once the handler returns and the writer thread stops with it
+    flush()
+    
+    return response
+
+
+def handle_request(event):
+    """Build the API Gateway response for one event"""
     
     # CORS headers
     headers = {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Methods': 'GET, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type'
+        'Access-Control-Allow-Headers': 'Content-Type, If-None-Match',
+        'Access-Control-Expose-Headers': 'ETag'
     }
     
     # Handle CORS preflight
@@ -28,55 +148,87 @@ def lambda_handler(event, context):
         }
     
     try:
-        # Initialize DynamoDB
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-        table = dynamodb.Table('DataIESB-TeamMembers')
+        options = parse_page_params(event.get('queryStringParameters') or {})
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': dumps({
+                'error': 'Invalid request',
+                'message': str(e)
+            }).decode('utf-8')
+        }
+    
+    try:
+        group = options.pop('group')
+        
+        # Filtered or paginated reads go to DynamoDB (Query per category)
+        if any(options.values()):
+            result = load_team_page(**options)
+            if 'error' not in result and group:
+                result['data'] = group_members(result['data'])
+            return {
+                'statusCode': 500 if 'error' in result else 200,
+                'headers': headers,
+                'body': dumps(result).decode('utf-8')
+            }
         
-        # Scan the table
-        response = table.scan()
-        items = response.get('Items', [])
+        snapshot, error = _roster.get()
         
-        # Process items to ensure consistent structure
-        processed_items = []
-        for item in items:
-            processed_item = {
-                'id': item.get('email', ''),
-                'name': item.get('name', ''),
-                'email': item.get('email', ''),
-                'role': item.get('role', ''),
-                'category': item.get('category', 'Outros'),
-                'active': True
+        if error:
+            return {
+                'statusCode': 500,
+                'headers': headers,
+                'body': dumps(error).decode('utf-8')
             }
-            processed_items.append(processed_item)
         
-        logger.info(f"Retrieved {len(processed_items)} team members")
+        if group:
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': dumps({
+                    'success': True,
+                    'data': group_members(snapshot.result['data'])
+                }).decode('utf-8')
+            }
+        
+        request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+        accept_encoding = request_headers.get('accept-encoding') if RESPONSE_COMPRESSION else None
+        body, encoding, etag = encoded_snapshot(snapshot, accept_encoding)
+        
+        headers['ETag'] = f'"{etag}"'
+        headers['Vary'] = 'Accept-Encoding'
+        
+        if headers['ETag'] in request_headers.get('if-none-match', ''):
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': ''
+            }
+        
+        if encoding:
+            # Same JSON contract, compressed; API Gateway turns the base64 body back into bytes
+            headers['Content-Encoding'] = encoding
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'isBase64Encoded': True,
+                'body': base64.b64encode(body).decode('ascii')
+            }
         
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps({
-                'success': True,
-                'data': processed_items
-            })
+            'body': body.decode('utf-8')
         }
         
-    except ClientError as e:
-        logger.error(f"DynamoDB error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': headers,
-            'body': json.dumps({
-                'error': 'Database error',
-                'message': str(e)
-            })
-        }
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         return {
             'statusCode': 500,
             'headers': headers,
-            'body': json.dumps({
+            'body': dumps({
                 'error': 'Server error',
                 'message': str(e)
-            })
+            }).decode('utf-8')
         }
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the Amazon Q Business chatbot
+Starts the chatbot in-process (Flask dev server or the ASGI app under uvicorn)
+with qbusiness_stub.QBusinessStub in place of the AWS client, drives /chat,
+/chat/stream and /widget from concurrent clients, and reports throughput and
+p50/p95/p99 latency per endpoint. Results are written as JSON so runs can be
+compared over time.
+
+Usage:
+    python3 load-test-chatbot.py --server asgi --concurrency 32 --duration 30 --output load-asgi.json
+    python3 load-test-chatbot.py --latency lognormal:1200:0.6 --throttle-rate 0.02 --distinct-questions 500
+    python3 load-test-chatbot.py --url http://localhost:5000 --mix chat=1   # an already running server
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+from bench_utils import percentile
+from qbusiness_stub import LatencyModel, QBusinessStub
+
+QUESTION_TEMPLATES = [
+    'Quais são os parceiros do projeto {}?',
+    'Quem coordena a área {}?',
+    'Onde encontro os relatórios sobre {}?',
+    'Como participar da pesquisa em {}?'
+]
+TOPICS = ['saúde', 'educação', 'mobilidade', 'segurança', 'economia', 'meio ambiente', 'cultura', 'turismo']
+
+
+def summarize(samples, elapsed):
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'rps': round(len(samples) / elapsed, 2),
+        'meanMs': round(sum(samples) / len(samples), 3),
+        'p50Ms': round(percentile(samples, 50), 3),
+        'p95Ms': round(percentile(samples, 95), 3),
+        'p99Ms': round(percentile(samples, 99), 3),
+        'maxMs': round(max(samples), 3)
+    }
+
+
+def build_questions(count):
+    questions = []
+    for i in range(count):
+        template = QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)]
+        topic = TOPICS[(i // len(QUESTION_TEMPLATES)) % len(TOPICS)]
+        suffix = f' ({i})' if i >= len(QUESTION_TEMPLATES) * len(TOPICS) else ''
+        questions.append(template.format(topic) + suffix)
+    return questions
+
+
+def parse_mix(spec):
+    """'chat=8,widget=2' -> [('chat', 8.0), ('widget', 2.0)]"""
+    mix = []
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('chat', 'stream', 'widget'):
+            raise ValueError(f'Unknown endpoint in mix: {name}')
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_server(args):
+    """Run the chatbot with the Q Business stub on a background thread; returns (base_url, stub)"""
+    # Admission limits are read at import time; per-client rate limiting would
+    # shed most of a single-host load test, so it is off unless asked for
+    os.environ.setdefault('CHAT_RATE_LIMIT', str(args.rate_limit))
+    os.environ.setdefault('Q_BUSINESS_APPLICATION_ID', 'load-test')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    import chatbot_backend
+
+    stub = QBusinessStub(
+        latency=LatencyModel.parse(args.latency),
+        throttle_rate=args.throttle_rate,
+        max_tps=args.max_tps,
+        seed=args.seed
+    )
+    chatbot_backend.chatbot.q_business_client = stub
+    chatbot_backend.chatbot.application_id = chatbot_backend.chatbot.application_id or 'load-test'
+
+    port = free_port()
+    if args.server == 'asgi':
+        import uvicorn
+        import chatbot_asgi
+
+        server = uvicorn.Server(uvicorn.Config(chatbot_asgi.app, host='127.0.0.1', port=port, log_level='warning'))
+        # Signal handlers can only be installed from the main thread
+        server.install_signal_handlers = lambda: None
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+    else:
+        from werkzeug.serving import make_server
+
+        server = make_server('127.0.0.1', port, chatbot_backend.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return f'http://127.0.0.1:{port}', stub
+
+
+class Worker(threading.Thread):
+    def __init__(self, base_url, mix, questions, deadline, max_requests, results, seed):
+        super().__init__(daemon=True)
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.mix = mix
+        self.questions = questions
+        self.deadline = deadline
+        self.max_requests = max_requests
+        self.results = results
+        self.rng = random.Random(seed)
+        self.conn = None
+
+    def run(self):
+        names = [name for name, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        while time.perf_counter() < self.deadline and self.max_requests() > 0:
+            endpoint = self.rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = self.request(endpoint)
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                self.conn = None
+            self.results.record(endpoint, status, (time.perf_counter() - start) * 1000)
+
+    def request(self, endpoint):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.conn.connect()
+            # Small requests would otherwise sit behind Nagle/delayed ACK and skew latencies
+            self.conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        if endpoint == 'widget':
+            self.conn.request('GET', '/widget', headers={'Accept-Encoding': 'gzip, br'})
+        else:
+            body = json.dumps({'message': self.rng.choice(self.questions)}).encode('utf-8')
+            path = '/chat/stream' if endpoint == 'stream' else '/chat'
+            self.conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+
+        response = self.conn.getresponse()
+        response.read()
+        if response.will_close:
+            self.conn.close()
+            self.conn = None
+        return response.status
+
+
+class Results:
+    def __init__(self, total_requests):
+        self._lock = threading.Lock()
+        self._remaining = total_requests or float('inf')
+        self.latencies = {}
+        self.statuses = {}
+
+    def take(self):
+        with self._lock:
+            self._remaining -= 1
+            return self._remaining + 1
+
+    def record(self, endpoint, status, elapsed_ms):
+        with self._lock:
+            # Only successful requests count towards latency percentiles
+            if status == 200:
+                self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+
+def fetch_health(base_url):
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+    try:
+        conn.request('GET', '/')
+        return json.loads(conn.getresponse().read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline load test for the Q Business chatbot')
+    parser.add_argument('--url', help='Test an already running server instead of starting one with the stub')
+    parser.add_argument('--server', choices=['flask', 'asgi'], default='asgi', help='Serving mode for the local server')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0 = run for --duration)')
+    parser.add_argument('--mix', default='chat=8,widget=2', help='Endpoint weights: chat, stream, widget')
+    parser.add_argument('--distinct-questions', type=int, default=50, help='Question pool size (smaller = more cache hits)')
+    parser.add_argument('--latency', default='lognormal:800:0.5', help='Stub latency: fixed:MS, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of stub calls that are throttled')
+    parser.add_argument('--max-tps', type=float, default=0, help='Stub calls per second before throttling (0 = unlimited)')
+    parser.add_argument('--rate-limit', type=float, default=0, help='CHAT_RATE_LIMIT for the local server (0 = off)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--max-p99-ms', type=float, help='Fail if /chat p99 latency exceeds this')
+    parser.add_argument('--min-rps', type=float, help='Fail if overall successful throughput is below this')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    stub = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        base_url, stub = start_local_server(args)
+
+    print("🔥 Q Business Chatbot Load Test")
+    print("=" * 50)
+    print(f"Target: {base_url} ({'remote' if args.url else args.server + ' + stub ' + args.latency})")
+    print(f"Clients: {args.concurrency}, mix: {args.mix}, questions: {args.distinct_questions}")
+
+    questions = build_questions(args.distinct_questions)
+    results = Results(args.requests)
+    start = time.perf_counter()
+    deadline = start + (args.duration if not args.requests else float('inf'))
+    workers = [
+        Worker(base_url, mix, questions, deadline, results.take, results, args.seed + i)
+        for i in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    print(f"\n⏱️  {elapsed:.1f}s")
+    for endpoint, _ in mix:
+        summary = summarize(results.latencies.get(endpoint, []), elapsed)
+        summary['statuses'] = results.statuses.get(endpoint, {})
+        endpoints[endpoint] = summary
+        if summary['count']:
+            print(f"   {endpoint:<7} {summary['rps']:>8.1f} req/s  p50 {summary['p50Ms']:>8.1f} ms  "
+                  f"p95 {summary['p95Ms']:>8.1f} ms  p99 {summary['p99Ms']:>8.1f} ms  {summary['statuses']}")
+        else:
+            print(f"   {endpoint:<7} no successful requests  {summary['statuses']}")
+
+    succeeded = sum(s['count'] for s in endpoints.values())
+    total_rps = round(succeeded / elapsed, 2)
+    print(f"   total   {total_rps:>8.1f} req/s")
+
+    output = {
+        'benchmark': 'chatbot-load',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'target': 'remote' if args.url else args.server,
+        'parameters': vars(args),
+        'elapsedSeconds': round(elapsed, 3),
+        'throughputRps': total_rps,
+        'endpoints': endpoints,
+        'upstream': stub.stats() if stub else None,
+        'server': fetch_health(base_url)
+    }
+    if stub:
+        stats = stub.stats()
+        print(f"   upstream calls {stats['calls']} (throttled {stats['throttled']}, peak in flight {stats['peakInFlight']})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    ok = True
+    chat_p99 = endpoints.get('chat', {}).get('p99Ms')
+    if args.max_p99_ms is not None and (chat_p99 is None or chat_p99 > args.max_p99_ms):
+        print(f"❌ /chat p99 {chat_p99} ms exceeds budget {args.max_p99_ms} ms")
+        ok = False
+    if args.min_rps is not None and total_rps < args.min_rps:
+        print(f"❌ Throughput {total_rps} req/s below budget {args.min_rps} req/s")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for the Flask apps and the Lambda
+Counters, gauges and histograms rendered in the Prometheus text format by
+GET /metrics, plus CloudWatch Embedded Metric Format (EMF) lines for Lambda,
+where there is no process to scrape. Recording is a dict lookup done once per
+label set and a few additions under a lock, so it is safe on hot paths.
+"""
+
+import os
+import hmac
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from profiling import add_span
+from structured_logging import note_upstream_error
+
+# Seconds; covers cached answers (ms) up to slow Q Business calls (tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Bytes; from small JSON errors to multi-megabyte rosters
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bearer token required by GET /metrics (Authorization: Bearer <token>); empty serves it to anyone
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Args:
+            name (str): Metric name (snake_case, with unit suffix)
+            documentation (str): HELP text
+            labelnames (tuple): Label names; values are given positionally to labels()
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child for a label set (cache it at call sites that run often)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items(), key=lambda item: tuple(map(str, item[0]))):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, values):
+        return [f'{name}{_format_labels(labelnames, values)} {_format_value(self.value)}']
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self, name, labelnames, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(labelnames + ('le',), values + (_format_value(float(bound)),))
+            lines.append(f'{name}_bucket{labels} {cumulative}')
+        labels = _format_labels(labelnames, values)
+        lines.append(f'{name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{name}_count{labels} {count}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def values(self):
+        """Current value of every label set, as {label values tuple: value}"""
+        return {values: child.value for values, child in list(self._children.items())}
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def totals(self, **match):
+        """(count, sum) over every label set matching the given label values"""
+        count, total = 0, 0.0
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            if all(labels.get(k) == v for k, v in match.items()):
+                count += child.count
+                total += child.sum
+        return count, total
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Register a metric; registering the same name again returns the existing one"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """Prometheus text exposition of every registered metric"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=(), registry=REGISTRY):
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=(), registry=REGISTRY):
+    return registry.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Upstream calls shared by the chatbot (Q Business) and the team APIs (DynamoDB)
+UPSTREAM_SECONDS = histogram(
+    'upstream_request_duration_seconds', 'Latency of upstream AWS calls', ('service', 'operation')
+)
+UPSTREAM_ERRORS = counter(
+    'upstream_errors_total', 'Failed upstream AWS calls by error code', ('service', 'operation', 'code')
+)
+UPSTREAM_IN_FLIGHT = gauge('upstream_in_flight', 'Upstream AWS calls in progress', ('service',))
+
+# HTTP side, recorded by instrument_flask() and by the ASGI routes served outside Flask
+HTTP_REQUESTS = counter('http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+HTTP_SECONDS = histogram('http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+HTTP_RESPONSE_BYTES = histogram('http_response_size_bytes', 'HTTP response body size', ('route',), SIZE_BUCKETS)
+HTTP_IN_FLIGHT = gauge('http_requests_in_flight', 'HTTP requests being served').labels()
+
+
+def record_request(method, route, status, seconds, size=None):
+    """Record one served HTTP request (size is None for streamed bodies)"""
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_SECONDS.labels(method, route).observe(seconds)
+    if size is not None:
+        HTTP_RESPONSE_BYTES.labels(route).observe(size)
+
+
+def aws_error_code(error):
+    """AWS error code of a botocore ClientError, or the exception class name"""
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code', 'Unknown')
+    return type(error).__name__
+
+
+@contextmanager
+def track_upstream(service, operation):
+    """Time one upstream call and count its failure by AWS error code (also a profiling span)"""
+    in_flight = UPSTREAM_IN_FLIGHT.labels(service)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        code = aws_error_code(e)
+        UPSTREAM_ERRORS.labels(service, operation, code).inc()
+        note_upstream_error(code)
+        raise
+    finally:
+        in_flight.dec()
+        elapsed = time.perf_counter() - start
+        UPSTREAM_SECONDS.labels(service, operation).observe(elapsed)
+        add_span(service, elapsed)
+
+
+def has_metrics_token(authorization):
+    """Whether an Authorization header carries METRICS_TOKEN (always true when no token is set)"""
+    if not METRICS_TOKEN:
+        return True
+    scheme, _, sent = (authorization or '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(sent.strip().encode(), METRICS_TOKEN.encode())
+
+
+def instrument_flask(app, registry=REGISTRY):
+    """
+    Record per-route request metrics for a Flask app and serve them on GET /metrics
+
+    Streaming responses are timed until their headers are sent and have no size.
+    With METRICS_TOKEN set, /metrics answers 401 unless the scraper sends it as a bearer token.
+    """
+    from flask import Response, g, request
+
+    from api_response import json_response
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+
+        # The URL rule, not the raw path, so ids in paths don't explode cardinality
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        size = None if response.is_streamed else response.content_length
+        record_request(request.method, route, response.status_code, time.perf_counter() - start, size)
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        HTTP_IN_FLIGHT.dec()
+
+    @app.route('/metrics')
+    def metrics():
+        if not has_metrics_token(request.headers.get('Authorization')):
+            return json_response({
+                'error': 'Unauthorized',
+                'message': 'A valid metrics token is required'
+            }, 401, headers={'WWW-Authenticate': 'Bearer'})
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def emf_line(namespace, dimensions, metrics, properties=None):
+    """
+    CloudWatch Embedded Metric Format record, to be printed as one log line
+
+    Args:
+        namespace (str): CloudWatch namespace
+        dimensions (dict): Dimension name -> value
+        metrics (dict): Metric name -> (value, unit)
+        properties (dict): Extra searchable fields that are not metrics
+    """
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in metrics.items()]
+            }]
+        }
+    }
+    record.update(dimensions)
+    record.update(properties or {})
+    record.update({name: value for name, (value, _) in metrics.items()})
+    return json.dumps(record, separators=(',', ':'))
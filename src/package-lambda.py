@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Build the deployment zip of the team Lambda (lambda_team_api.py)
+The handler imports several modules from this directory (team_data.py,
+api_response.py, metrics.py, profiling.py, structured_logging.py). They are
+found by following its imports, so a new dependency cannot be left out of the
+package. boto3 comes with the Lambda runtime; optional packages the modules
+fall back without (orjson, brotli) are not bundled.
+
+Usage:
+    python3 package-lambda.py --list                 # modules the package holds
+    python3 package-lambda.py --output team-lambda.zip
+    python3 package-lambda.py --output team-lambda.zip --check   # import the handler from the zip
+"""
+
+import os
+import sys
+import ast
+import zipfile
+import argparse
+import tempfile
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HANDLER_MODULE = 'lambda_team_api'
+
+
+def imported_names(path):
+    """Top-level module names imported anywhere in a file, function-level imports included"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return names
+
+
+def local_modules(entry=HANDLER_MODULE, base_dir=BASE_DIR):
+    """
+    The entry module and every module of base_dir it imports, directly or not
+
+    Returns:
+        list: Module names, sorted
+    """
+    found = set()
+    pending = [entry]
+    while pending:
+        name = pending.pop()
+        path = os.path.join(base_dir, f'{name}.py')
+        if name in found or not os.path.exists(path):
+            continue
+        found.add(name)
+        pending.extend(imported_names(path) - found)
+    return sorted(found)
+
+
+def build(output, modules, base_dir=BASE_DIR):
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in modules:
+            archive.write(os.path.join(base_dir, f'{name}.py'), f'{name}.py')
+
+
+def check(output):
+    """Import the handler in a fresh interpreter that only sees the zip's contents"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with zipfile.ZipFile(output) as archive:
+            archive.extractall(tmp)
+        env = dict(os.environ, AWS_DEFAULT_REGION=os.getenv('AWS_DEFAULT_REGION', 'us-east-1'))
+        result = subprocess.run(
+            # -I keeps this directory and PYTHONPATH off sys.path; only the extracted files are added
+            [sys.executable, '-I', '-c', f"import sys; sys.path.insert(0, '.'); import {HANDLER_MODULE}; "
+                                         f"{HANDLER_MODULE}.lambda_handler"],
+            cwd=tmp, capture_output=True, text=True, env=env
+        )
+    return result.returncode == 0, result.stderr.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the deployment zip of the team Lambda')
+    parser.add_argument('--output', default='team-lambda.zip', help='Zip file to write')
+    parser.add_argument('--list', action='store_true', help='Only print the modules the package holds')
+    parser.add_argument('--check', action='store_true', help='Import the handler from the built zip')
+    args = parser.parse_args()
+
+    modules = local_modules()
+    if args.list:
+        print('\n'.join(f'{name}.py' for name in modules))
+        return True
+
+    build(args.output, modules)
+    print(f"📦 {args.output}: {', '.join(f'{name}.py' for name in modules)}")
+    print(f"   Handler: {HANDLER_MODULE}.lambda_handler")
+
+    if args.check:
+        ok, error = check(args.output)
+        if not ok:
+            print(f"❌ The handler does not import from the package:\n{error}")
+            return False
+        print("✅ The handler imports from the package alone")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
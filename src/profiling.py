@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-request profiling for the Flask apps and the ASGI chat route
+Records how long each stage of a request took (JSON parsing, AWS calls,
+normalization, serialization, ...) and returns the breakdown in a
+Server-Timing header. Sampled requests, or requests carrying the debug header
+with the right token, also get a full cProfile dump (pstats format) written to
+PROFILE_DIR. With REQUEST_PROFILING off no hooks are installed and every span
+is a single context-variable lookup.
+"""
+
+import os
+import re
+import time
+import hmac
+import random
+import cProfile
+import logging
+import threading
+import contextvars
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Spans and the Server-Timing header for every request
+ENABLED = os.getenv('REQUEST_PROFILING', 'false').lower() == 'true'
+# Fraction of requests (0-1) that also get a cProfile dump
+SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+# Requests sending DEBUG_HEADER: DEBUG_TOKEN are always dumped; no token disables the header
+DEBUG_HEADER = os.getenv('PROFILE_DEBUG_HEADER', 'X-Debug-Profile')
+DEBUG_TOKEN = os.getenv('PROFILE_DEBUG_TOKEN', '')
+# Where dumps go, and how many are kept (oldest removed first)
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/dataiesb-profiles')
+MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 100))
+
+_current = contextvars.ContextVar('request_profile', default=None)
+_NO_SPAN = nullcontext()
+
+# One cProfile at a time: profilers slow everything down and Python 3.12+ allows only one
+_profiler_lock = threading.Lock()
+_dump_counter = 0
+
+
+class RequestProfile:
+    def __init__(self, label, profile=False, profile_dir=PROFILE_DIR):
+        """
+        Timings of one request
+
+        Args:
+            label (str): Request description, e.g. 'GET /api/team'
+            profile (bool): Also run cProfile, unless another request is already profiled
+            profile_dir (str): Directory the cProfile dump is written to
+        """
+        self.label = label
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._lock = threading.Lock()
+        self.profiler = None
+        self.dump_path = None
+
+        if profile and _profiler_lock.acquire(blocking=False):
+            global _dump_counter
+            _dump_counter += 1
+            slug = '-'.join(filter(None, re.split(r'[^a-z0-9]+', label.lower())))
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{os.getpid()}-{_dump_counter}.prof"
+            self.dump_path = os.path.join(profile_dir, name)
+            self.profiler = cProfile.Profile()
+
+    def add(self, name, seconds):
+        """Add seconds to a stage; spans from worker threads of the same request are summed"""
+        with self._lock:
+            total = self.spans.get(name)
+            self.spans[name] = (seconds, 1) if total is None else (total[0] + seconds, total[1] + 1)
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds"""
+        with self._lock:
+            spans = list(self.spans.items())
+        parts = []
+        for name, (seconds, count) in spans:
+            part = f'{name};dur={seconds * 1000:.2f}'
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        parts.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.2f}')
+        if self.dump_path:
+            parts.append(f'profile;desc="{os.path.basename(self.dump_path)}"')
+        return ', '.join(parts)
+
+    def call(self, func, *args, **kwargs):
+        """Run func, under cProfile if this request is being profiled"""
+        if self.profiler is None:
+            return func(*args, **kwargs)
+        return self.profiler.runcall(func, *args, **kwargs)
+
+    def finish(self):
+        """Stop profiling and write the dump; never raises, a lost dump must not fail the request"""
+        if self.profiler is None:
+            return None
+        profiler, self.profiler = self.profiler, None
+        try:
+            profiler.disable()
+            os.makedirs(os.path.dirname(self.dump_path), exist_ok=True)
+            profiler.dump_stats(self.dump_path)
+            prune_dumps(os.path.dirname(self.dump_path))
+            logger.info("Profile of %s written to %s", self.label, self.dump_path)
+            return self.dump_path
+        except Exception as e:
+            logger.error("Could not write profile %s: %s", self.dump_path, e)
+            return None
+        finally:
+            _profiler_lock.release()
+
+
+def prune_dumps(directory, keep=MAX_FILES):
+    """Remove the oldest dumps beyond keep"""
+    dumps = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.prof')]
+    if len(dumps) <= keep:
+        return
+    dumps.sort(key=os.path.getmtime)
+    for path in dumps[:len(dumps) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def wants_profile(headers, sample_rate=SAMPLE_RATE, token=DEBUG_TOKEN):
+    """
+    Whether a request gets a cProfile dump
+
+    Args:
+        headers: Request headers (Flask headers or a dict with lowercase names)
+    """
+    if token:
+        sent = headers.get(DEBUG_HEADER, headers.get(DEBUG_HEADER.lower(), ''))
+        if sent and hmac.compare_digest(sent.encode(), token.encode()):
+            return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def begin(label, headers):
+    """
+    Start timing the current request (context)
+
+    cProfile is not switched on here: the caller enables profile.profiler on the
+    thread doing the work, or runs that work through profile.call().
+
+    Returns:
+        tuple: (RequestProfile, token for end())
+    """
+    profile = RequestProfile(label, wants_profile(headers))
+    return profile, _current.set(profile)
+
+
+def end(profile, token):
+    """Finish a request started with begin(); returns the dump path, if one was written"""
+    _current.reset(token)
+    return profile.finish()
+
+
+def current():
+    """The RequestProfile of the request being served, or None"""
+    return _current.get()
+
+
+def span(name):
+    """
+    Time a stage of the current request
+
+    Usage:
+        with span('parse'):
+            data = request.get_json()
+    """
+    profile = _current.get()
+    if profile is None:
+        return _NO_SPAN
+    return _Span(profile, name)
+
+
+def add_span(name, seconds):
+    """Record an already measured stage of the current request"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+class _Span:
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def profile_flask(app, enabled=ENABLED):
+    """
+    Add spans and the Server-Timing header to every request of a Flask app
+
+    Does nothing unless enabled. Streaming responses are timed until their
+    headers are sent; their cProfile dump covers the same part.
+    """
+    if not enabled:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _begin_profile():
+        g.request_profile = begin(f'{request.method} {request.path}', request.headers)
+        profiler = g.request_profile[0].profiler
+        if profiler is not None:
+            profiler.enable()
+
+    @app.after_request
+    def _server_timing(response):
+        started = g.get('request_profile')
+        if started is not None:
+            profile = started[0]
+            if profile.profiler is not None:
+                profile.profiler.disable()
+            response.headers['Server-Timing'] = profile.server_timing()
+        return response
+
+    @app.teardown_request
+    def _end_profile(exc):
+        started = g.pop('request_profile', None)
+        if started is not None:
+            end(*started)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Routing across several Amazon Q Business endpoints
+Each endpoint (an application in some region) keeps its own client, circuit
+breaker and moving average of its latency. First-turn questions go to the
+fastest healthy endpoint and fail over to the next one when it throttles,
+errors or has its breaker open; follow-up turns stay on the endpoint that
+started the conversation. The endpoint is recorded in the conversation id
+handed to clients, so affinity survives restarts and multiple instances.
+"""
+
+import os
+import time
+import random
+import threading
+import logging
+from contextlib import contextmanager
+
+from botocore.exceptions import NoCredentialsError
+
+from metrics import counter, gauge
+from resilience import CircuitBreaker, CircuitOpenError, client_config, is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Seconds between attempts to create an endpoint's client after a failure
+CLIENT_INIT_RETRY_DELAY = float(os.getenv('QBUSINESS_CLIENT_RETRY_DELAY', 5))
+CLIENT_INIT_MAX_RETRY_DELAY = 60
+# Weight of the newest latency sample in the moving average
+LATENCY_ALPHA = float(os.getenv('QBUSINESS_LATENCY_ALPHA', 0.2))
+# Latency (seconds) counted for a throttled or failed call, so a failing endpoint loses traffic at once
+FAILURE_PENALTY = float(os.getenv('QBUSINESS_FAILURE_PENALTY', 5))
+# Share of first turns sent to a random healthy endpoint, keeping the others' latencies current
+EXPLORE_RATE = float(os.getenv('QBUSINESS_EXPLORE_RATE', 0.05))
+
+# Separates the endpoint name from the Q Business conversation id
+CONVERSATION_SEPARATOR = ':'
+
+ENDPOINT_LATENCY = gauge(
+    'qbusiness_endpoint_latency_seconds', 'Moving average latency of each Q Business endpoint', ('endpoint',)
+)
+ENDPOINT_FAILOVERS = counter(
+    'qbusiness_failovers_total', 'First turns moved to another endpoint, by the endpoint that failed', ('endpoint',)
+)
+
+
+class QBusinessEndpoint:
+    def __init__(self, application_id, region=None, name=None, client=None):
+        """
+        One Q Business application reachable in one region
+
+        Args:
+            application_id (str): Q Business application id
+            region (str): AWS region; None uses the session's default region
+            name (str): Label used in routing, stats and conversation ids (default: region)
+            client: Ready client to use instead of creating one (tests, offline runs)
+        """
+        self.application_id = application_id
+        self.region = region
+        self.name = name or region or 'default'
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('QBUSINESS_BREAKER_THRESHOLD', 5)),
+            reset_timeout=float(os.getenv('QBUSINESS_BREAKER_RESET_TIMEOUT', 30)),
+            name=f'qbusiness:{self.name}'
+        )
+
+        self.session = None
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._retry_at = 0.0
+        self.client_state = 'cold'  # cold -> initializing -> ready, or failed until the next attempt
+        self.client_error = None
+        self.client_init_seconds = None
+        if client is not None:
+            self.client = client
+
+        self._lock = threading.Lock()
+        self.latency = None  # moving average of successful calls, seconds
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def client(self):
+        """The Q Business client, created here if it does not exist yet"""
+        if self._client is None and time.monotonic() >= self._retry_at:
+            self.init_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        with self._client_lock:
+            self._client = client
+            self.client_state = 'ready' if client is not None else 'cold'
+
+    def init_client(self):
+        """Create the session and client and resolve credentials; returns True when ready"""
+        with self._client_lock:
+            if self._client is not None:
+                return True
+
+            self.client_state = 'initializing'
+            start = time.perf_counter()
+            try:
+                # boto3 adds a quarter of a second to imports, so it is loaded here
+                import boto3
+
+                session = boto3.Session(region_name=self.region) if self.region else boto3.Session()
+                # Explicit timeouts and a pool sized to our concurrency; retries are handled by RetryPolicy
+                client = session.client('qbusiness', config=client_config())
+                # Resolve credentials now (environment, profile, container or instance
+                # metadata) instead of during the first visitor's request
+                credentials = session.get_credentials()
+                if credentials is None:
+                    raise NoCredentialsError()
+                credentials.get_frozen_credentials()
+
+            except NoCredentialsError:
+                logger.error("AWS credentials not found. Please configure your AWS credentials.")
+                return self._client_failed('AWS credentials not found')
+            except Exception as e:
+                logger.error("Error initializing Q Business client for %s: %s", self.name, e)
+                return self._client_failed(str(e))
+
+            self.session = session
+            self._client = client
+            self.client_state = 'ready'
+            self.client_error = None
+            self.client_init_seconds = round(time.perf_counter() - start, 3)
+            logger.info("Q Business client for %s ready in %ss", self.name, self.client_init_seconds)
+            return True
+
+    def _client_failed(self, error):
+        self.client_state = 'failed'
+        self.client_error = error
+        self._retry_at = time.monotonic() + CLIENT_INIT_RETRY_DELAY
+        return False
+
+    def observe(self, seconds):
+        """Fold one call's latency into the moving average"""
+        with self._lock:
+            self.latency = seconds if self.latency is None else (
+                LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * self.latency
+            )
+            latency = self.latency
+        ENDPOINT_LATENCY.labels(self.name).set(latency)
+
+    @contextmanager
+    def track(self):
+        """Count one call in flight and record its latency, or a penalty if it throttled or failed"""
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            if is_retryable(e):
+                with self._lock:
+                    self.failures += 1
+                self.observe(max(FAILURE_PENALTY, time.perf_counter() - start))
+            raise
+        else:
+            self.observe(time.perf_counter() - start)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def score(self):
+        """Expected wait: latency scaled by the calls already queued on this endpoint (lower is better)"""
+        with self._lock:
+            # Endpoints never measured go first, so each one gets a latency sample
+            return (self.latency or 0.0) * (self.in_flight + 1)
+
+    def healthy(self):
+        return self._client is not None and self.breaker.state != CircuitBreaker.OPEN
+
+    def stats(self):
+        with self._lock:
+            latency, in_flight, calls, failures = self.latency, self.in_flight, self.calls, self.failures
+        return {
+            'name': self.name,
+            'region': self.region,
+            'client': self.client_state,
+            'circuitBreaker': self.breaker.state,
+            # boto3 never exposes the event-stream Chat operation, so real clients report False
+            'streaming': hasattr(self._client, 'chat'),
+            'latencyMs': round(latency * 1000, 1) if latency is not None else None,
+            'inFlight': in_flight,
+            'calls': calls,
+            'failures': failures
+        }
+
+
+def parse_endpoints(spec, default_application_id=None):
+    """
+    Endpoints from Q_BUSINESS_ENDPOINTS
+
+    Args:
+        spec (str): Comma-separated 'region:applicationId' or 'name=region:applicationId'
+                    entries; empty means the single default application
+        default_application_id (str): Q_BUSINESS_APPLICATION_ID
+
+    Returns:
+        list: QBusinessEndpoint objects, in configured order (the first is the primary)
+
+    Raises:
+        ValueError: If an entry is malformed or a name is used twice
+    """
+    endpoints = []
+    for entry in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, target = entry.rpartition('=')
+        region, _, application_id = target.partition(':')
+        region, application_id, name = region.strip(), application_id.strip(), name.strip() or region.strip()
+        if not region or not application_id:
+            raise ValueError(f'Invalid Q Business endpoint {entry!r}, expected region:applicationId')
+        if CONVERSATION_SEPARATOR in name:
+            raise ValueError(f'Q Business endpoint name {name!r} cannot contain {CONVERSATION_SEPARATOR!r}')
+        if any(endpoint.name == name for endpoint in endpoints):
+            raise ValueError(f'Duplicate Q Business endpoint name {name!r}; use name=region:applicationId')
+        endpoints.append(QBusinessEndpoint(application_id, region=region, name=name))
+
+    if not endpoints:
+        endpoints.append(QBusinessEndpoint(default_application_id))
+    return endpoints
+
+
+class EndpointUnavailableError(CircuitOpenError):
+    """
+    Raised when no endpoint a call may use has a client yet
+
+    A CircuitOpenError, so callers answer it the same way: a degraded answer or
+    503 with Retry-After, instead of calling a missing client.
+    """
+
+
+class EndpointRouter:
+    def __init__(self, endpoints, explore_rate=EXPLORE_RATE, seed=None):
+        """
+        Picks the Q Business endpoint for each call
+
+        Args:
+            endpoints (list): QBusinessEndpoint objects; the first is the primary
+            explore_rate (float): Share of first turns routed to a random healthy endpoint
+            seed (int): Random seed for reproducible routing
+        """
+        if not endpoints:
+            raise ValueError('At least one Q Business endpoint is required')
+        self.endpoints = list(endpoints)
+        self.primary = self.endpoints[0]
+        self.explore_rate = explore_rate
+        self._by_name = {endpoint.name: endpoint for endpoint in self.endpoints}
+        self._rng = random.Random(seed)
+        self.failovers = 0
+
+    def candidates(self, conversation_id=None):
+        """
+        Endpoints to try for one call, best first
+
+        A follow-up turn only has the endpoint its conversation lives on. A first
+        turn gets the healthy endpoints by score, then the unhealthy ones, which
+        fail fast and let the caller fall back to a degraded answer. Endpoints
+        without a client are left out, so the list can be empty.
+
+        Returns:
+            list: (endpoint, upstream conversation id or None) pairs
+        """
+        if conversation_id:
+            endpoint, upstream_id = self.resolve(conversation_id)
+            return [(endpoint, upstream_id)] if endpoint.client is not None else []
+
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy()]
+        healthy.sort(key=QBusinessEndpoint.score)
+        if len(healthy) > 1 and self.explore_rate and self._rng.random() < self.explore_rate:
+            healthy.insert(0, healthy.pop(self._rng.randrange(1, len(healthy))))
+        others = [endpoint for endpoint in self.endpoints if endpoint not in healthy and endpoint.client is not None]
+        return [(endpoint, None) for endpoint in healthy + others]
+
+    def resolve(self, conversation_id):
+        """(endpoint, upstream conversation id) of a conversation id given to a client"""
+        if len(self.endpoints) > 1:
+            name, separator, upstream_id = conversation_id.partition(CONVERSATION_SEPARATOR)
+            if separator and name in self._by_name:
+                return self._by_name[name], upstream_id
+        # Single endpoint, or an id issued before routing was configured
+        return self.primary, conversation_id
+
+    def conversation_id(self, endpoint, upstream_id):
+        """Conversation id handed to clients: tagged with the endpoint when there is a choice"""
+        if not upstream_id or len(self.endpoints) == 1:
+            return upstream_id
+        return f'{endpoint.name}{CONVERSATION_SEPARATOR}{upstream_id}'
+
+    def record_failover(self, endpoint, error):
+        self.failovers += 1
+        ENDPOINT_FAILOVERS.labels(endpoint.name).inc()
+        logger.warning("Q Business endpoint %s failed (%s), trying the next one", endpoint.name, error)
+
+    def available(self):
+        """Whether any endpoint has a client (creating clients that are due a retry)"""
+        return any(endpoint.client is not None for endpoint in self.endpoints)
+
+    def retry_after(self, conversation_id=None):
+        """
+        Seconds until some endpoint has a client and its breaker lets a call through
+
+        Args:
+            conversation_id (str): Only consider this conversation's endpoint (follow-up turns)
+        """
+        endpoints = [self.resolve(conversation_id)[0]] if conversation_id else self.endpoints
+        now = time.monotonic()
+        return min(
+            max(endpoint.breaker.retry_after(), 0 if endpoint._client is not None else endpoint._retry_at - now)
+            for endpoint in endpoints
+        )
+
+    def init_clients(self):
+        """Create every endpoint's client, retrying with backoff until all are ready"""
+        delay = CLIENT_INIT_RETRY_DELAY
+        pending = list(self.endpoints)
+        while True:
+            pending = [endpoint for endpoint in pending if not endpoint.init_client()]
+            if not pending:
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, CLIENT_INIT_MAX_RETRY_DELAY)
+
+    def stats(self):
+        return {
+            'primary': self.primary.name,
+            'failovers': self.failovers,
+            'endpoints': [endpoint.stats() for endpoint in self.endpoints]
+        }
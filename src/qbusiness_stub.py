@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Amazon Q Business client
+Used by the offline load tests; mimics chat_sync and the streaming chat
+operation with configurable latency distributions and throttling, so caching,
+coalescing and serving-mode changes can be measured without AWS.
+"""
+
+import math
+import random
+import threading
+import time
+import uuid
+
+from botocore.exceptions import ClientError
+
+
+class LatencyModel:
+    def __init__(self, kind='lognormal', *params):
+        """
+        Upstream latency distribution, in milliseconds
+
+        Args:
+            kind (str): 'fixed' (ms), 'uniform' (low_ms, high_ms) or 'lognormal' (median_ms, sigma)
+            *params: Distribution parameters
+        """
+        defaults = {'fixed': (800.0,), 'uniform': (300.0, 1500.0), 'lognormal': (800.0, 0.5)}
+        if kind not in defaults:
+            raise ValueError(f'Unknown latency distribution: {kind}')
+        self.kind = kind
+        self.params = tuple(float(p) for p in params) or defaults[kind]
+
+    @classmethod
+    def parse(cls, spec):
+        """'lognormal:800:0.5' -> LatencyModel('lognormal', 800, 0.5)"""
+        kind, *params = spec.split(':')
+        return cls(kind, *params)
+
+    def sample(self, rng=random):
+        """One latency sample in seconds"""
+        if self.kind == 'fixed':
+            ms = self.params[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            ms = rng.lognormvariate(math.log(median), sigma)
+        return ms / 1000.0
+
+    def __str__(self):
+        return ':'.join([self.kind, *(f'{p:g}' for p in self.params)])
+
+
+class QBusinessStub:
+    def __init__(self, latency=None, throttle_rate=0.0, max_tps=0, answer_words=120,
+                 chunk_words=8, attributions=3, seed=None):
+        """
+        In-memory Q Business client
+
+        Args:
+            latency (LatencyModel): Time until the answer (or the first streamed chunk)
+            throttle_rate (float): Probability that a call fails with ThrottlingException
+            max_tps (float): Calls per second accepted before throttling (0 = unlimited)
+            answer_words (int): Words per answer
+            chunk_words (int): Words per streamed textEvent
+            attributions (int): sourceAttributions per answer
+            seed (int): Random seed for reproducible runs
+        """
+        self.latency = latency or LatencyModel()
+        self.throttle_rate = throttle_rate
+        self.max_tps = max_tps
+        self.answer_words = answer_words
+        self.chunk_words = chunk_words
+        self.attributions = attributions
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(max_tps)
+        self._refilled = time.monotonic()
+        self.calls = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        # Conversations started here; like Q Business, other ids are rejected
+        self.conversations = set()
+
+    def chat_sync(self, applicationId, userId, userMessage, conversationId=None, **kwargs):
+        self._admit('ChatSync', conversationId)
+        try:
+            time.sleep(self._sample_latency())
+            return {
+                'systemMessage': self._answer(userMessage),
+                'conversationId': conversationId or self._new_conversation(),
+                'systemMessageId': str(uuid.uuid4()),
+                'sourceAttributions': self._attributions()
+            }
+        finally:
+            self._done()
+
+    def chat(self, applicationId, userId, inputStream, conversationId=None, **kwargs):
+        self._admit('Chat', conversationId)
+        message = next((e['textEvent']['userMessage'] for e in inputStream if 'textEvent' in e), '')
+        return {'outputStream': self._output_stream(message, conversationId or self._new_conversation())}
+
+    def _new_conversation(self):
+        conversation_id = str(uuid.uuid4())
+        with self._lock:
+            self.conversations.add(conversation_id)
+        return conversation_id
+
+    def _output_stream(self, message, conversation_id):
+        try:
+            time.sleep(self._sample_latency())
+            words = self._answer(message).split(' ')
+            # Remaining chunks arrive at a steady pace after the first one
+            pace = 0.02
+            for start in range(0, len(words), self.chunk_words):
+                if start:
+                    time.sleep(pace)
+                yield {'textEvent': {
+                    'systemMessage': ' '.join(words[start:start + self.chunk_words]) + ' ',
+                    'conversationId': conversation_id
+                }}
+            yield {'metadataEvent': {
+                'conversationId': conversation_id,
+                'sourceAttributions': self._attributions()
+            }}
+        finally:
+            self._done()
+
+    def _admit(self, operation, conversation_id=None):
+        with self._lock:
+            self.calls += 1
+            if conversation_id and conversation_id not in self.conversations:
+                raise ClientError({
+                    'Error': {'Code': 'ResourceNotFoundException', 'Message': 'Conversation not found'},
+                    'ResponseMetadata': {'HTTPStatusCode': 404}
+                }, operation)
+            throttled = self._rng.random() < self.throttle_rate
+            if self.max_tps:
+                now = time.monotonic()
+                self._tokens = min(self.max_tps, self._tokens + (now - self._refilled) * self.max_tps)
+                self._refilled = now
+                if self._tokens < 1:
+                    throttled = True
+                else:
+                    self._tokens -= 1
+
+            if throttled:
+                self.throttled += 1
+                raise ClientError({
+                    'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'},
+                    'ResponseMetadata': {'HTTPStatusCode': 429}
+                }, operation)
+
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _sample_latency(self):
+        with self._lock:
+            return self.latency.sample(self._rng)
+
+    def _answer(self, message):
+        filler = ('Os parceiros do Data IESB colaboram em projetos de pesquisa e extensão '
+                  'com dados abertos do Distrito Federal').split(' ')
+        words = [filler[i % len(filler)] for i in range(self.answer_words)]
+        return f'Resposta para "{message}": ' + ' '.join(words)
+
+    def _attributions(self):
+        return [
+            {
+                'title': f'Documento {i + 1}',
+                'snippet': 'Trecho do documento indexado usado na resposta.',
+                'url': f'https://dataiesb.com/docs/{i + 1}',
+                'citationNumber': i + 1
+            }
+            for i in range(self.attributions)
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'latency': str(self.latency),
+                'calls': self.calls,
+                'throttled': self.throttled,
+                'peakInFlight': self.peak_in_flight
+            }
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Reports Catalog API - Serves search, filters and pagination over reports.json
+"""
+
+import os
+from flask import Flask, request
+from flask_cors import CORS
+import logging
+
+from api_response import json_response
+from metrics import instrument_flask
+from reports_catalog import ReportsCatalog, parse_search_params
+from structured_logging import configure_logging, log_flask
+
+# Configure logging: JSON lines written by a background thread
+configure_logging('reports-api')
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+CORS(app)  # Enable CORS for frontend integration
+log_flask(app)  # Request ids and one access line per request
+instrument_flask(app)  # Request metrics, served on GET /metrics
+
+# Indexed once at startup; re-indexed incrementally when reports.json changes
+catalog = ReportsCatalog()
+
+@app.route('/api/reports', methods=['GET'])
+def search_reports():
+    """
+    Search and list reports
+    Optional query parameters: q (words in titulo/descricao), autor,
+    deletado (false by default, true or all), limit and offset
+    """
+    try:
+        options = parse_search_params(request.args)
+    except ValueError as e:
+        return json_response({'error': 'Invalid request', 'message': str(e)}, 400)
+
+    return json_response(catalog.search(**options))
+
+@app.route('/api/reports/authors', methods=['GET'])
+def list_authors():
+    """Authors of active reports with their report counts"""
+    return json_response({'success': True, 'data': catalog.authors()})
+
+@app.route('/api/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    """Get one report by id"""
+    report = catalog.get(report_id)
+
+    if report is None:
+        return json_response({'error': 'Not found', 'message': f'Unknown report: {report_id}'}, 404)
+
+    return json_response({'success': True, 'data': report})
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return json_response({
+        'status': 'healthy',
+        'service': 'Reports Catalog API',
+        'catalog': catalog.stats()
+    })
+
+if __name__ == '__main__':
+    port = int(os.getenv('PORT', 5002))
+    debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+
+    print(f"Starting Reports Catalog API on port {port}")
+    app.run(host='0.0.0.0', port=port, debug=debug_mode)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Indexed catalog of the reports listed in reports.json
+Builds an inverted index over titulo/descricao with accent-insensitive
+Portuguese tokenization, plus author and deleted-status indexes, so searches
+and filters never scan the whole catalog. The file is re-read when it changes
+and only the reports that changed are re-indexed.
+"""
+
+import os
+import re
+import json
+import time
+import bisect
+import heapq
+import threading
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPORTS_PATH = os.getenv('REPORTS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports.json'))
+# Seconds between checks of the file's modification time
+RELOAD_INTERVAL = float(os.getenv('REPORTS_RELOAD_INTERVAL', 5))
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = int(os.getenv('REPORTS_MAX_PAGE_SIZE', 100))
+
+# Title matches rank above description matches
+FIELD_WEIGHTS = {'titulo': 3, 'descricao': 1}
+
+STOPWORDS = frozenset(
+    'a o as os ao aos um uma uns umas de da do das dos e em no na nos nas num numa '
+    'para pra por pelo pela pelos pelas com sem sobre entre que se ou seu sua seus suas'.split()
+)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Lowercase and strip accents: 'Relatório Econômico' -> 'relatorio economico'"""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    """Accent-insensitive tokens without Portuguese stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(fold(text)) if token not in STOPWORDS]
+
+
+def sort_key(report_id):
+    """Numeric ids in numeric order, anything else after them"""
+    return (0, int(report_id), '') if str(report_id).isdigit() else (1, 0, str(report_id))
+
+
+def parse_search_params(params):
+    """
+    Validate search query parameters
+
+    Returns:
+        dict: query, author, deleted (True/False/None for all), limit, offset
+
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    deleted = (params.get('deletado') or 'false').lower()
+    if deleted not in ('true', 'false', 'all'):
+        raise ValueError('deletado must be true, false or all')
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+        offset = int(params.get('offset') or 0)
+    except ValueError:
+        raise ValueError('limit and offset must be integers')
+    if limit < 1 or offset < 0:
+        raise ValueError('limit must be positive and offset not negative')
+
+    return {
+        'query': (params.get('q') or '').strip(),
+        'author': (params.get('autor') or '').strip(),
+        'deleted': None if deleted == 'all' else deleted == 'true',
+        'limit': min(limit, MAX_PAGE_SIZE),
+        'offset': offset
+    }
+
+
+class ReportsCatalog:
+    def __init__(self, path=REPORTS_PATH, reload_interval=RELOAD_INTERVAL):
+        """
+        Args:
+            path (str): reports.json location
+            reload_interval (float): Seconds between file change checks
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._reports = {}
+        self._postings = {}       # token -> {report id: weight}
+        self._vocabulary = []     # sorted tokens, for prefix matches
+        self._vocabulary_dirty = False
+        self._by_author = {}      # folded author -> set of ids
+        self._deleted = set()
+        self._order = {None: [], True: [], False: []}  # ids in catalog order, by deleted status
+        self._rank = {}           # id -> position in catalog order
+        self._signature = None
+        self._checked_at = 0.0
+        self.loads = 0
+        self.reindexed = 0
+
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Re-index the reports that changed since the last load, if the file changed"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return False
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                logger.error("Reports catalog unavailable: %s", e)
+                return False
+
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return False
+
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Keep serving the previous index while the file is being rewritten
+                logger.error("Error reading reports catalog: %s", e)
+                return False
+
+            self._apply({str(report_id): report for report_id, report in data.items()})
+            self._signature = signature
+            self.loads += 1
+            return True
+
+    def _apply(self, reports):
+        changed = 0
+        for report_id in list(self._reports):
+            if report_id not in reports:
+                self._unindex(report_id)
+                changed += 1
+
+        for report_id, report in reports.items():
+            current = self._reports.get(report_id)
+            if current is not None and current == report:
+                continue
+            if current is not None:
+                self._unindex(report_id)
+            self._index(report_id, report)
+            changed += 1
+
+        if changed:
+            order = sorted(self._reports, key=sort_key)
+            self._rank = {report_id: position for position, report_id in enumerate(order)}
+            self._order = {
+                None: order,
+                True: [report_id for report_id in order if report_id in self._deleted],
+                False: [report_id for report_id in order if report_id not in self._deleted]
+            }
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self._postings)
+                self._vocabulary_dirty = False
+        self.reindexed += changed
+        logger.info("Reports catalog loaded: %s reports, %s re-indexed", len(self._reports), changed)
+
+    def _index(self, report_id, report):
+        self._reports[report_id] = report
+
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(report.get(field)):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._vocabulary_dirty = True
+                postings[report_id] = postings.get(report_id, 0) + weight
+
+        self._by_author.setdefault(fold(report.get('autor')), set()).add(report_id)
+        if report.get('deletado'):
+            self._deleted.add(report_id)
+
+    def _unindex(self, report_id):
+        report = self._reports.pop(report_id)
+
+        for field in FIELD_WEIGHTS:
+            for token in tokenize(report.get(field)):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(report_id, None)
+                    if not postings:
+                        del self._postings[token]
+                        self._vocabulary_dirty = True
+
+        author = fold(report.get('autor'))
+        ids = self._by_author.get(author)
+        if ids is not None:
+            ids.discard(report_id)
+            if not ids:
+                del self._by_author[author]
+        self._deleted.discard(report_id)
+
+    def _prefix_postings(self, prefix):
+        """Merged postings of every token starting with prefix (search-as-you-type)"""
+        merged = {}
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            for report_id, weight in self._postings[token].items():
+                merged[report_id] = max(merged.get(report_id, 0), weight)
+        return merged
+
+    def _match(self, query):
+        """Scores of the reports containing every query token (the last one as a prefix)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+
+        postings = [self._postings.get(token, {}) for token in tokens[:-1]]
+        postings.append(self._prefix_postings(tokens[-1]))
+        # Intersect starting from the rarest token
+        postings.sort(key=len)
+
+        scores = dict(postings[0])
+        for other in postings[1:]:
+            scores = {report_id: score + other[report_id] for report_id, score in scores.items() if report_id in other}
+            if not scores:
+                break
+        return scores
+
+    def search(self, query='', author='', deleted=False, limit=DEFAULT_PAGE_SIZE, offset=0):
+        """
+        Search and filter the catalog
+
+        Args:
+            query (str): Words to find in titulo/descricao (all must match)
+            author (str): Exact author name, accent and case insensitive
+            deleted (bool): Only deleted (True), only active (False) or all (None)
+            limit (int): Page size
+            offset (int): Reports to skip
+
+        Returns:
+            dict: {'success': True, 'data': [...], 'total': int, 'nextOffset': int or None}
+        """
+        self.refresh()
+
+        with self._lock:
+            scores = self._match(query) if query else None
+            candidates = set(scores) if scores is not None else None
+
+            if author:
+                by_author = self._by_author.get(fold(author), set())
+                candidates = by_author if candidates is None else candidates & by_author
+
+            if candidates is None:
+                # Plain listing: the precomputed order for this status is paged directly
+                ordered = self._order[deleted]
+                total = len(ordered)
+                page = ordered[offset:offset + limit]
+            else:
+                if deleted is not None:
+                    deleted_ids = self._deleted
+                    candidates = {r for r in candidates if (r in deleted_ids) == deleted}
+                rank = self._rank
+                if scores is not None:
+                    key = lambda report_id: (-scores[report_id], rank[report_id])
+                else:
+                    key = rank.__getitem__
+                total = len(candidates)
+                # Only the requested page needs to be in order
+                if offset + limit < total:
+                    page = heapq.nsmallest(offset + limit, candidates, key=key)[offset:]
+                else:
+                    page = sorted(candidates, key=key)[offset:offset + limit]
+
+            data = [dict(self._reports[report_id], id=report_id) for report_id in page]
+
+        next_offset = offset + limit if offset + limit < total else None
+        return {'success': True, 'data': data, 'total': total, 'nextOffset': next_offset}
+
+    def get(self, report_id):
+        """Return one report by id, or None"""
+        self.refresh()
+        with self._lock:
+            report = self._reports.get(str(report_id))
+            return dict(report, id=str(report_id)) if report is not None else None
+
+    def authors(self, deleted=False):
+        """Authors with their report counts"""
+        self.refresh()
+        with self._lock:
+            authors = []
+            for ids in self._by_author.values():
+                if deleted is not None:
+                    ids = [report_id for report_id in ids if (report_id in self._deleted) == deleted]
+                if ids:
+                    authors.append({'autor': self._reports[next(iter(ids))].get('autor'), 'reports': len(ids)})
+        return sorted(authors, key=lambda a: fold(a['autor']))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'reports': len(self._reports),
+                'deleted': len(self._deleted),
+                'tokens': len(self._postings),
+                'authors': len(self._by_author),
+                'loads': self.loads,
+                'reindexed': self.reindexed
+            }
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Resilience helpers for upstream AWS calls
+Tuned botocore client configuration, jittered exponential retries for
+throttling/5xx/timeouts only, and a circuit breaker that fails fast while the
+upstream is unhealthy.
+"""
+
+import os
+import time
+import random
+import threading
+import logging
+
+from botocore.exceptions import (
+    ClientError, ConnectTimeoutError, ReadTimeoutError, EndpointConnectionError, ConnectionClosedError
+)
+
+logger = logging.getLogger(__name__)
+
+# Error codes worth retrying: throttling and server-side failures
+RETRYABLE_ERROR_CODES = {
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException',
+    'ServiceUnavailableException',
+    'ServiceUnavailable',
+    'InternalServerException',
+    'InternalServerError',
+    'InternalFailure',
+    'RequestTimeout',
+    'RequestTimeoutException'
+}
+
+NETWORK_ERRORS = (ConnectTimeoutError, ReadTimeoutError, EndpointConnectionError, ConnectionClosedError)
+
+
+def client_config(max_pool_connections=None):
+    """
+    botocore Config with explicit timeouts and a pool sized to our concurrency
+
+    botocore's own retries are disabled; RetryPolicy decides what to retry.
+    """
+    # Imported here: botocore.config pulls in most of botocore and is only needed once the client is built
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=float(os.getenv('QBUSINESS_CONNECT_TIMEOUT', 3)),
+        read_timeout=float(os.getenv('QBUSINESS_READ_TIMEOUT', 30)),
+        max_pool_connections=max_pool_connections or int(os.getenv('QBUSINESS_MAX_CONCURRENCY', 16)),
+        retries={'total_max_attempts': 1, 'mode': 'standard'}
+    )
+
+
+def error_code(error):
+    """AWS error code of an exception, or its class name for network errors"""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code', 'Unknown')
+    return type(error).__name__
+
+
+def is_retryable(error):
+    """True for throttling, 5xx responses and network timeouts"""
+    if isinstance(error, NETWORK_ERRORS):
+        return True
+    if isinstance(error, ClientError):
+        if error_code(error) in RETRYABLE_ERROR_CODES:
+            return True
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return status >= 500
+    return False
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, name='upstream'):
+        """
+        Args:
+            failure_threshold (int): Consecutive upstream failures that open the circuit
+            reset_timeout (float): Seconds to stay open before letting a trial call through
+            name (str): Label used in logs
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def retry_after(self):
+        """Seconds until the breaker lets a trial call through"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow_request(self):
+        """Whether a call may go upstream now (only one trial call while half-open)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker '%s' closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning("Circuit breaker '%s' opened after %s failures", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutiveFailures': self._failures,
+                'failureThreshold': self.failure_threshold,
+                'resetTimeoutSeconds': self.reset_timeout,
+                'timesOpened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=3, base_delay=0.2, max_delay=2.0):
+        """
+        Exponential backoff with full jitter, applied to retryable errors only
+
+        Args:
+            max_attempts (int): Total attempts including the first call
+            base_delay (float): Delay ceiling for the first retry, doubled each attempt
+            max_delay (float): Upper bound of any single delay
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn, breaker=None):
+        """
+        Call fn(), retrying retryable errors and reporting outcomes to the breaker
+
+        Raises:
+            CircuitOpenError: If the breaker refuses the call
+            Exception: The last error once retries are exhausted, or any non-retryable error
+        """
+        for attempt in range(self.max_attempts):
+            if breaker is not None and not breaker.allow_request():
+                raise CircuitOpenError(f"Circuit breaker '{breaker.name}' is open")
+
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered; a bad request says nothing about its health
+                    if breaker is not None:
+                        breaker.record_success()
+                    raise
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                self.retries += 1
+                delay = self.delay(attempt)
+                logger.warning("Retrying after %s (attempt %s, waiting %.2fs)", error_code(e), attempt + 1, delay)
+                time.sleep(delay)
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate question matching for cached Amazon Q Business answers
+Visitors ask the same thing in many ways ("quais são os parceiros?", "quem são
+os parceiros do projeto"), which an exact-match cache never sees as repeats.
+Questions are turned into hashed word and character n-gram vectors, weighted by
+how rare each feature is among the indexed questions (TF-IDF), and an incoming
+question is compared against every recently answered one with a single matrix
+product; the stored answer is reused above a similarity threshold.
+"""
+
+import re
+import time
+import zlib
+import threading
+import unicodedata
+
+# NumPy is imported on first use (load_numpy) to keep it off the startup path
+np = None
+
+# Words that change how a question is phrased but not what it asks about.
+# Verbs that say what the visitor wants to do (entrar, fazer, fica, existe) are
+# not here: they tell "como entro no laboratório?" from "onde fica o laboratório?"
+STOPWORDS = frozenset(
+    'a o as os ao aos um uma uns umas de da do das dos e em no na nos nas num numa '
+    'para pra por pelo pela pelos pelas com sem sobre entre que se ou seu sua seus suas '
+    'qual quais quem quando onde como quanto quantos quantas oque eh sao ser esta estao '
+    'estar foi foram tem ha me mim eu voce voces gostaria queria quero '
+    'poderia pode podem posso saber dizer informar informe diga fala fale falar mostre '
+    'mostrar ver encontro encontrar acho achar lista '
+    'listar favor ola oi bom dia boa tarde noite obrigado obrigada ai la isso esse essa '
+    'este area tudo bem'.split()
+)
+
+# Question words grouped by the kind of answer they ask for. They are not
+# features (quais/quem ask the same thing), but two questions that both have
+# one must ask for the same kind: "quem são os parceiros?" is never answered
+# with the number of partners.
+QUESTION_KINDS = {
+    'quem': 1, 'qual': 1, 'quais': 1,
+    'quanto': 2, 'quanta': 2, 'quantos': 2, 'quantas': 2,
+    'onde': 3,
+    'quando': 4,
+    'como': 5
+}
+
+# Names nearly every question mentions; with few indexed questions IDF cannot
+# learn that they say nothing about the topic (SEMANTIC_CACHE_IGNORE_WORDS)
+DEFAULT_IGNORE_WORDS = 'data iesb dataiesb projeto'
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Whole words carry most of the meaning; n-grams absorb plurals, typos and inflection.
+# Every word gets the same total n-gram weight, so 'pib' counts as much as 'relatorio'.
+WORD_WEIGHT = 1.0
+NGRAM_WEIGHT = 1.0
+NGRAM_SIZES = (3, 4)
+
+
+def load_numpy():
+    """Import NumPy once; returns the module, or None if it is not installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            np = False
+        else:
+            np = numpy
+    return np or None
+
+
+def fold(text):
+    """Lowercase and strip accents: 'Educação' -> 'educacao'"""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def content_words(text, ignore=frozenset()):
+    """Accent-insensitive words of a question without stopwords or ignored words"""
+    return [word for word in TOKEN_PATTERN.findall(fold(text)) if word not in STOPWORDS and word not in ignore]
+
+
+def question_kind(text):
+    """Kind of answer asked for by the first question word (QUESTION_KINDS), 0 if there is none"""
+    for word in TOKEN_PATTERN.findall(fold(text)):
+        kind = QUESTION_KINDS.get(word)
+        if kind:
+            return kind
+    return 0
+
+
+def features(text, ignore=frozenset()):
+    """
+    Weighted features of a question: each content word plus the character
+    n-grams of each word padded with boundary markers
+
+    Returns:
+        dict: feature -> weight
+    """
+    weights = {}
+    for word in content_words(text, ignore):
+        weights['w:' + word] = weights.get('w:' + word, 0.0) + WORD_WEIGHT
+        padded = f'<{word}>'
+        grams = [padded[start:start + size] for size in NGRAM_SIZES for start in range(len(padded) - size + 1)]
+        for gram in grams:
+            weights[gram] = weights.get(gram, 0.0) + NGRAM_WEIGHT / len(grams)
+    return weights
+
+
+class HashedVectorizer:
+    def __init__(self, dimensions=2048, ignore_words=DEFAULT_IGNORE_WORDS):
+        """
+        Maps questions to vectors of hashed feature counts
+
+        crc32 is used instead of hash() so vectors are the same in every process.
+
+        Args:
+            dimensions (int): Vector length; more dimensions mean fewer collisions
+            ignore_words (str): Space-separated words left out like stopwords
+        """
+        self.dimensions = dimensions
+        self.ignore = frozenset(content_words(ignore_words))
+
+    def transform(self, texts):
+        """
+        Args:
+            texts (list): Questions
+
+        Returns:
+            numpy.ndarray: float32 matrix with one row per question
+                           (all zeros when a question has no content words)
+        """
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in features(text, self.ignore).items():
+                digest = zlib.crc32(feature.encode('utf-8'))
+                # The top bit picks a sign so colliding features tend to cancel out
+                sign = -1.0 if digest & 0x80000000 else 1.0
+                matrix[row, digest % self.dimensions] += sign * weight
+        return matrix
+
+
+class SemanticMatch:
+    def __init__(self, answer, score, question):
+        self.answer = answer
+        self.score = score
+        self.question = question
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_size=512, ttl=600, threshold=0.8, dimensions=2048,
+                 ignore_words=DEFAULT_IGNORE_WORDS):
+        """
+        Similarity-based answer lookup over recently answered questions
+
+        Feature counts live in one matrix, allocated by warm_up() or the first
+        question, so a lookup is a couple
+        of matrix-vector products no matter how many questions are indexed.
+        Features are weighted by inverse document frequency over the indexed
+        questions at lookup time, so words every question shares ('relatório',
+        'projeto') count for little and topic words decide the match.
+        When the index is full, expired entries are replaced first and then
+        the least recently used one.
+
+        Args:
+            max_size (int): Maximum number of indexed questions; 0 disables the cache
+            ttl (float): Seconds an answer stays valid after being stored
+            threshold (float): Minimum cosine similarity for a match, between 0 and 1
+            dimensions (int): Hashed vector length
+            ignore_words (str): Space-separated words that never count towards a match
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.vectorizer = HashedVectorizer(dimensions, ignore_words)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._vectors = None
+        self._entries = []   # slot -> (scope, normalized question, question, answer)
+        self._slots = {}     # (scope, normalized question) -> slot
+        self._scopes = {}    # scope -> small int, so scopes can be compared in NumPy
+        self._used = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0 and np is not False
+
+    def warm_up(self):
+        """Import NumPy and allocate the index ahead of the first question; False if disabled"""
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            if self._vectors is None:
+                if load_numpy() is None:
+                    return False
+                size, dimensions = self.max_size, self.vectorizer.dimensions
+                self._squares = np.zeros((size, dimensions), dtype=np.float32)  # for the weighted row norms
+                self._df = np.zeros(dimensions, dtype=np.float32)               # indexed questions per feature
+                self._expires = np.zeros(size, dtype=np.float64)
+                self._last_used = np.zeros(size, dtype=np.float64)
+                self._scope_ids = np.full(size, -1, dtype=np.int32)
+                self._kinds = np.zeros(size, dtype=np.int8)
+                self._entries = [None] * size
+                self._vectors = np.zeros((size, dimensions), dtype=np.float32)
+        return True
+
+    @staticmethod
+    def _normalize(message):
+        return ' '.join(fold(message).split())
+
+    def lookup(self, message, scope=None):
+        """
+        Return the stored answer of the most similar question, if similar enough
+
+        Args:
+            message (str): Incoming first-turn question
+            scope (hashable): Answers are only shared within the same scope
+                              (application and user)
+
+        Returns:
+            SemanticMatch or None
+        """
+        return self.lookup_many([message], scope)[0]
+
+    def lookup_many(self, messages, scope=None):
+        """
+        Match several questions at once with a single matrix product
+
+        Returns:
+            list: SemanticMatch or None for each message
+        """
+        if not messages or not self.warm_up():
+            return [None] * len(messages)
+
+        queries = self.vectorizer.transform(messages)
+        kinds = np.array([question_kind(message) for message in messages], dtype=np.int8)
+        with self._lock:
+            scope_id = self._scopes.get(scope)
+            if scope_id is None or not self._used:
+                self.misses += len(messages)
+                return [None] * len(messages)
+
+            now = time.monotonic()
+            used = self._used
+            live = (self._scope_ids[:used] == scope_id) & (self._expires[:used] > now)
+
+            # Cosine similarity of the TF-IDF vectors without materializing the weighted matrix
+            idf = np.log((1.0 + used) / (1.0 + self._df)) + 1.0
+            idf_squared = idf * idf
+            query_norms = np.sqrt((queries * queries) @ idf_squared)
+            row_norms = np.sqrt(self._squares[:used] @ idf_squared)
+            scores = (queries * idf_squared) @ self._vectors[:used].T
+            denominator = np.outer(query_norms, row_norms)
+            np.divide(scores, denominator, out=scores, where=denominator > 0)
+            scores[:, ~live] = -1.0
+            scores[query_norms == 0] = -1.0
+            # "Quem ...?" never reuses the answer to "Quantos ...?"; questions without a question word match any
+            row_kinds = self._kinds[:used]
+            scores[(kinds[:, None] != row_kinds) & (kinds[:, None] > 0) & (row_kinds > 0)] = -1.0
+
+            best = scores.argmax(axis=1)
+            matches = []
+            for row, slot in enumerate(best):
+                score = float(scores[row, slot])
+                if score < self.threshold:
+                    self.misses += 1
+                    matches.append(None)
+                    continue
+                self.hits += 1
+                self._last_used[slot] = now
+                _, _, question, answer = self._entries[slot]
+                matches.append(SemanticMatch(answer, score, question))
+            return matches
+
+    def add(self, message, answer, scope=None):
+        """Index an answered question, replacing expired or least recently used entries when full"""
+        if not self.warm_up():
+            return
+
+        vector = self.vectorizer.transform([message])[0]
+        if not vector.any():
+            # Nothing but stopwords ("olá, tudo bem?") - too vague to match against
+            return
+
+        key = (scope, self._normalize(message))
+        with self._lock:
+            now = time.monotonic()
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._free_slot(now)
+                self._slots[key] = slot
+
+            scope_id = self._scopes.setdefault(scope, len(self._scopes))
+            self._df -= self._squares[slot] > 0
+            self._vectors[slot] = vector
+            self._squares[slot] = vector * vector
+            self._df += self._squares[slot] > 0
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._scope_ids[slot] = scope_id
+            self._kinds[slot] = question_kind(message)
+            self._entries[slot] = (scope, key[1], message, answer)
+
+    def _free_slot(self, now):
+        if self._used < self.max_size:
+            self._used += 1
+            return self._used - 1
+
+        expired = np.flatnonzero(self._expires <= now)
+        slot = int(expired[0]) if expired.size else int(self._last_used.argmin())
+        old_scope, old_key, _, _ = self._entries[slot]
+        del self._slots[(old_scope, old_key)]
+        self.evictions += 1
+        return slot
+
+    def clear(self):
+        with self._lock:
+            self._entries = [None] * len(self._entries)
+            self._slots.clear()
+            self._used = 0
+            if self._vectors is not None:
+                self._vectors.fill(0)
+                self._squares.fill(0)
+                self._df.fill(0)
+                self._scope_ids.fill(-1)
+                self._kinds.fill(0)
+
+    def stats(self):
+        """Counters reported on the health endpoint"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'allocated': self._vectors is not None,
+                'size': self._used,
+                'maxSize': self.max_size,
+                'ttlSeconds': self.ttl,
+                'threshold': self.threshold,
+                'dimensions': self.vectorizer.dimensions,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Non-blocking structured logging for the Flask apps, the ASGI chatbot and the team Lambda
+Request threads only put log records on a bounded queue; a background thread
+formats them and writes one compact JSON object per line. Messages use
+%-style arguments so the formatting also happens on that thread. Every line
+logged while serving a request carries its request id and route, and each
+request ends with an access line holding its status, latency and the error
+code of any failed AWS call.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import signal
+import logging
+import threading
+import contextvars
+
+# Minimum level written (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# 'json' lines, or 'text' for reading logs in a terminal
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+# Write from a background thread; false writes on the request thread (e.g. while debugging)
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'
+# Records waiting for the writer; beyond this new records are dropped instead of blocking requests
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+# Most records the writer formats and writes with a single write() call
+LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', 256))
+# One line per request with status, latency and upstream error code
+ACCESS_LOG = os.getenv('ACCESS_LOG', 'true').lower() == 'true'
+# Request header reused (and echoed back) as the request id, so ids match across services
+REQUEST_ID_HEADER = os.getenv('REQUEST_ID_HEADER', 'X-Request-Id')
+
+TEXT_FORMAT = '%(levelname)s:%(name)s:%(message)s'
+
+access_logger = logging.getLogger('access')
+
+_current = contextvars.ContextVar('request_log', default=None)
+
+# Attributes every LogRecord has; anything else was passed with extra= and is written as a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_configure_lock = threading.Lock()
+_configured = False
+_queue = None
+_log_writer = None
+_writer = None
+_dropped = 0
+
+
+class RequestLog:
+    __slots__ = ('request_id', 'method', 'route', 'started', 'upstream_error')
+
+    def __init__(self, method, route, request_id=None):
+        """
+        Logging context of one request
+
+        Args:
+            method (str): HTTP method
+            route (str): Route pattern or path, e.g. '/conversations/<conversation_id>'
+            request_id (str): Id sent by the caller or the platform (default: a new random id)
+        """
+        self.request_id = request_id or os.urandom(16).hex()
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.upstream_error = None
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, service=None):
+        """
+        One compact JSON object per record
+
+        Args:
+            service (str): Added to every line, to tell apps apart in shared log groups
+        """
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        line = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'requestId', None) is not None:
+            line['requestId'] = record.requestId
+            line['route'] = record.route
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                line[key] = value
+        if self.service:
+            line['service'] = self.service
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line['exception'] = record.exc_text
+        if record.stack_info:
+            line['stack'] = record.stack_info
+        return json.dumps(line, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.Handler):
+    """
+    Puts records on the writer's queue without formatting them and without ever blocking
+
+    Unlike logging.handlers.QueueHandler it does not format the message on the
+    calling thread, and takes no handler lock: the queue is thread-safe.
+    """
+
+    def __init__(self, records):
+        super().__init__()
+        self.records = records
+
+    def handle(self, record):
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record):
+        global _dropped
+        if record.exc_info:
+            # Tracebacks keep the request's frames alive until written; render them now (errors only)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+class LogWriter:
+    def __init__(self, records, handler, batch_size=LOG_BATCH_SIZE):
+        """
+        Background thread writing queued records
+
+        Records that queued up while the last batch was written are formatted and
+        written together with one write() and flush(), so a slow stream costs one
+        wait per batch rather than per line.
+
+        Args:
+            records (queue.Queue): Records put by _DeferredQueueHandler
+            handler (logging.StreamHandler): Supplies the stream, the formatter and error handling
+            batch_size (int): Most records per write
+        """
+        self.records = records
+        self.handler = handler
+        self.batch_size = batch_size
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Write what is queued and end the thread"""
+        self.records.put(_STOP, timeout=timeout)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            first = self.records.get()
+            with self.handler.lock:
+                batch = self._take([first])
+                self._write_batch(batch)
+            if _STOP in batch:
+                return
+
+    def write_pending(self):
+        """Write the queued records on the calling thread instead of waiting for the writer to wake up"""
+        with self.handler.lock:
+            batch = self._take([])
+            if _STOP in batch:
+                # Shutting down: leave the stop marker to the writer thread
+                batch.remove(_STOP)
+                self.records.task_done()
+                self.records.put_nowait(_STOP)
+            self._write_batch(batch)
+
+    def _take(self, batch):
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(self.records.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, batch):
+        """Format and write a batch with a single write(); called with the handler's lock held"""
+        handler = self.handler
+        lines = []
+        last = None
+        for record in batch:
+            if record is _STOP:
+                continue
+            last = record
+            try:
+                lines.append(handler.format(record))
+            except Exception:
+                handler.handleError(record)
+        if lines:
+            try:
+                handler.stream.write('\n'.join(lines) + handler.terminator)
+                handler.stream.flush()
+            except Exception:
+                handler.handleError(last)
+        for _ in batch:
+            self.records.task_done()
+
+
+_STOP = object()
+
+
+def _add_request_context(record):
+    """Logging filter, run on the thread that logs: tag the record with the current request"""
+    request_log = _current.get()
+    if request_log is not None:
+        record.requestId = request_log.request_id
+        record.route = request_log.route
+    return True
+
+
+def configure_logging(service=None, level=LOG_LEVEL, fmt=LOG_FORMAT, use_queue=LOG_ASYNC, stream=None):
+    """
+    Replace the root logger's handlers with the structured setup (once per process)
+
+    Args:
+        service (str): Name added to every JSON line
+        level (str): Minimum level written
+        fmt (str): 'json' or 'text'
+        use_queue (bool): Write from a background thread
+        stream: Where lines go (default: stderr)
+    """
+    global _configured, _queue, _log_writer, _writer
+
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.setLevel(level)
+
+        _writer = logging.StreamHandler(stream or sys.stderr)
+        _writer.setFormatter(JsonFormatter(service) if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+        if not use_queue:
+            _writer.addFilter(_add_request_context)
+            root.addHandler(_writer)
+            return
+
+        _queue = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _DeferredQueueHandler(_queue)
+        handler.addFilter(_add_request_context)
+        _log_writer = LogWriter(_queue, _writer)
+        _log_writer.start()
+        root.addHandler(handler)
+        atexit.register(shutdown)
+
+        # Without a handler SIGTERM (docker stop) kills the process before atexit runs.
+        # Servers that handle SIGTERM themselves (uvicorn, gunicorn) replace this one.
+        if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+def flush(timeout=2.0):
+    """
+    Write every queued record before returning
+
+    Called at the end of each Lambda invocation: a frozen execution environment
+    runs no threads, and may be discarded with records still in the queue.
+
+    Returns:
+        bool: False if records were still queued when the timeout expired
+    """
+    log_writer = _log_writer
+    if log_writer is None:
+        return True
+    log_writer.write_pending()
+    # The writer thread may still be writing a batch it took before
+    deadline = time.monotonic() + timeout
+    with _queue.all_tasks_done:
+        while _queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _queue.all_tasks_done.wait(remaining)
+    return True
+
+
+def shutdown(timeout=5.0):
+    """Write what is queued, stop the writer thread and log synchronously from then on"""
+    global _log_writer
+    log_writer = _log_writer
+    if log_writer is None:
+        return
+    flush(timeout)
+    _log_writer = None
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, _DeferredQueueHandler):
+            root.removeHandler(handler)
+    _writer.addFilter(_add_request_context)
+    root.addHandler(_writer)
+    try:
+        log_writer.stop(timeout)
+    except queue.Full:
+        pass
+
+
+def log_stats():
+    """Queue depth and records dropped because the queue was full"""
+    return {
+        'async': _log_writer is not None,
+        'queued': _queue.qsize() if _queue is not None else 0,
+        'dropped': _dropped
+    }
+
+
+def begin_request(method, route, request_id=None):
+    """
+    Start the logging context of a request
+
+    Returns:
+        tuple: (RequestLog, token for end_request())
+    """
+    request_log = RequestLog(method, route, request_id)
+    return request_log, _current.set(request_log)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_request():
+    """The RequestLog of the request being served, or None"""
+    return _current.get()
+
+
+def note_upstream_error(code):
+    """Remember the error code of a failed AWS call for the request's access line"""
+    request_log = _current.get()
+    if request_log is not None:
+        request_log.upstream_error = code
+
+
+def log_access(status):
+    """Write the access line of the current request"""
+    request_log = _current.get()
+    if request_log is None or not ACCESS_LOG:
+        return
+    access_logger.info('%s %s %s', request_log.method, request_log.route, status, extra={
+        'method': request_log.method,
+        'status': status,
+        'latencyMs': round((time.perf_counter() - request_log.started) * 1000, 2),
+        'upstreamErrorCode': request_log.upstream_error
+    })
+
+
+def log_flask(app):
+    """
+    Give every request of a Flask app a request id (echoed in X-Request-Id) and an access line
+
+    Streaming responses are timed until their headers are sent.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _begin_request_log():
+        # The URL rule, not the raw path, so lines of one route group together
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        g.request_log = begin_request(request.method, route, request.headers.get(REQUEST_ID_HEADER))
+
+    @app.after_request
+    def _log_access(response):
+        started = g.get('request_log')
+        if started is not None:
+            response.headers[REQUEST_ID_HEADER] = started[0].request_id
+            log_access(response.status_code)
+        return response
+
+    @app.teardown_request
+    def _end_request_log(exc):
+        started = g.pop('request_log', None)
+        if started is not None:
+            end_request(started[1])
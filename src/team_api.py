@@ -3,61 +3,85 @@
 Team Data API - Serves team member data from DynamoDB
 """
 
+import os
 import json
 import boto3
-from flask import Flask, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
 from botocore.exceptions import ClientError
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from api_response import json_response
+from metrics import instrument_flask
+from profiling import profile_flask, span
+from structured_logging import configure_logging, log_flask, log_stats
+from team_data import (
+    TABLE_NAME, REGION, RosterSnapshot, encoded_snapshot, fetch_members_page,
+    group_members, iter_team_members, parse_page_params
+)
+
+# Configure logging: JSON lines written by a background thread
+configure_logging('team-api')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend integration
+CORS(app, expose_headers=['ETag', 'X-Request-Id'])  # Enable CORS for frontend integration
+log_flask(app)  # Request ids and one access line per request
+instrument_flask(app)  # Request metrics, served on GET /metrics
+profile_flask(app)  # Server-Timing spans and cProfile dumps, when REQUEST_PROFILING=true
+
+# Browser/CDN caching of /api/team responses
+CLIENT_MAX_AGE = int(os.getenv('TEAM_CLIENT_MAX_AGE', 60))
+CLIENT_STALE_WHILE_REVALIDATE = int(os.getenv('TEAM_CLIENT_STALE_WHILE_REVALIDATE', 300))
 
 class TeamDataAPI:
     def __init__(self):
         """Initialize DynamoDB client"""
         try:
-            self.dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-            self.table = self.dynamodb.Table('DataIESB-TeamMembers')
+            self.dynamodb = boto3.resource('dynamodb', region_name=REGION)
+            self.table = self.dynamodb.Table(TABLE_NAME)
             logger.info("DynamoDB client initialized successfully")
         except Exception as e:
-            logger.error(f"Error initializing DynamoDB: {str(e)}")
+            logger.error("Error initializing DynamoDB: %s", e)
             self.table = None
 
+        # Processed roster served from memory; DynamoDB is only read on refresh
+        self.roster = RosterSnapshot(self.get_team_members)
+
     def get_team_members(self):
         """Get all team members from DynamoDB"""
         if not self.table:
             return {'error': 'Database not available'}
         
         try:
-            response = self.table.scan()
-            items = response.get('Items', [])
+            # Paginated (optionally parallel segmented) scan, normalized as pages arrive
+            processed_items = list(iter_team_members(self.table))
             
-            # Process items to ensure consistent structure
-            processed_items = []
-            for item in items:
-                processed_item = {
-                    'id': item.get('email', ''),
-                    'name': item.get('name', ''),
-                    'email': item.get('email', ''),
-                    'role': item.get('role', ''),
-                    'category': item.get('category', 'Outros'),
-                    'active': True
-                }
-                processed_items.append(processed_item)
-            
-            logger.info(f"Retrieved {len(processed_items)} team members")
+            logger.info("Retrieved %s team members", len(processed_items))
             return {'success': True, 'data': processed_items}
             
         except ClientError as e:
-            logger.error(f"DynamoDB error: {str(e)}")
+            logger.error("DynamoDB error: %s", e)
+            return {'error': 'Database error', 'message': str(e)}
+        except Exception as e:
+            logger.error("Unexpected error: %s", e)
+            return {'error': 'Server error', 'message': str(e)}
+
+    def get_team_page(self, category=None, limit=None, cursor=None):
+        """Get one page of team members, optionally limited to a category"""
+        if not self.table:
+            return {'error': 'Database not available'}
+        
+        try:
+            result = fetch_members_page(self.table, category=category, limit=limit, cursor=cursor)
+            logger.info("Retrieved %s team members (category=%s)", len(result['data']), category)
+            return result
+            
+        except ClientError as e:
+            logger.error("DynamoDB error: %s", e)
             return {'error': 'Database error', 'message': str(e)}
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error("Unexpected error: %s", e)
             return {'error': 'Server error', 'message': str(e)}
 
 # Initialize API
@@ -65,24 +89,62 @@ team_api = TeamDataAPI()
 
 @app.route('/api/team', methods=['GET'])
 def get_team():
-    """API endpoint to get team members"""
-    result = team_api.get_team_members()
+    """
+    API endpoint to get team members
+    Optional query parameters: category, limit, cursor (from nextCursor) and group=true
+    """
+    try:
+        with span('parse'):
+            options = parse_page_params(request.args)
+    except ValueError as e:
+        return json_response({'error': 'Invalid request', 'message': str(e)}, 400)
+    
+    group = options.pop('group')
+    
+    # Filtered or paginated reads go to DynamoDB (Query per category)
+    if any(options.values()):
+        result = team_api.get_team_page(**options)
+        if 'error' in result:
+            return json_response(result, 500)
+        if group:
+            result['data'] = group_members(result['data'])
+        return json_response(result)
+    
+    snapshot, error = team_api.roster.get()
+    
+    if error:
+        return json_response(error, 500)
+    
+    if group:
+        return json_response({'success': True, 'data': group_members(snapshot.result['data'])})
+    
+    body, encoding, etag = encoded_snapshot(snapshot, request.headers.get('Accept-Encoding'))
     
-    if 'error' in result:
-        return jsonify(result), 500
+    # Unchanged roster: no body, the browser reuses its copy
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
     
-    return jsonify(result)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = (
+        f'public, max-age={CLIENT_MAX_AGE}, stale-while-revalidate={CLIENT_STALE_WHILE_REVALIDATE}'
+    )
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         'status': 'healthy',
-        'service': 'Team Data API'
+        'service': 'Team Data API',
+        'logging': log_stats()
     })
 
 if __name__ == '__main__':
-    import os
     port = int(os.getenv('PORT', 5001))
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
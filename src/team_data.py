@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Team data access shared by the Flask Team Data API and the team Lambda
+Reads DataIESB-TeamMembers to completion and normalizes each member
+"""
+
+import os
+import json
+import time
+import gzip
+import base64
+import queue
+import hashlib
+import threading
+import logging
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from api_response import accepted_encodings, dumps
+from metrics import track_upstream
+from profiling import span
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = 'DataIESB-TeamMembers'
+REGION = 'us-east-1'
+
+# Parallel segmented scan settings (1 segment = plain sequential scan)
+SCAN_SEGMENTS = int(os.getenv('TEAM_SCAN_SEGMENTS', 1))
+SCAN_WORKERS = int(os.getenv('TEAM_SCAN_WORKERS', 0)) or None
+
+# Roster snapshot: served as-is for TEAM_CACHE_TTL seconds, then refreshed in the
+# background while the stale copy keeps being served for up to TEAM_CACHE_STALE_TTL
+CACHE_TTL = float(os.getenv('TEAM_CACHE_TTL', 300))
+CACHE_STALE_TTL = float(os.getenv('TEAM_CACHE_STALE_TTL', 3600))
+
+# Only the attributes normalize_member reads are fetched (name and role are
+# DynamoDB reserved words, hence the placeholders)
+MEMBER_PROJECTION = {
+    'ProjectionExpression': '#email, #name, #role, #category',
+    'ExpressionAttributeNames': {
+        '#email': 'email',
+        '#name': 'name',
+        '#role': 'role',
+        '#category': 'category'
+    }
+}
+
+# Global secondary index (partition key: category) used for per-category queries;
+# it must project the MEMBER_PROJECTION attributes (README, "Team Data Lambda").
+# Empty, or an index the table does not have, filters a scan instead
+CATEGORY_INDEX = os.getenv('TEAM_CATEGORY_INDEX', 'category-index')
+MAX_PAGE_SIZE = int(os.getenv('TEAM_MAX_PAGE_SIZE', 500))
+
+# Compressed responses for clients that accept them; tiny bodies are sent as-is
+COMPRESSION_ENABLED = os.getenv('TEAM_RESPONSE_COMPRESSION', 'true').lower() == 'true'
+COMPRESSION_MIN_BYTES = int(os.getenv('TEAM_COMPRESSION_MIN_BYTES', 1024))
+
+
+def normalize_member(item):
+    """Map a DynamoDB item to the member structure served to the frontend"""
+    return {
+        'id': item.get('email', ''),
+        'name': item.get('name', ''),
+        'email': item.get('email', ''),
+        'role': item.get('role', ''),
+        'category': item.get('category', 'Outros'),
+        'active': True
+    }
+
+
+# Fields normalize_member derives rather than reads, so they are never stored
+DERIVED_FIELDS = ('id', 'active')
+
+
+def member_item(record):
+    """
+    Inverse of normalize_member: the DynamoDB item for a member record
+    (from an import file or an API response)
+
+    Derived fields are dropped, empty values are left out and the category
+    defaults to 'Outros' just as normalize_member does when reading it back.
+
+    Raises:
+        ValueError: If the record has no usable email (the table's key)
+    """
+    email = str(record.get('email') or '').strip()
+    if '@' not in email:
+        raise ValueError(f"invalid email: {record.get('email')!r}")
+
+    item = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in record.items()
+        if key not in DERIVED_FIELDS and value not in (None, '')
+    }
+    item['email'] = email
+    item['name'] = str(record.get('name') or '').strip()
+    item['role'] = str(record.get('role') or '').strip()
+    item['category'] = str(record.get('category') or '').strip() or 'Outros'
+    return {key: value for key, value in item.items() if value != ''}
+
+
+def scan_pages(table, **scan_kwargs):
+    """
+    Yield every page of a scan, following LastEvaluatedKey until the table is exhausted
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        **scan_kwargs: Extra scan parameters (Segment, TotalSegments, ...)
+    """
+    while True:
+        with track_upstream('dynamodb', 'scan'):
+            response = table.scan(**scan_kwargs)
+        yield response.get('Items', [])
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        scan_kwargs['ExclusiveStartKey'] = last_key
+
+
+def scan_items(table, total_segments=SCAN_SEGMENTS, max_workers=SCAN_WORKERS, **scan_kwargs):
+    """Yield every item in the table (arguments as for scan_all_pages)"""
+    for page in scan_all_pages(table, total_segments, max_workers, **scan_kwargs):
+        yield from page
+
+
+def scan_all_pages(table, total_segments=SCAN_SEGMENTS, max_workers=SCAN_WORKERS, **scan_kwargs):
+    """
+    Yield every page of items in the table
+
+    With more than one segment the table is read as a parallel segmented scan:
+    each segment is paginated on its own worker thread and pages are yielded as
+    soon as any of them arrives, so the caller never waits for the whole table.
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        total_segments (int): Number of scan segments (TotalSegments)
+        max_workers (int): Worker threads; defaults to one per segment
+        **scan_kwargs: Extra scan parameters forwarded to every page request
+    """
+    if total_segments <= 1:
+        yield from scan_pages(table, **scan_kwargs)
+        return
+
+    pages = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def read_segment(segment):
+        try:
+            for page in scan_pages(table, Segment=segment, TotalSegments=total_segments, **scan_kwargs):
+                if stop.is_set():
+                    break
+                pages.put(page)
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(done)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or total_segments, thread_name_prefix='team-scan')
+    try:
+        for segment in range(total_segments):
+            # Run in a copy of the caller's context so page reads count towards its request profile
+            executor.submit(contextvars.copy_context().run, read_segment, segment)
+
+        remaining = total_segments
+        while remaining:
+            page = pages.get()
+            if page is done:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        # Lets the workers finish early if the caller stops iterating or a segment failed
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+def iter_team_members(table, **scan_options):
+    """Stream normalized team members straight from the scan"""
+    for page in scan_all_pages(table, **MEMBER_PROJECTION, **scan_options):
+        # One span per page: a span per member would cost more than the normalizing
+        with span('normalize'):
+            members = [normalize_member(item) for item in page]
+        yield from members
+
+
+def group_members(members):
+    """Group members by category, in first-seen order (same shape as the frontend's groupByCategory)"""
+    grouped = {}
+    for member in members:
+        grouped.setdefault(member['category'] or 'Outros', []).append(member)
+    return grouped
+
+
+def encode_cursor(last_evaluated_key):
+    """Opaque pagination cursor for a LastEvaluatedKey"""
+    raw = json.dumps(last_evaluated_key, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Turn a cursor back into an ExclusiveStartKey, raising ValueError if it was tampered with"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, dict) or not all(isinstance(v, str) for v in key.values()):
+        raise ValueError('Invalid cursor')
+    return key
+
+
+def parse_page_params(params):
+    """
+    Validate the category/limit/cursor/group query parameters
+
+    Returns:
+        dict: Keyword arguments for fetch_members_page plus 'group' (bool)
+
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    options = {
+        'category': params.get('category') or None,
+        'limit': None,
+        'cursor': params.get('cursor') or None,
+        'group': str(params.get('group', '')).lower() in ('1', 'true', 'yes')
+    }
+
+    if params.get('limit'):
+        try:
+            options['limit'] = int(params['limit'])
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if not 1 <= options['limit'] <= MAX_PAGE_SIZE:
+            raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    if options['cursor']:
+        decode_cursor(options['cursor'])
+
+    return options
+
+
+# False once a query found CATEGORY_INDEX missing, so later requests scan right away
+_category_index_found = bool(CATEGORY_INDEX)
+
+
+def fetch_members_page(table, category=None, limit=None, cursor=None):
+    """
+    Read one page of normalized members
+
+    A category is served by a Query on CATEGORY_INDEX, so only that section of
+    the roster is read; without one the table is scanned. When the index is not
+    configured or does not exist, the scan is filtered on the category instead,
+    which reads the whole table. DynamoDB's Limit caps items evaluated per
+    request, so requests repeat until the page is full.
+
+    Returns:
+        dict: {'success': True, 'data': [...], 'nextCursor': str or None}
+    """
+    request = dict(MEMBER_PROJECTION)
+    if cursor:
+        request['ExclusiveStartKey'] = decode_cursor(cursor)
+
+    if not category:
+        return _read_members_page(table.scan, 'scan', request, limit)
+
+    request['ExpressionAttributeValues'] = {':category': category}
+    if _category_index_found:
+        from botocore.exceptions import ClientError
+
+        try:
+            return _read_members_page(table.query, 'query', dict(
+                request, IndexName=CATEGORY_INDEX, KeyConditionExpression='#category = :category'
+            ), limit)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            if error.get('Code') != 'ValidationException' or 'index' not in error.get('Message', ''):
+                raise
+            _mark_category_index_missing(error.get('Message'))
+
+    return _read_members_page(table.scan, 'scan', dict(request, FilterExpression='#category = :category'), limit,
+                              filtered=True)
+
+
+def _mark_category_index_missing(message):
+    global _category_index_found
+    if _category_index_found:
+        _category_index_found = False
+        logger.warning("Category index %s unavailable (%s); filtering scans instead", CATEGORY_INDEX, message)
+
+
+def _read_members_page(read, operation, request, limit, filtered=False):
+    """
+    Repeat a scan or query until limit members are read or the results end
+
+    Limit counts the items a filter drops too, so filtered scans read whole
+    pages instead and the cursor points at the last member kept.
+    """
+    members = []
+    while True:
+        if limit and not filtered:
+            request['Limit'] = limit - len(members)
+        with track_upstream('dynamodb', operation):
+            response = read(**request)
+        with span('normalize'):
+            members.extend(normalize_member(item) for item in response.get('Items', []))
+
+        last_key = response.get('LastEvaluatedKey')
+        if limit and len(members) > limit:
+            members = members[:limit]
+            last_key = {'email': members[-1]['email']}
+        if not last_key or (limit and len(members) >= limit):
+            break
+        request['ExclusiveStartKey'] = last_key
+
+    return {
+        'success': True,
+        'data': members,
+        'nextCursor': encode_cursor(last_key) if last_key else None
+    }
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best response coding the client accepts: br, then gzip, else None"""
+    if not COMPRESSION_ENABLED:
+        return None
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=6)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+Snapshot = namedtuple('Snapshot', ['body', 'etag', 'created_at', 'variants', 'result'])
+
+
+def encoded_snapshot(snapshot, accept_encoding):
+    """
+    Body, coding and ETag of a snapshot for a client's Accept-Encoding
+
+    Compressed variants are built once per snapshot and reused by later requests.
+    Each coding gets its own strong ETag since the bytes differ.
+
+    Returns:
+        tuple: (body bytes, content coding or None, etag)
+    """
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None or len(snapshot.body) < COMPRESSION_MIN_BYTES:
+        return snapshot.body, None, snapshot.etag
+
+    body = snapshot.variants.get(encoding)
+    if body is None:
+        with span('compress'):
+            body = snapshot.variants[encoding] = compress(snapshot.body, encoding)
+    return body, encoding, f'{snapshot.etag}-{encoding}'
+
+
+class RosterSnapshot:
+    def __init__(self, loader, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL):
+        """
+        Serialized team roster kept in memory between requests
+
+        Args:
+            loader: Callable returning the API result dict ({'success': True, 'data': [...]}
+                    or an error dict); error results are returned but never stored
+            ttl (float): Seconds a snapshot is fresh
+            stale_ttl (float): Seconds a stale snapshot may still be served while a
+                               background refresh runs; older snapshots reload inline
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self.loads = 0
+
+    def get(self):
+        """
+        Return the current roster snapshot
+
+        Returns:
+            tuple: (Snapshot, None) on success or (None, error_result) if the
+                   roster could not be loaded and no usable snapshot exists
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            age = time.monotonic() - snapshot.created_at
+            if age < self.ttl:
+                return snapshot, None
+            if age < self.stale_ttl:
+                self._refresh_in_background()
+                return snapshot, None
+
+        with self._lock:
+            # Another request may have reloaded while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.created_at < self.ttl:
+                return snapshot, None
+            return self._reload()
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _reload(self):
+        result = self.loader()
+        self.loads += 1
+        if 'error' in result:
+            return None, result
+
+        with span('serialize'):
+            body = dumps(result)
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        self._snapshot = Snapshot(body, etag, time.monotonic(), {}, result)
+        return self._snapshot, None
+
+    def _refresh_in_background(self):
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                with self._lock:
+                    _, error = self._reload()
+                if error:
+                    logger.error("Background roster refresh failed: %s", error.get('message', error['error']))
+            except Exception as e:
+                logger.error("Background roster refresh failed: %s", e)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name='roster-refresh', daemon=True).start()
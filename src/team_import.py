@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Bulk import of team members into DataIESB-TeamMembers
+Reads members from CSV or JSON, maps them with team_data.member_item (the
+inverse of the mapping the Team Data API serves), skips members whose stored
+item would not change, and writes the rest in 25-item batches from parallel
+workers, paced to the table's write capacity. Unprocessed items are retried
+with jittered exponential backoff.
+
+Usage:
+    python3 team_import.py members.csv
+    python3 team_import.py equipe.json --workers 8 --dry-run
+    python3 team_import.py members.csv --max-wcu 50 --output import-report.json
+
+CSV files need a header row; email, name, role and category columns are
+required (nome, cargo and categoria are accepted too) and any other column is
+stored as an extra attribute. JSON files may hold a list of members, an API
+response ({"data": [...]}) or members grouped by category.
+"""
+
+import os
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+import threading
+import logging
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import track_upstream
+from resilience import RetryPolicy
+from team_data import TABLE_NAME, REGION, member_item, scan_items
+
+logger = logging.getLogger(__name__)
+
+IMPORT_WORKERS = int(os.getenv('TEAM_IMPORT_WORKERS', 4))
+# Segments for the scan that finds unchanged members
+IMPORT_SCAN_SEGMENTS = int(os.getenv('TEAM_IMPORT_SCAN_SEGMENTS', 4))
+# Share of the provisioned write capacity an import may use, leaving the rest to the site
+CAPACITY_FRACTION = float(os.getenv('TEAM_IMPORT_CAPACITY_FRACTION', 0.8))
+# BatchWriteItem accepts at most 25 requests
+BATCH_SIZE = 25
+# Rounds of UnprocessedItems retries before a batch is reported as failed
+MAX_UNPROCESSED_ROUNDS = 10
+
+COLUMN_ALIASES = {
+    'e-mail': 'email',
+    'nome': 'name',
+    'cargo': 'role',
+    'funcao': 'role',
+    'função': 'role',
+    'categoria': 'category'
+}
+
+
+def column_name(header):
+    name = header.strip().lower()
+    return COLUMN_ALIASES.get(name, name)
+
+
+def read_records(path):
+    """
+    Read member records from a CSV or JSON file
+
+    Returns:
+        list: (source reference, record dict) pairs, in file order
+    """
+    if path.lower().endswith('.csv'):
+        # utf-8-sig drops the byte order mark spreadsheet exports start with
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            return [
+                (f'line {reader.line_num}', {column_name(k): v for k, v in row.items() if k is not None})
+                for row in reader
+            ]
+
+    with open(path, encoding='utf-8') as f:
+        # boto3 refuses float attributes, which would fail the record's whole batch
+        data = json.load(f, parse_float=Decimal)
+
+    if isinstance(data, dict) and 'data' in data:
+        data = data['data']
+    if isinstance(data, dict):
+        # Grouped by category, as served with group=true
+        records = [dict(member, category=member.get('category') or category)
+                   for category, members in data.items() for member in members]
+    else:
+        records = data
+    return [(f'#{index + 1}', record) for index, record in enumerate(records)]
+
+
+def prepare_items(records):
+    """
+    Map records to table items, keeping the last record for each email
+
+    Returns:
+        tuple: (items by email, invalid records, duplicate count)
+    """
+    items = {}
+    invalid = []
+    duplicates = 0
+    for source, record in records:
+        try:
+            item = member_item(record)
+        except (ValueError, AttributeError) as e:
+            invalid.append({'source': source, 'error': str(e)})
+            continue
+        if item['email'] in items:
+            duplicates += 1
+        items[item['email']] = item
+    return items, invalid, duplicates
+
+
+def item_write_units(item):
+    """Write capacity units a put consumes: one per started KB of item"""
+    return max(1, math.ceil(len(json.dumps(item, default=str).encode('utf-8')) / 1024))
+
+
+class CapacityLimiter:
+    def __init__(self, units_per_second):
+        """
+        Token bucket shared by the import workers
+
+        Args:
+            units_per_second (float): Write capacity units allowed per second (0 = unlimited)
+        """
+        self.rate = units_per_second
+        # Starts empty: the table's burst allowance is left to the site's own traffic
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units):
+        """Block until units of write capacity are available"""
+        if not self.rate:
+            return
+        # A batch larger than one second of capacity still goes through, just alone
+        units = min(units, self.rate)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= units:
+                    self.tokens -= units
+                    return
+                wait = (units - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def table_write_capacity(table):
+    """Provisioned write capacity units of the table, or 0 for on-demand tables"""
+    try:
+        description = table.meta.client.describe_table(TableName=table.name)['Table']
+    except Exception as e:
+        logger.warning("Could not read the table's write capacity, relying on backoff only: %s", e)
+        return 0
+    return int(description.get('ProvisionedThroughput', {}).get('WriteCapacityUnits') or 0)
+
+
+def find_changes(table, items, replace=False, scan_segments=IMPORT_SCAN_SEGMENTS):
+    """
+    Compare the import with what is stored
+
+    Stored attributes the import does not mention are kept unless replace is
+    set, since a put overwrites the whole item.
+
+    Returns:
+        tuple: (items to write, unchanged count)
+    """
+    existing = {
+        item.get('email'): item
+        for item in scan_items(table, total_segments=scan_segments)
+    }
+
+    changed = []
+    unchanged = 0
+    for email, item in items.items():
+        stored = existing.get(email)
+        target = item if replace or stored is None else {**stored, **item}
+        if target == stored:
+            unchanged += 1
+        else:
+            changed.append(target)
+    return changed, unchanged
+
+
+class BatchImporter:
+    def __init__(self, table, workers=IMPORT_WORKERS, limiter=None, retry_policy=None):
+        """
+        Writes items with BatchWriteItem from a pool of worker threads
+
+        boto3's batch_writer re-sends unprocessed items on its next flush
+        without waiting; here each batch backs off before retrying them so a
+        throttled table gets time to recover.
+
+        Args:
+            table: boto3 DynamoDB Table resource
+            workers (int): Batches written at once
+            limiter (CapacityLimiter): Write capacity pacing shared by the workers
+            retry_policy (RetryPolicy): Backoff for throttling errors and unprocessed items
+        """
+        self.table = table
+        self.workers = workers
+        self.limiter = limiter or CapacityLimiter(0)
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=8, base_delay=0.05, max_delay=5)
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.written = 0
+        self.unprocessed_retries = 0
+        self.write_units = 0
+
+    def write_batch(self, items):
+        """Write up to 25 items, retrying the unprocessed ones with backoff"""
+        client = self.table.meta.client
+        requests = [{'PutRequest': {'Item': item}} for item in items]
+
+        for round_number in range(MAX_UNPROCESSED_ROUNDS):
+            units = sum(item_write_units(request['PutRequest']['Item']) for request in requests)
+            self.limiter.acquire(units)
+
+            def send():
+                with track_upstream('dynamodb', 'batch_write_item'):
+                    return client.batch_write_item(RequestItems={self.table.name: requests})
+
+            response = self.retry_policy.call(send)
+            unprocessed = response.get('UnprocessedItems', {}).get(self.table.name, [])
+
+            with self._lock:
+                self.batches += 1
+                self.written += len(requests) - len(unprocessed)
+                self.write_units += units
+                self.unprocessed_retries += len(unprocessed)
+
+            if not unprocessed:
+                return
+            requests = unprocessed
+            time.sleep(self.retry_policy.delay(round_number))
+
+        raise RuntimeError(f'{len(requests)} items still unprocessed after {MAX_UNPROCESSED_ROUNDS} attempts')
+
+    def write(self, items):
+        """
+        Write all items
+
+        Returns:
+            list: Emails of the items that could not be written
+        """
+        batches = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='team-import') as executor:
+            futures = {executor.submit(self.write_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    batch = futures[future]
+                    logger.error("Batch of %s members failed: %s", len(batch), e)
+                    failed.extend(item['email'] for item in batch)
+        return failed
+
+
+def run_import(table, path, workers=IMPORT_WORKERS, max_wcu=None, replace=False, dry_run=False,
+               scan_segments=IMPORT_SCAN_SEGMENTS):
+    """
+    Import a members file into the table
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        path (str): CSV or JSON file
+        workers (int): Parallel batch writers
+        max_wcu (float): Write capacity units per second to stay under; None reads the
+                         table's provisioned capacity (times CAPACITY_FRACTION), 0 = unlimited
+        replace (bool): Overwrite whole items instead of keeping attributes the file lacks
+        dry_run (bool): Compare only, write nothing
+        scan_segments (int): Segments for the scan of the stored members
+
+    Returns:
+        dict: Import report
+    """
+    start = time.perf_counter()
+    records = read_records(path)
+    items, invalid, duplicates = prepare_items(records)
+    changed, unchanged = find_changes(table, items, replace=replace, scan_segments=scan_segments)
+    compared = time.perf_counter()
+
+    if max_wcu is None:
+        max_wcu = table_write_capacity(table) * CAPACITY_FRACTION
+
+    importer = BatchImporter(table, workers=workers, limiter=CapacityLimiter(max_wcu))
+    failed = [] if dry_run else importer.write(changed)
+    elapsed = time.perf_counter() - start
+    write_seconds = time.perf_counter() - compared
+
+    return {
+        'source': path,
+        'records': len(records),
+        'members': len(items),
+        'invalid': len(invalid),
+        'invalidRecords': invalid[:20],
+        'duplicates': duplicates,
+        'unchanged': unchanged,
+        'toWrite': len(changed),
+        'written': importer.written,
+        'failed': len(failed),
+        'failedEmails': failed[:20],
+        'batches': importer.batches,
+        'unprocessedRetries': importer.unprocessed_retries,
+        'throttlingRetries': importer.retry_policy.retries,
+        'writeUnits': importer.write_units,
+        'maxWriteUnitsPerSecond': max_wcu or None,
+        'dryRun': dry_run,
+        'elapsedSeconds': round(elapsed, 3),
+        'writeSeconds': round(write_seconds, 3),
+        'itemsPerSecond': round(importer.written / write_seconds, 1) if importer.written and write_seconds else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f'Import team members into {TABLE_NAME}')
+    parser.add_argument('path', help='CSV or JSON file with the members')
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS, help='Parallel batch writers')
+    parser.add_argument('--max-wcu', type=float, help="Write units per second (default: provisioned capacity "
+                                                      f"x {CAPACITY_FRACTION}, unlimited on on-demand tables)")
+    parser.add_argument('--scan-segments', type=int, default=IMPORT_SCAN_SEGMENTS,
+                        help='Segments for the scan of the stored members')
+    parser.add_argument('--replace', action='store_true', help='Overwrite whole items (drops attributes the file lacks)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be written without writing')
+    parser.add_argument('--table', default=TABLE_NAME, help='Table name')
+    parser.add_argument('--region', default=os.getenv('AWS_REGION', REGION), help='AWS region')
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    import boto3
+    from botocore.config import Config
+
+    # One connection per writer and per scan segment
+    config = Config(max_pool_connections=max(10, args.workers + args.scan_segments))
+    table = boto3.resource('dynamodb', region_name=args.region, config=config).Table(args.table)
+
+    print(f"📥 Importing {args.path} into {args.table}{' (dry run)' if args.dry_run else ''}")
+    report = run_import(table, args.path, workers=args.workers, max_wcu=args.max_wcu,
+                        replace=args.replace, dry_run=args.dry_run, scan_segments=args.scan_segments)
+
+    print(f"   Records: {report['records']} ({report['members']} members, {report['duplicates']} duplicates, "
+          f"{report['invalid']} invalid)")
+    for entry in report['invalidRecords']:
+        print(f"   ⚠️  {entry['source']}: {entry['error']}")
+    print(f"   Unchanged: {report['unchanged']}, to write: {report['toWrite']}")
+    if not args.dry_run:
+        print(f"   Written: {report['written']} in {report['batches']} batches "
+              f"({report['unprocessedRetries']} unprocessed retries, {report['throttlingRetries']} throttled calls)")
+        print(f"   Throughput: {report['itemsPerSecond']} items/s, {report['writeUnits']} write units"
+              f" (limit {report['maxWriteUnitsPerSecond'] or 'none'}/s)")
+    print(f"   Elapsed: {report['elapsedSeconds']}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Report written to {args.output}")
+
+    if report['failed']:
+        print(f"❌ {report['failed']} members could not be written")
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Test script for the chat admission control (admission.py)
+Runs offline: token buckets, per-client limits, the in-flight cap with its
+bounded wait queue, and how clients are identified behind a proxy.
+"""
+
+import sys
+import time
+import threading
+
+import admission
+from admission import AdmissionController, AdmissionRejected, TokenBucket, client_key
+
+
+def rejection(call, *args):
+    """Reason and Retry-After of an AdmissionRejected raised by call, or None if it succeeded"""
+    try:
+        call(*args)
+    except AdmissionRejected as e:
+        return e.reason, e.retry_after
+    return None
+
+
+def test_bucket_refill():
+    """A bucket gives its burst at once, then refills at its rate; take(count) is all-or-nothing"""
+    print("\n🪣 Testing token bucket refill...")
+
+    bucket = TokenBucket(rate=20, capacity=3)
+    burst = [bucket.take() for _ in range(3)]
+    wait = bucket.take()
+
+    time.sleep(0.12)
+    refilled = bucket.take()
+    # Roughly 1.4 tokens left: asking for 3 takes none of them
+    partial = bucket.take(3)
+    tokens_after_partial = bucket.tokens
+
+    time.sleep(0.25)
+    capped = bucket.take(3)
+    over_capacity = bucket.take()
+
+    print(f"   burst {burst}, wait {wait:.3f}s, after 0.12s: {refilled}, "
+          f"3 at once: wait {partial:.3f}s with {tokens_after_partial:.2f} left")
+    if (burst == [0, 0, 0] and 0 < wait <= 0.05 and refilled == 0
+            and partial > 0 and tokens_after_partial >= 1 and capped == 0 and over_capacity > 0):
+        print("✅ Burst of 3, refilled at 20/s, never above capacity; a partial take charged nothing")
+        return True
+
+    print("❌ Token bucket did not refill as expected")
+    return False
+
+
+def test_client_isolation():
+    """One client exhausting its bucket does not limit another"""
+    print("\n👥 Testing per-client isolation...")
+
+    controller = AdmissionController(rate_per_minute=60, burst=2, max_in_flight=100, max_queue=0,
+                                     queue_timeout=0, max_clients=2)
+    for _ in range(2):
+        controller.admit('ip:10.0.0.1')
+        controller.release()
+    limited = rejection(controller.admit, 'ip:10.0.0.1')
+    other = rejection(controller.admit, 'ip:10.0.0.2')
+    controller.release()
+
+    # A cost the bucket cannot cover is refused without charging the rest
+    batch = rejection(controller.check_rate, 'ip:10.0.0.2', 5)
+    after_batch = rejection(controller.check_rate, 'ip:10.0.0.2', 1)
+
+    # Only max_clients buckets are kept: the least recently seen client is forgotten
+    controller.admit('ip:10.0.0.3')
+    controller.release()
+    stats = controller.stats()
+    forgotten = rejection(controller.admit, 'ip:10.0.0.1')
+    controller.release()
+
+    print(f"   first client: {limited}, second client: {other}, batch of 5: {batch}, then 1: {after_batch}")
+    print(f"   {stats['clients']} buckets kept, shed {stats['shed']}")
+    if (limited == ('rateLimited', 1) and other is None and batch and batch[0] == 'rateLimited'
+            and after_batch is None and stats['clients'] == 2 and forgotten is None
+            and stats['shed']['rateLimited'] == 2):
+        print("✅ Each client has its own bucket; the oldest bucket is dropped beyond max_clients")
+        return True
+
+    print("❌ Clients were not limited independently")
+    return False
+
+
+def test_concurrency_cap():
+    """Requests beyond max_in_flight wait in a bounded queue, are admitted on release or shed"""
+    print("\n🚦 Testing the in-flight cap and wait queue...")
+
+    controller = AdmissionController(rate_per_minute=0, max_in_flight=2, max_queue=1, queue_timeout=2)
+    controller.admit('a')
+    controller.admit('b')
+
+    outcome = {}
+
+    def waiter():
+        started = time.monotonic()
+        outcome['result'] = rejection(controller.admit, 'c')
+        outcome['waited'] = time.monotonic() - started
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    deadline = time.monotonic() + 1
+    while controller.stats()['waiting'] < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    # The queue holds one waiter: the next request is shed at once
+    queue_full = rejection(controller.admit, 'd')
+    waiting = controller.stats()['waiting']
+
+    time.sleep(0.1)
+    controller.release()
+    thread.join(2)
+
+    # Nobody releases now: a waiter gives up after queue_timeout
+    controller.queue_timeout = 0.1
+    started = time.monotonic()
+    timed_out = rejection(controller.admit, 'e')
+    timeout_wait = time.monotonic() - started
+
+    controller.release()
+    controller.release()
+    stats = controller.stats()
+
+    print(f"   queued request: {outcome.get('result')} after {outcome.get('waited', 0):.2f}s, "
+          f"queue full: {queue_full}, timed out: {timed_out} after {timeout_wait:.2f}s")
+    print(f"   {stats}")
+    if (waiting == 1 and queue_full == ('queueFull', 1) and outcome.get('result') is None
+            and 0.08 <= outcome['waited'] < 1 and timed_out == ('queueTimeout', 1) and 0.08 <= timeout_wait < 1
+            and stats['inFlight'] == 0 and stats['waiting'] == 0 and stats['admitted'] == 3
+            and stats['queued'] == 2 and stats['shed'] == {'rateLimited': 0, 'queueFull': 1, 'queueTimeout': 1}):
+        print("✅ 2 in flight, 1 waited for a release, 1 shed on a full queue, 1 shed after the timeout")
+        return True
+
+    print("❌ In-flight cap did not behave as expected")
+    return False
+
+
+def test_shed_refunds_token():
+    """A request shed for lack of a slot gives its token back, so the retry is not rate limited"""
+    print("\n↩️  Testing token refunds on shed requests...")
+
+    # One request per client per minute: a spent token would not come back during the test
+    controller = AdmissionController(rate_per_minute=1, burst=1, max_in_flight=1, max_queue=0,
+                                     queue_timeout=0.05)
+    controller.admit('a')
+    queue_full = rejection(controller.admit, 'b')
+    controller.max_queue = 1
+    timed_out = rejection(controller.admit, 'b')
+    controller.release()
+
+    retry = rejection(controller.admit, 'b')
+    controller.release()
+    # That token was spent on a served request: now the client is limited
+    spent = rejection(controller.admit, 'b')
+    stats = controller.stats()
+
+    print(f"   shed: {queue_full}, {timed_out}; retry after the release: {retry}, next request: {spent}")
+    if (queue_full == ('queueFull', 1) and timed_out == ('queueTimeout', 1) and retry is None
+            and spent is not None and spent[0] == 'rateLimited' and stats['admitted'] == 2
+            and stats['shed'] == {'rateLimited': 1, 'queueFull': 1, 'queueTimeout': 1}):
+        print("✅ Both shed requests were refunded; only the served one used the client's budget")
+        return True
+
+    print("❌ Shed requests used up the client's rate limit")
+    return False
+
+
+def test_client_key():
+    """X-Forwarded-For is ignored unless trusted; then only its right-most entry counts"""
+    print("\n🔑 Testing client identification...")
+
+    headers = {'X-Forwarded-For': '203.0.113.9, 198.51.100.7'}
+    trusted = admission.TRUST_FORWARDED
+    try:
+        admission.TRUST_FORWARDED = False
+        untrusted_key = client_key('10.0.0.5', headers)
+        admission.TRUST_FORWARDED = True
+        trusted_key = client_key('10.0.0.5', headers)
+        no_header_key = client_key('10.0.0.5', {})
+    finally:
+        admission.TRUST_FORWARDED = trusted
+
+    print(f"   untrusted: {untrusted_key}, trusted: {trusted_key}, without the header: {no_header_key}")
+    if untrusted_key == 'ip:10.0.0.5' and trusted_key == 'ip:198.51.100.7' and no_header_key == 'ip:10.0.0.5':
+        print("✅ Spoofable header ignored by default; the proxy's entry used when trusted")
+        return True
+
+    print("❌ Client keys are wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Admission Control Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Bucket Refill", test_bucket_refill),
+        ("Client Isolation", test_client_isolation),
+        ("Concurrency Cap", test_concurrency_cap),
+        ("Shed Refunds Token", test_shed_refunds_token),
+        ("Client Key", test_client_key)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Test script for the chat routes of the chatbot backend (chatbot_backend.py)
+Runs offline: Q Business is a local stand-in (qbusiness_stub.py) and requests
+go through Flask's test client.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+os.environ.update({
+    'Q_BUSINESS_APPLICATION_ID': 'chat-api-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'CHAT_RATE_LIMIT': '0',
+    'CHAT_MAX_IN_FLIGHT': '32',
+    'QBUSINESS_MAX_CONCURRENCY': '2',
+    'QBUSINESS_RETRY_BASE_DELAY': '0.01',
+    'ACCESS_LOG': 'false'
+})
+
+import chatbot_backend
+from admission import AdmissionController
+from qbusiness_router import EndpointRouter, QBusinessEndpoint
+from qbusiness_stub import LatencyModel, QBusinessStub
+
+chatbot = chatbot_backend.chatbot
+client = chatbot_backend.app.test_client()
+
+
+def use_stub(latency_ms=10, **kwargs):
+    """Answer every call from a fresh stand-in with a fixed latency; returns it"""
+    stub = QBusinessStub(latency=LatencyModel('fixed', latency_ms), answer_words=10, seed=1, **kwargs)
+    chatbot.router = EndpointRouter([QBusinessEndpoint('chat-api-test', client=stub)], explore_rate=0)
+    return stub
+
+
+class BufferedClient:
+    """The stand-in without its event-stream chat(), like the boto3 client"""
+
+    def __init__(self, stub):
+        self.chat_sync = stub.chat_sync
+
+
+def parse_sse(body):
+    """'event: x\\ndata: {...}' frames -> [(event, payload)], skipping comments"""
+    events = []
+    for frame in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if line and not line.startswith(':'))
+        if fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def parse_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_upstream_cap():
+    """QBUSINESS_MAX_CONCURRENCY bounds upstream calls from every route, streams included"""
+    print("\n🚧 Testing the upstream concurrency cap...")
+
+    stub = use_stub(latency_ms=100)
+    responses = []
+
+    def ask(i):
+        responses.append(chatbot.chat_with_q_business(f'Pergunta {i}', use_cache=False))
+
+    def stream(i):
+        response = client.post('/chat/stream', json={'message': f'Pergunta em fluxo {i}', 'cache': False})
+        responses.append(response.get_data(as_text=True))
+
+    threads = run_threads(ask, 4) + run_threads(stream, 4)
+    time.sleep(0.05)
+    during = chatbot.upstream_stats()
+    for thread in threads:
+        thread.join(10)
+
+    health = client.get('/').get_json()['upstream']
+    answered = sum(1 for r in responses if isinstance(r, dict) and 'error' not in r)
+    streamed = sum(1 for r in responses if isinstance(r, str) and 'event: done' in r)
+
+    print(f"   while busy: {during}; stub peak in flight {stub.stats()['peakInFlight']}")
+    if (stub.stats()['peakInFlight'] == 2 and stub.calls == 8 and answered == 4 and streamed == 4
+            and during['inFlight'] == 2 and during['waiting'] == 6
+            and health == {'maxConcurrency': 2, 'inFlight': 0, 'waiting': 0, 'rejected': 0}):
+        print("✅ 8 concurrent /chat and /chat/stream calls ran 2 at a time; GET / reported them")
+        return True
+
+    print("❌ Upstream calls were not capped")
+    return False
+
+
+def test_upstream_busy():
+    """A call that waits too long for a slot gets 503 with Retry-After, not a 500"""
+    print("\n⏳ Testing the upstream queue timeout...")
+
+    use_stub()
+    queue_timeout = chatbot.queue_timeout
+    chatbot.queue_timeout = 0.05
+    rejected_before = chatbot.upstream_stats()['rejected']
+    try:
+        # Take every slot, as long-running calls would
+        with chatbot.upstream_slot(), chatbot.upstream_slot():
+            response = client.post('/chat', json={'message': 'Alguém aí?', 'cache': False})
+            stream = client.post('/chat/stream', json={'message': 'Alguém aí?', 'cache': False})
+            stream_body = stream.get_data(as_text=True)
+    finally:
+        chatbot.queue_timeout = queue_timeout
+
+    body = response.get_json()
+    rejected = chatbot.upstream_stats()['rejected'] - rejected_before
+    print(f"   /chat: {response.status_code} {body}")
+    if (response.status_code == 503 and response.headers.get('Retry-After') == '1'
+            and body['error'] == 'Service busy' and 'event: error' in stream_body
+            and 'Service busy' in stream_body and rejected == 2):
+        print("✅ /chat got 503 + Retry-After and /chat/stream an error event once no slot freed up")
+        return True
+
+    print("❌ Busy upstream was not reported as expected")
+    return False
+
+
+def test_message_validation():
+    """Only a non-empty string is a message; anything else is refused before reaching Q Business"""
+    print("\n🧾 Testing message validation...")
+
+    stub = use_stub()
+    refused = {}
+    for label, message in (('null', None), ('number', 42), ('list', ['oi']), ('object', {'text': 'oi'}),
+                           ('blank', '   ')):
+        for route in ('/chat', '/chat/stream'):
+            response = client.post(route, json={'message': message, 'cache': False})
+            refused[f'{route} {label}'] = (response.status_code, response.get_json()['error'])
+    missing = client.post('/chat', json={'conversationId': 'abc'})
+    accepted = client.post('/chat', json={'message': '  Quem somos?  ', 'cache': False})
+
+    print(f"   {sorted(set(refused.values()))}, missing: {missing.status_code}, string: {accepted.status_code}")
+    if (all(result == (400, 'Empty message') for result in refused.values()) and missing.status_code == 400
+            and accepted.status_code == 200 and 'Quem somos?"' in accepted.get_json()['response']
+            and stub.calls == 1):
+        print("✅ null, numbers, lists, objects and blanks got 400; only the string reached Q Business")
+        return True
+
+    print(f"❌ {refused}")
+    return False
+
+
+def test_stream_events():
+    """/chat/stream sends tokens, sources, then done with the conversationId, in both streaming modes"""
+    print("\n📡 Testing the SSE event sequence...")
+
+    stub = use_stub()
+    response = client.post('/chat/stream', json={'message': 'Quem somos?', 'cache': False})
+    body = response.get_data(as_text=True)
+    incremental = parse_sse(body)
+
+    chatbot.router.primary.client = BufferedClient(stub)
+    buffered_response = client.post('/chat/stream', json={'message': 'Quem somos nós?', 'cache': False})
+    buffered = parse_sse(buffered_response.get_data(as_text=True))
+
+    names = [event for event, _ in incremental]
+    text = ''.join(payload['text'] for event, payload in incremental if event == 'token')
+    print(f"   incremental: {names.count('token')} tokens then {names[names.index('sources'):]}, "
+          f"buffered: {[event for event, _ in buffered]}")
+    if (response.headers['Content-Type'].startswith('text/event-stream') and body.startswith(': stream opened')
+            and response.headers['X-Stream-Mode'] == 'incremental' and names.count('token') > 1
+            and names[-2:] == ['sources', 'done'] and set(names[:-2]) == {'token'}
+            and text.startswith('Resposta para "Quem somos?"')
+            and incremental[-1][1]['conversationId'] in stub.conversations
+            and buffered_response.headers['X-Stream-Mode'] == 'buffered'
+            and [event for event, _ in buffered] == ['token', 'sources', 'done']
+            and buffered[-1][1]['conversationId'] in stub.conversations):
+        print("✅ Tokens, then sources, then done with the conversation; one token event when buffered")
+        return True
+
+    print(f"❌ Events: {incremental}")
+    return False
+
+
+def test_stream_error():
+    """An upstream failure ends the stream with an error event and no done"""
+    print("\n💥 Testing the SSE error event...")
+
+    stub = use_stub(throttle_rate=1.0)
+    response = client.post('/chat/stream', json={'message': 'Vai falhar', 'cache': False})
+    events = parse_sse(response.get_data(as_text=True))
+
+    print(f"   {events}")
+    if (response.status_code == 200 and len(events) == 1 and events[0][0] == 'error'
+            and events[0][1]['error'] == 'AWS Error: ThrottlingException' and stub.calls == 3):
+        print("✅ After 3 throttled attempts the stream ended with a single error event")
+        return True
+
+    print("❌ Upstream failure was not reported as an error event")
+    return False
+
+
+def test_batch_results():
+    """NDJSON lines per question (errors included), in input order with one worker, then the summary"""
+    print("\n📦 Testing batch results...")
+
+    stub = use_stub()
+    messages = [f'Pergunta em lote {i}' for i in range(5)]
+    # A conversation Q Business does not know: that question fails on its own
+    messages[2] = {'id': 'perdida', 'message': 'E depois?', 'conversationId': 'desconhecida'}
+    response = client.post('/chat/batch', json={'messages': messages, 'concurrency': 1})
+    lines = parse_ndjson(response)
+    parallel = parse_ndjson(client.post('/chat/batch', json={'messages': messages, 'concurrency': 4}))
+
+    results, summary = lines[:-1], lines[-1]
+    print(f"   order {[line['id'] for line in results]}, summary {summary}")
+    if (response.status_code == 200 and response.headers['Content-Type'].startswith('application/x-ndjson')
+            and 'X-Stream-Mode' not in response.headers
+            and [line['index'] for line in results] == [0, 1, 2, 3, 4]
+            and [line['id'] for line in results] == [0, 1, 'perdida', 3, 4]
+            and results[2]['error'] == 'AWS Error: ResourceNotFoundException' and results[2]['question'] == 'E depois?'
+            and all(line['success'] and 'elapsedMs' in line for i, line in enumerate(results) if i != 2)
+            and summary['done'] and (summary['total'], summary['succeeded'], summary['failed']) == (5, 4, 1)
+            and sorted(line['index'] for line in parallel[:-1]) == [0, 1, 2, 3, 4] and parallel[-1]['done']
+            and stub.calls == 10):
+        print("✅ One line per question with the failed one marked, then the summary; parallel runs end the same way")
+        return True
+
+    print(f"❌ Lines: {lines}")
+    return False
+
+
+def test_batch_limits():
+    """Batches over the caller's burst get 413 without the key, an empty bucket 429, bad input 400"""
+    print("\n🚧 Testing batch limits...")
+
+    use_stub()
+    admission = chatbot_backend.admission
+    batch_key, max_messages = chatbot_backend.BATCH_API_KEY, chatbot_backend.BATCH_MAX_MESSAGES
+    chatbot_backend.admission = AdmissionController(rate_per_minute=60, burst=5, max_in_flight=32)
+    chatbot_backend.BATCH_API_KEY = 'chave-de-teste'
+    chatbot_backend.BATCH_MAX_MESSAGES = 20
+
+    def batch(count, **headers):
+        return client.post('/chat/batch', json={'messages': [f'Lote {i}' for i in range(count)]}, headers=headers)
+
+    try:
+        over_burst = batch(6)
+        within_burst = batch(5)
+        within_burst.get_data()
+        bucket_empty = batch(1)
+        with_key = batch(12, **{'X-Batch-Key': 'chave-de-teste'})
+        summary = parse_ndjson(with_key)[-1]
+        wrong_key = batch(12, **{'X-Batch-Key': 'errada'})
+        too_large = batch(21, **{'X-Batch-Key': 'chave-de-teste'})
+        empty = client.post('/chat/batch', json={'messages': []})
+        no_message = client.post('/chat/batch', json={'messages': ['Certo', {'id': 'x'}]},
+                                 headers={'X-Batch-Key': 'chave-de-teste'})
+    finally:
+        chatbot_backend.admission = admission
+        chatbot_backend.BATCH_API_KEY, chatbot_backend.BATCH_MAX_MESSAGES = batch_key, max_messages
+
+    statuses = [r.status_code for r in (over_burst, within_burst, bucket_empty, with_key, wrong_key,
+                                        too_large, empty, no_message)]
+    print(f"   6 / 5 / 1 more / 12 with key / wrong key / 21 / empty / no message: {statuses}")
+    if (statuses == [413, 200, 429, 200, 413, 413, 400, 400]
+            and bucket_empty.get_json()['reason'] == 'rateLimited' and bucket_empty.headers.get('Retry-After')
+            and summary['total'] == 12 and summary['succeeded'] == 12):
+        print("✅ The burst capped unauthenticated batches, the key lifted it up to BATCH_MAX_MESSAGES")
+        return True
+
+    print("❌ Batch limits are wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Chat API Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Upstream Cap", test_upstream_cap),
+        ("Upstream Busy", test_upstream_busy),
+        ("Message Validation", test_message_validation),
+        ("Stream Events", test_stream_events),
+        ("Stream Error", test_stream_error),
+        ("Batch Results", test_batch_results),
+        ("Batch Limits", test_batch_limits)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Test script for the first-turn answer cache and request coalescing (chat_cache.py)
+Runs offline: coalescing is checked with a local upstream function that blocks
+until every concurrent caller has arrived, so the callers genuinely overlap;
+the cache is checked on its own and through the chatbot's /chat route with
+qbusiness_stub.py standing in for Q Business.
+"""
+
+import os
+import sys
+import time
+import threading
+
+os.environ.update({
+    'Q_BUSINESS_APPLICATION_ID': 'chat-cache-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'CHAT_RATE_LIMIT': '0',
+    # Only the exact-match cache: reworded repeats are covered by evaluate-semantic-cache.py
+    'SEMANTIC_CACHE_SIZE': '0',
+    'ACCESS_LOG': 'false'
+})
+
+import chatbot_backend
+from chat_cache import AnswerCache, SingleFlight
+from qbusiness_router import EndpointRouter, QBusinessEndpoint
+from qbusiness_stub import LatencyModel, QBusinessStub
+
+CALLERS = 8
+chatbot = chatbot_backend.chatbot
+client = chatbot_backend.app.test_client()
+
+
+class Upstream:
+    """Callable counting its calls; blocks until released, then answers or raises"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return f'answer {self.calls}'
+
+
+def run_concurrently(flight, key, upstream, callers=CALLERS):
+    """
+    Call flight.do(key, upstream) from several threads at once
+
+    The upstream call is held until every other caller waits on it.
+
+    Returns:
+        list: (result, leader) or the exception raised, per caller
+    """
+    outcomes = [None] * callers
+    barrier = threading.Barrier(callers)
+    coalesced_before = flight.stats()['coalesced']
+
+    def caller(index):
+        barrier.wait()
+        try:
+            outcomes[index] = flight.do(key, upstream)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + 5
+    while flight.stats()['coalesced'] - coalesced_before < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    upstream.release.set()
+
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_coalescing():
+    """Concurrent identical requests share one upstream call"""
+    print("\n🔗 Testing coalescing of identical requests...")
+
+    flight = SingleFlight()
+    upstream = Upstream()
+    outcomes = run_concurrently(flight, ('app', 'Quem coordena o Data IESB?'), upstream)
+
+    leaders = sum(1 for outcome in outcomes if isinstance(outcome, tuple) and outcome[1])
+    answers = {outcome[0] for outcome in outcomes if isinstance(outcome, tuple)}
+    stats = flight.stats()
+
+    print(f"   {CALLERS} callers, {upstream.calls} upstream call, {leaders} leader, answers {answers}")
+    print(f"   {stats}")
+    if (upstream.calls == 1 and leaders == 1 and answers == {'answer 1'}
+            and stats == {'inFlight': 0, 'upstreamCalls': 1, 'coalesced': CALLERS - 1}):
+        print(f"✅ One upstream call answered all {CALLERS} callers")
+        return True
+
+    print("❌ Identical requests were not coalesced")
+    return False
+
+
+def test_leader_error():
+    """The leader's exception is raised in every follower, and nothing is kept afterwards"""
+    print("\n💥 Testing error propagation to followers...")
+
+    flight = SingleFlight()
+    error = TimeoutError('Q Business did not answer')
+    upstream = Upstream(error)
+    outcomes = run_concurrently(flight, 'question', upstream)
+    raised = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+
+    # The failed call is not cached: the next request goes upstream again
+    retry = Upstream()
+    retry.release.set()
+    result, leader = flight.do('question', retry)
+
+    print(f"   {len(raised)}/{CALLERS} callers raised, {upstream.calls} upstream call, "
+          f"then {retry.calls} new call answered '{result}'")
+    if (upstream.calls == 1 and len(raised) == CALLERS and all(e is error for e in raised)
+            and leader and retry.calls == 1 and flight.stats()['inFlight'] == 0):
+        print("✅ Followers got the leader's exception; the next call started afresh")
+        return True
+
+    print("❌ The leader's error did not reach its followers")
+    return False
+
+
+def test_distinct_keys():
+    """Different keys never wait for each other"""
+    print("\n🔀 Testing distinct keys...")
+
+    flight = SingleFlight()
+    upstream = Upstream()
+    upstream.release.set()
+    barrier = threading.Barrier(4)
+    results = []
+
+    def caller(index):
+        barrier.wait()
+        results.append(flight.do(f'question {index}', upstream))
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    stats = flight.stats()
+    print(f"   {upstream.calls} upstream calls, {stats}")
+    if upstream.calls == 4 and all(leader for _, leader in results) and stats['coalesced'] == 0:
+        print("✅ Each distinct request made its own call")
+        return True
+
+    print("❌ Distinct requests were coalesced")
+    return False
+
+
+def use_stub():
+    """Answer from a fresh stand-in with an empty answer cache; returns the stub"""
+    stub = QBusinessStub(latency=LatencyModel('fixed', 5), answer_words=10, seed=1)
+    chatbot.router = EndpointRouter([QBusinessEndpoint('chat-cache-test', client=stub)], explore_rate=0)
+    chatbot.answer_cache = AnswerCache(max_size=256, ttl=600)
+    return stub
+
+
+def test_answer_ttl():
+    """Answers expire after ttl; get_stale still returns them"""
+    print("\n⌛ Testing answer expiry...")
+
+    cache = AnswerCache(max_size=4, ttl=0.1)
+    key = AnswerCache.make_key('Quem somos?', 'app', 'user')
+    cache.set(key, {'response': 'Data IESB'})
+    fresh = cache.get(AnswerCache.make_key('  quem SOMOS ', 'app', 'user'))
+    time.sleep(0.15)
+    expired = cache.get(key)
+    stale = cache.get_stale(key)
+    stats = cache.stats()
+
+    print(f"   fresh: {fresh}, after the ttl: {expired}, stale: {stale}, {stats}")
+    if (fresh == {'response': 'Data IESB'} and expired is None and stale == fresh
+            and stats['hits'] == 1 and stats['misses'] == 1 and stats['size'] == 1):
+        print("✅ Normalized repeat hit, expired after 0.1s, still available as a stale fallback")
+        return True
+
+    print("❌ Answers did not expire as expected")
+    return False
+
+
+def test_answer_lru():
+    """Beyond max_size the least recently used answer is evicted; max_size=0 disables the cache"""
+    print("\n🗃️  Testing LRU eviction...")
+
+    cache = AnswerCache(max_size=3, ttl=600)
+    for name in ('a', 'b', 'c'):
+        cache.set(name, name.upper())
+    cache.get('a')
+    cache.set('d', 'D')
+    kept = {name: cache.get(name) for name in ('a', 'b', 'c', 'd')}
+    stats = cache.stats()
+
+    disabled = AnswerCache(max_size=0)
+    disabled.set('a', 'A')
+
+    print(f"   {kept}, {stats['size']} kept, {stats['evictions']} evicted")
+    if (kept == {'a': 'A', 'b': None, 'c': 'C', 'd': 'D'} and stats['size'] == 3 and stats['evictions'] == 1
+            and disabled.get('a') is None and not disabled.stats()['enabled']):
+        print("✅ 'b', the least recently used, was evicted; a zero-size cache stores nothing")
+        return True
+
+    print("❌ LRU eviction is wrong")
+    return False
+
+
+def test_cache_opt_outs():
+    """Repeats are cached unless the request sends "cache": false or Cache-Control: no-cache"""
+    print("\n🚫 Testing the cache opt-outs...")
+
+    stub = use_stub()
+    question = {'message': 'Quem coordena o Data IESB?'}
+    first = client.post('/chat', json=question).get_json()
+    repeat = client.post('/chat', json=question).get_json()
+    calls_after_repeat = stub.calls
+    body_opt_out = client.post('/chat', json=dict(question, cache=False)).get_json()
+    header_opt_out = client.post('/chat', json=question, headers={'Cache-Control': 'no-cache'}).get_json()
+
+    print(f"   upstream calls: {calls_after_repeat} after a repeat, {stub.calls} after both opt-outs")
+    if (not first.get('cached') and first['conversationId'] and repeat.get('cached')
+            and repeat['conversationId'] is None and calls_after_repeat == 1 and stub.calls == 3
+            and not body_opt_out.get('cached') and not header_opt_out.get('cached')):
+        print("✅ The repeat was cached without a conversation; both opt-outs went upstream")
+        return True
+
+    print("❌ Cache opt-outs did not behave as expected")
+    return False
+
+
+def test_follow_ups_bypass_cache():
+    """Turns with a conversationId always go upstream and are never stored"""
+    print("\n💬 Testing follow-up turns...")
+
+    stub = use_stub()
+    first = client.post('/chat', json={'message': 'E os parceiros?'}).get_json()
+    size = chatbot.answer_cache.stats()['size']
+    follow_up = client.post('/chat', json={'message': 'E os parceiros?',
+                                           'conversationId': first['conversationId']}).get_json()
+
+    print(f"   {stub.calls} upstream calls, follow-up conversation {follow_up.get('conversationId')}, "
+          f"cache size {size} -> {chatbot.answer_cache.stats()['size']}")
+    if (stub.calls == 2 and not follow_up.get('cached') and follow_up['conversationId'] == first['conversationId']
+            and chatbot.answer_cache.stats()['size'] == size == 1):
+        print("✅ The follow-up skipped the cached answer and kept its conversation")
+        return True
+
+    print("❌ A follow-up was served from or stored in the cache")
+    return False
+
+
+def test_stale_while_breaker_open():
+    """While the breaker is open, expired first-turn answers are served as degraded"""
+    print("\n🔌 Testing stale answers while the breaker is open...")
+
+    stub = use_stub()
+    chatbot.answer_cache = AnswerCache(max_size=256, ttl=0.05)
+    client.post('/chat', json={'message': 'Onde fica o laboratório?'})
+    time.sleep(0.1)
+
+    breaker = chatbot.router.primary.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    stale = client.post('/chat', json={'message': 'Onde fica o laboratório?'})
+    unknown = client.post('/chat', json={'message': 'Pergunta nunca feita'})
+
+    print(f"   cached question: {stale.status_code} degraded={stale.get_json().get('degraded')}, "
+          f"new question: {unknown.status_code} Retry-After {unknown.headers.get('Retry-After')}")
+    if (stale.status_code == 200 and stale.get_json().get('degraded') and stale.get_json()['response']
+            and unknown.status_code == 503 and unknown.headers.get('Retry-After') and stub.calls == 1):
+        print("✅ The expired answer was served; a question never answered got 503 with Retry-After")
+        return True
+
+    print("❌ Stale fallback did not behave as expected")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Chat Cache Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Answer Expiry", test_answer_ttl),
+        ("LRU Eviction", test_answer_lru),
+        ("Cache Opt-Outs", test_cache_opt_outs),
+        ("Follow-Ups Bypass Cache", test_follow_ups_bypass_cache),
+        ("Stale While Breaker Open", test_stale_while_breaker_open),
+        ("Coalescing", test_coalescing),
+        ("Leader Error", test_leader_error),
+        ("Distinct Keys", test_distinct_keys)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the local transcript store (conversation_store.py)
+Runs offline: the SQLite tier is a file in a temporary directory, and
+GET /conversations/<id> is called through Flask's test client with
+qbusiness_stub.py standing in for Q Business.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.update({
+    'Q_BUSINESS_APPLICATION_ID': 'conversation-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'CHAT_RATE_LIMIT': '0',
+    'ACCESS_LOG': 'false'
+})
+
+import chatbot_backend
+from conversation_store import ConversationStore
+from qbusiness_router import EndpointRouter, QBusinessEndpoint
+from qbusiness_stub import LatencyModel, QBusinessStub
+
+
+def answer(text):
+    return {'response': text, 'sourceAttributions': []}
+
+
+def questions(turns):
+    return [turn['userMessage'] for turn in turns or []]
+
+
+def test_lru_eviction():
+    """Beyond max_conversations the least recently used conversation is forgotten"""
+    print("\n🗃️  Testing LRU eviction...")
+
+    store = ConversationStore(max_conversations=2)
+    store.append('a', 'Pergunta a', answer('Resposta a'))
+    store.append('b', 'Pergunta b', answer('Resposta b'))
+    store.get('a')
+    store.append('c', 'Pergunta c', answer('Resposta c'))
+    store.append(None, 'Sem conversa', answer('Ignorada'))
+    kept = {name: questions(store.get(name)) for name in ('a', 'b', 'c')}
+    stats = store.stats()
+
+    print(f"   {kept}, {stats}")
+    if (kept == {'a': ['Pergunta a'], 'b': [], 'c': ['Pergunta c']} and store.get('b') is None
+            and stats['conversations'] == 2 and stats['evictions'] == 1 and not stats['sqlite']):
+        print("✅ 'b', the least recently read, was evicted; turns without a conversation were not stored")
+        return True
+
+    print("❌ LRU eviction is wrong")
+    return False
+
+
+def test_max_turns():
+    """Only the last max_turns turns are kept, in memory and in SQLite"""
+    print("\n✂️  Testing turn trimming...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversations.db')
+        store = ConversationStore(max_turns=3, db_path=path)
+        for i in range(5):
+            store.append('longa', f'Pergunta {i}', answer(f'Resposta {i}'))
+        in_memory = store.get('longa')
+        # A new store reads the file only, as after a restart
+        reloaded = ConversationStore(max_turns=3, db_path=path).get('longa')
+
+    expected = ['Pergunta 2', 'Pergunta 3', 'Pergunta 4']
+    print(f"   memory: {questions(in_memory)}, sqlite: {questions(reloaded)}")
+    if (questions(in_memory) == expected and questions(reloaded) == expected
+            and in_memory[-1]['systemMessage'] == 'Resposta 4'):
+        print("✅ 5 turns recorded, the last 3 kept in both tiers, oldest first")
+        return True
+
+    print("❌ Turns were not trimmed to max_turns")
+    return False
+
+
+def test_reload_from_sqlite():
+    """An evicted conversation is read back from SQLite and can go on"""
+    print("\n💾 Testing reload from SQLite...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversations.db')
+        store = ConversationStore(max_conversations=1, db_path=path)
+        store.append('a', 'Primeira', answer('Resposta 1'))
+        store.append('a', 'Segunda', answer('Resposta 2'))
+        store.append('b', 'Outra', answer('Resposta b'))
+        evicted = 'a' not in store._conversations
+        reloaded = questions(store.get('a'))
+        store.append('a', 'Terceira', answer('Resposta 3'))
+        unknown = store.get('nunca-vista')
+        stats = store.stats()
+        after_restart = questions(ConversationStore(db_path=path).get('a'))
+
+    print(f"   evicted: {evicted}, reloaded: {reloaded}, after a restart: {after_restart}, {stats}")
+    if (evicted and reloaded == ['Primeira', 'Segunda'] and after_restart == ['Primeira', 'Segunda', 'Terceira']
+            and unknown is None and stats['dbHits'] == 1 and stats['sqlite'] and stats['misses'] == 1):
+        print("✅ The evicted conversation came back from SQLite and kept its turn order")
+        return True
+
+    print("❌ Evicted conversation was not reloaded")
+    return False
+
+
+def test_conversation_route():
+    """GET /conversations/<id> returns the recorded turns without calling Q Business; unknown ids get 404"""
+    print("\n🌐 Testing GET /conversations/<id>...")
+
+    chatbot = chatbot_backend.chatbot
+    stub = QBusinessStub(latency=LatencyModel('fixed', 5), answer_words=5, seed=1)
+    chatbot.router = EndpointRouter([QBusinessEndpoint('conversation-test', client=stub)], explore_rate=0)
+    chatbot.conversations = ConversationStore()
+    client = chatbot_backend.app.test_client()
+
+    first = client.post('/chat', json={'message': 'Quem somos?', 'cache': False}).get_json()
+    conversation_id = first['conversationId']
+    client.post('/chat', json={'message': 'E a equipe?', 'conversationId': conversation_id})
+    calls = stub.calls
+    history = client.get(f'/conversations/{conversation_id}')
+    missing = client.get('/conversations/desconhecida')
+
+    body = history.get_json()
+    print(f"   {history.status_code} {questions(body.get('turns'))}, unknown: {missing.status_code}")
+    if (history.status_code == 200 and body['conversationId'] == conversation_id
+            and questions(body['turns']) == ['Quem somos?', 'E a equipe?']
+            and body['turns'][0]['systemMessage'] == first['response'] and stub.calls == calls == 2
+            and missing.status_code == 404 and missing.get_json()['error'] == 'Not found'):
+        print("✅ Both turns returned from the local store; the unknown id got 404")
+        return True
+
+    print("❌ Conversation route is wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Conversation Store Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("LRU Eviction", test_lru_eviction),
+        ("Turn Trimming", test_max_turns),
+        ("Reload From SQLite", test_reload_from_sqlite),
+        ("Conversation Route", test_conversation_route)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process metrics (metrics.py, GET /metrics)
+Runs offline: metrics are recorded into a private registry, and the route is
+called through Flask's test client.
+"""
+
+import os
+import sys
+
+os.environ.update({
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'ACCESS_LOG': 'false'
+})
+
+from flask import Flask
+
+import metrics
+from metrics import PROMETHEUS_CONTENT_TYPE, Registry, counter, gauge, histogram, instrument_flask
+
+TOKEN = 'test-metrics-token'
+
+
+def test_exposition_format():
+    """HELP and TYPE lines, then one sample per label set, sorted, with values escaped"""
+    print("\n📄 Testing the exposition format...")
+
+    registry = Registry()
+    requests = counter('demo_requests_total', 'Demo requests', ('route', 'status'), registry=registry)
+    requests.labels('/b', '200').inc()
+    requests.labels('/a', '500').inc(2)
+    requests.labels('/a', '200').inc(0.5)
+    requests.labels('/"q"\\n', '200').inc()
+    in_flight = gauge('demo_in_flight', 'Demo calls in progress', registry=registry).labels()
+    in_flight.inc(3)
+    in_flight.dec()
+    again = counter('demo_requests_total', 'Registered twice', ('route', 'status'), registry=registry)
+
+    lines = registry.render().splitlines()
+    expected = [
+        '# HELP demo_requests_total Demo requests',
+        '# TYPE demo_requests_total counter',
+        'demo_requests_total{route="/\\"q\\"\\\\n",status="200"} 1',
+        'demo_requests_total{route="/a",status="200"} 0.5',
+        'demo_requests_total{route="/a",status="500"} 2',
+        'demo_requests_total{route="/b",status="200"} 1',
+        '# HELP demo_in_flight Demo calls in progress',
+        '# TYPE demo_in_flight gauge',
+        'demo_in_flight 2',
+    ]
+
+    for line in lines:
+        print(f"   {line}")
+    if lines == expected and again is requests and registry.render().endswith('\n'):
+        print("✅ Samples sorted by label values, quotes and backslashes escaped, re-registration reused the metric")
+        return True
+
+    print("❌ Exposition output is wrong")
+    return False
+
+
+def test_histogram_buckets():
+    """Bucket counts are cumulative, le bounds are inclusive, and +Inf equals _count"""
+    print("\n📊 Testing histogram buckets...")
+
+    registry = Registry()
+    latency = histogram('demo_seconds', 'Demo latency', ('route',), buckets=(1, 0.1, 0.5), registry=registry)
+    child = latency.labels('/chat')
+    for value in (0.05, 0.1, 0.3, 0.5, 0.7, 2):
+        child.observe(value)
+    latency.labels('/widget').observe(0.01)
+
+    lines = [line for line in registry.render().splitlines() if 'route="/chat"' in line]
+    expected = [
+        'demo_seconds_bucket{route="/chat",le="0.1"} 2',
+        'demo_seconds_bucket{route="/chat",le="0.5"} 4',
+        'demo_seconds_bucket{route="/chat",le="1"} 5',
+        'demo_seconds_bucket{route="/chat",le="+Inf"} 6',
+        'demo_seconds_sum{route="/chat"} 3.65',
+        'demo_seconds_count{route="/chat"} 6',
+    ]
+    count, total = latency.totals()
+    chat_count, _ = latency.totals(route='/chat')
+
+    for line in lines:
+        print(f"   {line}")
+    print(f"   totals: {count} observations, {total:.2f}s; /chat only: {chat_count}")
+    if lines == expected and latency.buckets == (0.1, 0.5, 1) and count == 7 and chat_count == 6:
+        print("✅ Buckets sorted, 0.1 and 0.5 counted in their own bucket, +Inf holds every observation")
+        return True
+
+    print("❌ Histogram buckets are wrong")
+    return False
+
+
+def test_label_children():
+    """Each label set is its own child, returned again for the same values"""
+    print("\n🏷️  Testing label children...")
+
+    registry = Registry()
+    errors = counter('demo_errors_total', 'Demo errors', ('service', 'code'), registry=registry)
+    throttled = errors.labels('qbusiness', 'ThrottlingException')
+    throttled.inc()
+    errors.labels('qbusiness', 'ThrottlingException').inc()
+    errors.labels('dynamodb', 'ThrottlingException').inc()
+    unlabelled = gauge('demo_ready', 'Demo readiness', registry=registry)
+    unlabelled.labels().set(1)
+
+    values = errors.values()
+    rendered = registry.render()
+    print(f"   {values}")
+    if (errors.labels('qbusiness', 'ThrottlingException') is throttled
+            and values == {('qbusiness', 'ThrottlingException'): 2, ('dynamodb', 'ThrottlingException'): 1}
+            and 'demo_ready 1\n' in rendered and rendered.count('demo_errors_total{') == 2):
+        print("✅ Repeated label values shared one child; different values got their own series")
+        return True
+
+    print("❌ Label children are wrong")
+    return False
+
+
+def test_metrics_route():
+    """GET /metrics serves the registry, records routes by URL rule, and requires METRICS_TOKEN when set"""
+    print("\n🔐 Testing GET /metrics...")
+
+    app = Flask('metrics-test')
+
+    @app.route('/items/<item_id>')
+    def item(item_id):
+        return {'id': item_id}
+
+    registry = Registry()
+    instrument_flask(app, registry=registry)
+    client = app.test_client()
+    client.get('/items/1')
+    client.get('/items/2')
+
+    token = metrics.METRICS_TOKEN
+    try:
+        metrics.METRICS_TOKEN = ''
+        open_scrape = client.get('/metrics')
+        metrics.METRICS_TOKEN = TOKEN
+        anonymous = client.get('/metrics')
+        wrong = client.get('/metrics', headers={'Authorization': 'Bearer not-the-token'})
+        authorized = client.get('/metrics', headers={'Authorization': f'Bearer {TOKEN}'})
+    finally:
+        metrics.METRICS_TOKEN = token
+
+    # Route metrics go to the shared registry; the private one holds nothing here
+    requests = metrics.HTTP_REQUESTS.values()
+    print(f"   no token set: {open_scrape.status_code}, token set: anonymous {anonymous.status_code}, "
+          f"wrong {wrong.status_code}, bearer {authorized.status_code}")
+    print(f"   recorded /items/<item_id> 200: {requests.get(('GET', '/items/<item_id>', '200'))}")
+    if (open_scrape.status_code == 200 and open_scrape.headers['Content-Type'] == PROMETHEUS_CONTENT_TYPE
+            and anonymous.status_code == 401 and anonymous.get_json()['error'] == 'Unauthorized'
+            and anonymous.headers['WWW-Authenticate'] == 'Bearer'
+            and wrong.status_code == 401 and authorized.status_code == 200
+            and authorized.headers['Content-Type'] == PROMETHEUS_CONTENT_TYPE
+            and requests.get(('GET', '/items/<item_id>', '200')) == 2
+            and requests.get(('GET', '/metrics', '401')) == 2):
+        print("✅ Both item requests were recorded under one route; the token kept anonymous scrapers out")
+        return True
+
+    print("❌ GET /metrics is wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Metrics Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Exposition Format", test_exposition_format),
+        ("Histogram Buckets", test_histogram_buckets),
+        ("Label Children", test_label_children),
+        ("Metrics Route", test_metrics_route)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Test script for per-request profiling (profiling.py)
+Drives the team API, the Flask chatbot and the ASGI /chat route offline,
+against the DynamoDB and Q Business stand-ins, and checks the Server-Timing
+breakdown, the cProfile dumps and the cost of spans when profiling is off.
+"""
+
+import os
+import sys
+import time
+import json
+import pstats
+import asyncio
+import tempfile
+
+PROFILE_DIR = tempfile.mkdtemp(prefix='dataiesb-profiles-')
+TOKEN = 'test-profile-token'
+
+# Profiling settings are read at import time
+os.environ.update({
+    'REQUEST_PROFILING': 'true',
+    'PROFILE_DEBUG_TOKEN': TOKEN,
+    'PROFILE_DIR': PROFILE_DIR,
+    'Q_BUSINESS_APPLICATION_ID': 'profiling-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'CHAT_RATE_LIMIT': '0'
+})
+
+import profiling
+from dynamodb_stub import LocalTable, make_member
+from qbusiness_stub import LatencyModel, QBusinessStub
+
+UPSTREAM_MS = 20
+
+
+def timing_spans(header):
+    """Server-Timing header -> {name: (dur ms, desc)}"""
+    spans = {}
+    for entry in filter(None, (part.strip() for part in (header or '').split(','))):
+        name, *params = entry.split(';')
+        values = dict(param.split('=', 1) for param in params)
+        spans[name] = (float(values.get('dur', 0)), values.get('desc', '').strip('"'))
+    return spans
+
+
+def dumps_written():
+    return sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.prof'))
+
+
+def chatbot_app():
+    import chatbot_backend
+
+    chatbot_backend.chatbot.q_business_client = QBusinessStub(latency=LatencyModel('fixed', UPSTREAM_MS), seed=1)
+    return chatbot_backend
+
+
+def test_team_server_timing():
+    """Roster and page reads report DynamoDB, normalization and serialization separately"""
+    print("\n👥 Testing /api/team Server-Timing...")
+
+    import team_api
+
+    team_api.team_api.table = LocalTable((make_member(i) for i in range(2000)), latency=0.002)
+    team_api.team_api.roster.invalidate()
+    client = team_api.app.test_client()
+
+    roster = timing_spans(client.get('/api/team').headers.get('Server-Timing'))
+    page = timing_spans(client.get('/api/team?limit=50').headers.get('Server-Timing'))
+    print(f"   roster: {roster}")
+    print(f"   page:   {page}")
+
+    expected_roster = {'dynamodb', 'normalize', 'serialize', 'total'}
+    expected_page = {'parse', 'dynamodb', 'normalize', 'serialize', 'total'}
+    if expected_roster <= set(roster) and expected_page <= set(page) and roster['dynamodb'][0] > 0:
+        print("✅ Every stage of both reads is broken out")
+        return True
+
+    print("❌ Missing stages")
+    return False
+
+
+def test_chat_server_timing():
+    """Flask /chat separates parsing, the cache lookup and the Q Business call"""
+    print("\n💬 Testing Flask /chat Server-Timing...")
+
+    client = chatbot_app().app.test_client()
+    response = client.post('/chat', json={'message': 'Quais são os parceiros?', 'cache': False})
+    spans = timing_spans(response.headers.get('Server-Timing'))
+    print(f"   {spans}")
+
+    if ({'parse', 'admission', 'qbusiness', 'serialize', 'total'} <= set(spans)
+            and spans['qbusiness'][0] >= UPSTREAM_MS and spans['total'][0] >= spans['qbusiness'][0]
+            and 'profile' not in spans):
+        print(f"✅ Q Business took {spans['qbusiness'][0]:.1f} of {spans['total'][0]:.1f} ms")
+        return True
+
+    print(f"❌ Status {response.status_code}")
+    return False
+
+
+def test_debug_header_dump():
+    """Only the right debug token gets a cProfile dump, which pstats can load"""
+    print("\n🔬 Testing cProfile dumps on demand...")
+
+    client = chatbot_app().app.test_client()
+    before = dumps_written()
+    client.post('/chat', json={'message': 'Quem faz parte da equipe?', 'cache': False},
+                headers={'X-Debug-Profile': 'wrong-token'})
+    ignored = dumps_written() == before
+
+    response = client.post('/chat', json={'message': 'Como entro em contato?', 'cache': False},
+                           headers={'X-Debug-Profile': TOKEN})
+    spans = timing_spans(response.headers.get('Server-Timing'))
+    name = spans.get('profile', (0, ''))[1]
+    path = os.path.join(PROFILE_DIR, name)
+
+    if not ignored or not name or not os.path.exists(path):
+        print(f"❌ Wrong token ignored: {ignored}, dump {name!r}")
+        return False
+
+    stats = pstats.Stats(path)
+    functions = {func for _, _, func in stats.stats}
+    if 'chat_with_q_business' in functions and 'chat_sync' in functions:
+        print(f"✅ {name} holds {len(stats.stats)} functions, including the Q Business call")
+        return True
+
+    print("❌ Dump does not cover the chat handler")
+    return False
+
+
+def test_asgi_chat():
+    """The native ASGI /chat route reports the same stages and profiles its executor call"""
+    print("\n⚡ Testing ASGI /chat Server-Timing...")
+
+    chatbot_app()
+    import chatbot_asgi
+
+    async def post(message, headers=()):
+        body = json.dumps({'message': message, 'cache': False}).encode()
+        received = []
+        messages = iter([{'type': 'http.request', 'body': body, 'more_body': False}])
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            received.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/chat', 'client': ('127.0.0.1', 5555),
+            'headers': [(b'content-type', b'application/json'), *headers]
+        }
+        await chatbot_asgi.app(scope, receive, send)
+        return dict(received[0]['headers'])
+
+    async def run():
+        plain = await post('Onde encontro o relatório do PIB?')
+        profiled = await post('Onde fica o IESB?', [(b'x-debug-profile', TOKEN.encode())])
+        return plain, profiled
+
+    plain, profiled = asyncio.run(run())
+    spans = timing_spans(plain.get(b'server-timing', b'').decode())
+    dump = timing_spans(profiled.get(b'server-timing', b'').decode()).get('profile', (0, ''))[1]
+    print(f"   {spans}")
+
+    if not ({'parse', 'admission', 'queue', 'qbusiness', 'serialize', 'total'} <= set(spans) and dump):
+        print(f"❌ Stages {sorted(spans)}, dump {dump!r}")
+        return False
+
+    functions = {func for _, _, func in pstats.Stats(os.path.join(PROFILE_DIR, dump)).stats}
+    if 'chat_with_q_business' in functions:
+        print(f"✅ Stages recorded across the executor thread; {dump} covers the upstream call")
+        return True
+
+    print("❌ ASGI dump does not cover the executor call")
+    return False
+
+
+def test_disabled_cost():
+    """Turned off, no hooks are installed and a span costs well under a microsecond"""
+    print("\n🪶 Testing cost when disabled...")
+
+    from flask import Flask
+
+    app = Flask('profiling-disabled')
+    profiling.profile_flask(app, enabled=False)
+    hooks = sum(len(funcs) for funcs in app.before_request_funcs.values())
+
+    rounds = 200000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        with profiling.span('serialize'):
+            pass
+    per_span_ns = (time.perf_counter() - start) * 1e9 / rounds
+
+    print(f"   {hooks} hooks, {per_span_ns:.0f} ns per span")
+    if hooks == 0 and per_span_ns < 1000:
+        print("✅ Nothing to pay for when profiling is off")
+        return True
+
+    print("❌ Disabled profiling is not free")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Request Profiling Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Team API Server-Timing", test_team_server_timing),
+        ("Flask Chat Server-Timing", test_chat_server_timing),
+        ("Debug Header cProfile Dump", test_debug_header_dump),
+        ("ASGI Chat Server-Timing", test_asgi_chat),
+        ("Cost When Disabled", test_disabled_cost)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
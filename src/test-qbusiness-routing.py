@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-endpoint Q Business routing (qbusiness_router.py)
+Runs offline: every endpoint is a local stand-in (qbusiness_stub.py) with its
+own latency, so latency-aware routing, failover and conversation affinity can
+be checked without AWS.
+"""
+
+import os
+import sys
+import time
+import threading
+
+os.environ.update({
+    'Q_BUSINESS_APPLICATION_ID': 'routing-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'CHAT_RATE_LIMIT': '0',
+    'QBUSINESS_RETRY_BASE_DELAY': '0.01',
+    'QBUSINESS_BREAKER_THRESHOLD': '2',
+    'QBUSINESS_BREAKER_RESET_TIMEOUT': '60'
+})
+
+import chatbot_backend
+from qbusiness_router import EndpointRouter, QBusinessEndpoint, parse_endpoints
+from qbusiness_stub import LatencyModel, QBusinessStub
+
+chatbot = chatbot_backend.chatbot
+REGIONS = ['us-east-1', 'us-west-2', 'eu-west-1']
+
+
+def use_endpoints(*latencies_ms, throttle_rates=None):
+    """Route the chatbot over one stub endpoint per latency; returns the stubs"""
+    stubs = []
+    endpoints = []
+    for i, latency_ms in enumerate(latencies_ms):
+        stub = QBusinessStub(latency=LatencyModel('fixed', latency_ms), answer_words=10,
+                             throttle_rate=(throttle_rates or [0.0] * len(latencies_ms))[i], seed=i)
+        stubs.append(stub)
+        endpoints.append(QBusinessEndpoint(f'app-{i}', region=REGIONS[i], client=stub))
+    chatbot.router = EndpointRouter(endpoints, explore_rate=0)
+    return stubs
+
+
+def ask(count, prefix):
+    return [chatbot.chat_with_q_business(f'{prefix} {i}', use_cache=False) for i in range(count)]
+
+
+def test_fastest_endpoint_preferred():
+    """Once both are measured, first turns go to the faster endpoint"""
+    print("\n🏎️  Testing latency-aware routing...")
+
+    slow, fast = use_endpoints(80, 20)
+    responses = ask(20, 'Pergunta rápida')
+
+    print(f"   slow {slow.calls} calls, fast {fast.calls} calls")
+    if all('error' not in r for r in responses) and fast.calls >= 18:
+        print("✅ The 20 ms endpoint served nearly every question")
+        return True
+
+    print("❌ Traffic did not settle on the fastest endpoint")
+    return False
+
+
+def test_traffic_moves_when_endpoint_degrades():
+    """When the preferred endpoint slows down, traffic moves to the other one"""
+    print("\n📉 Testing traffic shift on degradation...")
+
+    first, second = use_endpoints(80, 20)
+    ask(10, 'Antes')
+    second.latency = LatencyModel('fixed', 300)
+    before = first.calls
+    ask(20, 'Depois')
+    moved = first.calls - before
+
+    print(f"   after the slowdown: {moved}/20 to {REGIONS[0]}")
+    if moved >= 16:
+        print(f"✅ {REGIONS[1]} went from 20 to 300 ms and lost its traffic within a few requests")
+        return True
+
+    print("❌ Traffic stayed on the degraded endpoint")
+    return False
+
+
+def test_failover_on_throttling():
+    """A throttling endpoint is skipped without failing the request; with all down, a retry hint is returned"""
+    print("\n🔀 Testing failover...")
+
+    throttled, healthy = use_endpoints(10, 60, throttle_rates=[1.0, 0.0])
+    responses = ask(10, 'Failover')
+    served = sum('error' not in r for r in responses)
+    failovers = chatbot.router.failovers
+
+    use_endpoints(10, 10, throttle_rates=[1.0, 1.0])
+    down = ask(4, 'Tudo fora')
+
+    print(f"   served {served}/10, {failovers} failovers, throttled endpoint called {throttled.calls}x")
+    print(f"   all endpoints down: {[r.get('error') for r in down]}")
+    if (served == 10 and failovers >= 1 and throttled.calls <= 2
+            and 'error' in down[0] and down[-1].get('retryAfter', 0) >= 1):
+        print("✅ Throttling moved traffic at once; with every breaker open the client gets Retry-After")
+        return True
+
+    print("❌ Failover did not behave as expected")
+    return False
+
+
+def test_conversation_affinity():
+    """Follow-up turns stay on the conversation's endpoint, even when another one becomes faster"""
+    print("\n📌 Testing conversation affinity...")
+
+    slow, fast = use_endpoints(80, 20)
+    ask(2, 'Medindo')
+    first = chatbot.chat_with_q_business('Quem faz parte da equipe?', use_cache=False)
+    conversation_id = first['conversationId']
+
+    # The other endpoint is now much faster, but the conversation only exists here
+    fast.latency = LatencyModel('fixed', 150)
+    slow.latency = LatencyModel('fixed', 5)
+    calls_before = fast.calls
+    follow_up = chatbot.chat_with_q_business('E quem coordena?', conversation_id)
+    events = list(chatbot.stream_chat_with_q_business('E os parceiros?', conversation_id))
+    done = dict(events).get('done', {})
+
+    # Ids issued before routing was configured belong to the primary endpoint
+    legacy = slow.chat_sync(applicationId='app-0', userId='u', userMessage='oi')['conversationId']
+    legacy_follow_up = chatbot.chat_with_q_business('Continuando', legacy)
+
+    client = chatbot_backend.app.test_client()
+    transcript = client.get(f'/conversations/{conversation_id}').get_json()
+
+    print(f"   conversation {conversation_id}")
+    if (conversation_id.startswith(f'{REGIONS[1]}:') and fast.calls - calls_before == 2
+            and follow_up.get('conversationId') == conversation_id and done.get('conversationId') == conversation_id
+            and 'error' not in legacy_follow_up and legacy_follow_up['conversationId'] == legacy
+            and len(transcript.get('turns', [])) == 3):
+        print("✅ Both follow-ups (sync and streamed) went back to the endpoint that started the conversation")
+        return True
+
+    print(f"❌ follow-up {follow_up}, done {done}, legacy {legacy_follow_up.get('error')}, "
+          f"transcript {transcript}")
+    return False
+
+
+def test_load_spreads_across_endpoints():
+    """Under concurrency the in-flight count spreads load over endpoints of similar speed"""
+    print("\n⚖️  Testing load spreading...")
+
+    first, second = use_endpoints(50, 60)
+
+    def client(n):
+        ask(10, f'Cliente {n}')
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = first.calls + second.calls
+    share = min(first.calls, second.calls) / total
+    print(f"   {first.calls} / {second.calls} calls, peak in flight {first.peak_in_flight} / {second.peak_in_flight}")
+    if total == 80 and share >= 0.25:
+        print(f"✅ The slower endpoint still took {share:.0%} of a concurrent load")
+        return True
+
+    print("❌ Load piled up on one endpoint")
+    return False
+
+
+def test_endpoint_without_client():
+    """An endpoint whose client could not be created is skipped, and its follow-ups get a retryable 503"""
+    print("\n🔌 Testing an endpoint without a client...")
+
+    stub = QBusinessStub(latency=LatencyModel('fixed', 10), answer_words=10, seed=1)
+    missing = QBusinessEndpoint('app-0', region=REGIONS[0])
+    # As after a failed client creation: no client until the next attempt is due
+    missing.client_state = 'failed'
+    missing._retry_at = time.monotonic() + 60
+    chatbot.router = EndpointRouter([missing, QBusinessEndpoint('app-1', region=REGIONS[1], client=stub)],
+                                    explore_rate=0)
+
+    responses = ask(5, 'Sem cliente')
+    client = chatbot_backend.app.test_client()
+    follow_up = client.post('/chat', json={'message': 'E agora?', 'conversationId': f'{REGIONS[0]}:abc'})
+    body = follow_up.get_json()
+
+    print(f"   follow-up on {REGIONS[0]}: {follow_up.status_code} {body}")
+    if (all('error' not in r for r in responses) and stub.calls == 5 and chatbot.router.failovers == 0
+            and follow_up.status_code == 503 and body.get('retryAfter', 0) >= 30
+            and follow_up.headers.get('Retry-After') and 'NoneType' not in str(body)):
+        print(f"✅ First turns went to {REGIONS[1]}; the follow-up got 503 with Retry-After instead of a 500")
+        return True
+
+    print(f"❌ responses {responses}")
+    return False
+
+
+def test_endpoint_config():
+    """Q_BUSINESS_ENDPOINTS parsing"""
+    print("\n⚙️  Testing endpoint configuration...")
+
+    endpoints = parse_endpoints('us-east-1:app-a, backup=us-west-2:app-b')
+    default = parse_endpoints('', 'app-default')
+    errors = 0
+    for spec in ('us-east-1', 'us-east-1:app-a,us-east-1:app-b', 'a:b=us-east-1:app'):
+        try:
+            parse_endpoints(spec)
+        except ValueError:
+            errors += 1
+
+    if ([(e.name, e.region, e.application_id) for e in endpoints] == [('us-east-1', 'us-east-1', 'app-a'),
+                                                                     ('backup', 'us-west-2', 'app-b')]
+            and len(default) == 1 and default[0].application_id == 'app-default' and default[0].region is None
+            and errors == 3):
+        print("✅ Names, regions and applications parsed; malformed and duplicate entries rejected")
+        return True
+
+    print("❌ Configuration parsing is wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Q Business Routing Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Fastest Endpoint Preferred", test_fastest_endpoint_preferred),
+        ("Traffic Moves On Degradation", test_traffic_moves_when_endpoint_degrades),
+        ("Failover On Throttling", test_failover_on_throttling),
+        ("Conversation Affinity", test_conversation_affinity),
+        ("Load Spreads Across Endpoints", test_load_spreads_across_endpoints),
+        ("Endpoint Without Client", test_endpoint_without_client),
+        ("Endpoint Configuration", test_endpoint_config)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script for the indexed reports catalog (reports_catalog.py)
+Runs offline against the bundled reports.json and a generated catalog
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+from reports_catalog import ReportsCatalog, tokenize
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LARGE_CATALOG = 5000
+TOPICS = ['Saúde Pública', 'Educação Básica', 'Mobilidade Urbana', 'Segurança', 'Economia Regional']
+AUTHORS = ['Leonardo Borges Silva Braga', 'Marco Valerio', 'Ana Luísa Souza', 'João Pereira']
+
+
+def write_catalog(path, reports):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False)
+
+
+def make_reports(count):
+    return {
+        str(i): {
+            'id_s3': f'reports/{i}/',
+            'titulo': f'Relatório de {TOPICS[i % len(TOPICS)]} {i}',
+            'descricao': f'Indicadores de {TOPICS[(i // 5) % len(TOPICS)].lower()} no Distrito Federal.',
+            'autor': AUTHORS[i % len(AUTHORS)],
+            'deletado': i % 10 == 0
+        }
+        for i in range(1, count + 1)
+    }
+
+
+def test_accent_insensitive_search():
+    """Queries match regardless of accents and case, and stopwords are ignored"""
+    print("\n🔤 Testing accent-insensitive search...")
+
+    catalog = ReportsCatalog(os.path.join(BASE_DIR, 'reports.json'))
+    titles = [r['titulo'] for r in catalog.search('RELATORIO pib')['data']]
+    analysis = catalog.search('análise', deleted=None)['data']
+
+    if titles == ['Relatório do PIB'] and [r['id'] for r in analysis] == ['3'] and tokenize('do da de') == []:
+        print("✅ 'RELATORIO pib' and 'análise' found the expected reports")
+        return True
+
+    print(f"❌ Unexpected results: {titles}, {analysis}")
+    return False
+
+
+def test_filters_and_pagination():
+    """Author and deleted filters combine with the query; pages cover every match once"""
+    print("\n📑 Testing filters and pagination...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reports.json')
+        reports = make_reports(LARGE_CATALOG)
+        write_catalog(path, reports)
+        catalog = ReportsCatalog(path)
+
+        expected = sorted(
+            (i for i, r in reports.items()
+             if r['autor'] == 'Ana Luísa Souza' and not r['deletado']
+             and 'saúde' in (r['titulo'] + r['descricao']).lower()),
+            key=int
+        )
+
+        seen = []
+        offset = 0
+        while offset is not None:
+            page = catalog.search('saude', author='ana luisa souza', limit=50, offset=offset)
+            seen.extend(r['id'] for r in page['data'])
+            offset = page['nextOffset']
+
+    if sorted(seen, key=int) == expected and page['total'] == len(expected):
+        print(f"✅ {len(seen)} matching reports across pages, no duplicates")
+        return True
+
+    print(f"❌ Got {len(seen)} reports, expected {len(expected)}")
+    return False
+
+
+def test_incremental_reload():
+    """Only changed reports are re-indexed when the file changes"""
+    print("\n🔄 Testing incremental reload...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reports.json')
+        reports = make_reports(100)
+        write_catalog(path, reports)
+        catalog = ReportsCatalog(path, reload_interval=0)
+
+        reports['7']['titulo'] = 'Relatório de Turismo'
+        reports['8']['deletado'] = True
+        del reports['9']
+        write_catalog(path, reports)
+        # Make sure the modification time moves even on coarse filesystems
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+        before = catalog.reindexed
+        turismo = [r['id'] for r in catalog.search('turismo')['data']]
+        reindexed = catalog.reindexed - before
+        report_8_hidden = '8' not in [r['id'] for r in catalog.search(limit=100)['data']]
+        report_9_gone = catalog.get('9') is None
+
+    if turismo == ['7'] and reindexed == 3 and report_8_hidden and report_9_gone:
+        print("✅ 3 changed reports re-indexed, search reflects the new file")
+        return True
+
+    print(f"❌ turismo={turismo}, reindexed={reindexed}, hidden={report_8_hidden}, removed={report_9_gone}")
+    return False
+
+
+def test_search_speed():
+    """Index-backed queries stay fast on a large catalog"""
+    print("\n⚡ Testing search speed...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reports.json')
+        write_catalog(path, make_reports(LARGE_CATALOG))
+        catalog = ReportsCatalog(path)
+
+        queries = ['mobilidade', 'economia distrito', 'seg', 'relatorio educacao basica']
+        start = time.perf_counter()
+        for _ in range(50):
+            for query in queries:
+                catalog.search(query, limit=20)
+        per_query_ms = (time.perf_counter() - start) * 1000 / (50 * len(queries))
+
+    print(f"   {per_query_ms:.3f} ms per query over {LARGE_CATALOG} reports")
+    if per_query_ms < 50:
+        print("✅ Queries answered from the index")
+        return True
+
+    print("❌ Queries are too slow")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Reports Catalog Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Accent-insensitive Search", test_accent_insensitive_search),
+        ("Filters and Pagination", test_filters_and_pagination),
+        ("Incremental Reload", test_incremental_reload),
+        ("Search Speed", test_search_speed)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
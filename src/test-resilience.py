@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test script for the upstream resilience helpers (resilience.py)
+Runs offline: upstream calls are local functions raising the same botocore
+errors Q Business and DynamoDB return.
+"""
+
+import sys
+import time
+import threading
+
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable
+
+
+def aws_error(code, status=400):
+    return ClientError({'Error': {'Code': code, 'Message': code},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, 'ChatSync')
+
+
+class Upstream:
+    """Callable failing with the given errors, in order, then answering 'ok'"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+def test_breaker_trips():
+    """Consecutive failures open the breaker; calls then fail fast without reaching upstream"""
+    print("\n⚡ Testing the breaker tripping...")
+
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, name='test')
+    policy = RetryPolicy(max_attempts=1)
+    upstream = Upstream(*[aws_error('ThrottlingException')] * 3)
+
+    for _ in range(3):
+        try:
+            policy.call(upstream, breaker)
+        except ClientError:
+            pass
+
+    refused = 0
+    for _ in range(5):
+        try:
+            policy.call(upstream, breaker)
+        except CircuitOpenError:
+            refused += 1
+
+    stats = breaker.stats()
+    print(f"   {stats}")
+    if (breaker.state == CircuitBreaker.OPEN and upstream.calls == 3 and refused == 5
+            and stats['rejected'] == 5 and stats['timesOpened'] == 1 and 59 < breaker.retry_after() <= 60):
+        print("✅ Opened after 3 failures; the next 5 calls were refused without an upstream call")
+        return True
+
+    print("❌ Breaker did not trip as expected")
+    return False
+
+
+def test_breaker_cool_down():
+    """A success before the threshold resets the count; an open breaker turns half-open after reset_timeout"""
+    print("\n🧊 Testing the cool-down...")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2, name='test')
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    closed_after_reset = breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    open_at_once = breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+    time.sleep(0.25)
+
+    print(f"   closed after a success: {closed_after_reset}, open at once: {open_at_once}, "
+          f"after the cool-down: {breaker.state}")
+    if closed_after_reset and open_at_once and breaker.state == CircuitBreaker.HALF_OPEN and breaker.retry_after() == 0:
+        print("✅ Failures must be consecutive; the breaker turned half-open once reset_timeout passed")
+        return True
+
+    print("❌ Cool-down did not behave as expected")
+    return False
+
+
+def test_half_open_probe():
+    """Half-open lets exactly one trial call through; it closes the breaker or opens it again"""
+    print("\n🔬 Testing the half-open probe...")
+
+    def half_open_breaker():
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1, name='test')
+        breaker.record_failure()
+        time.sleep(0.15)
+        return breaker
+
+    # Concurrent callers while half-open: a single one gets through
+    breaker = half_open_breaker()
+    allowed = []
+    barrier = threading.Barrier(8)
+
+    def caller():
+        barrier.wait()
+        allowed.append(breaker.allow_request())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    trials = sum(allowed)
+
+    succeeded = half_open_breaker()
+    result = RetryPolicy(max_attempts=1).call(Upstream(), succeeded)
+
+    failed = half_open_breaker()
+    try:
+        RetryPolicy(max_attempts=1).call(Upstream(aws_error('InternalServerException', 500)), failed)
+    except ClientError:
+        pass
+
+    print(f"   {trials}/8 trial calls allowed; after a success: {succeeded.state}, after a failure: {failed.state}")
+    if (trials == 1 and result == 'ok' and succeeded.state == CircuitBreaker.CLOSED
+            and failed.state == CircuitBreaker.OPEN and failed.stats()['timesOpened'] == 2):
+        print("✅ One probe at a time; success closed the breaker, failure reopened it for another cool-down")
+        return True
+
+    print("❌ Half-open probe did not behave as expected")
+    return False
+
+
+def test_retry_counts():
+    """Throttling and timeouts are retried up to max_attempts; validation errors fail on the first call"""
+    print("\n🔁 Testing retry counts...")
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002)
+
+    # Throttled twice, then answered
+    recovers = Upstream(aws_error('ThrottlingException'), ReadTimeoutError(endpoint_url='https://qbusiness'))
+    result = policy.call(recovers)
+    retries_after_recovery = policy.retries
+
+    # Throttled every time: gives up after max_attempts
+    throttled = Upstream(*[aws_error('ThrottlingException')] * 5)
+    try:
+        policy.call(throttled)
+        gave_up = False
+    except ClientError:
+        gave_up = True
+
+    # Validation error: the upstream answered, so no retry and the breaker is not charged
+    breaker = CircuitBreaker(failure_threshold=1, name='test')
+    invalid = Upstream(aws_error('ValidationException'))
+    try:
+        policy.call(invalid, breaker)
+        raised = False
+    except ClientError:
+        raised = True
+
+    print(f"   recovered after {recovers.calls} calls, throttled {throttled.calls} calls, "
+          f"validation {invalid.calls} call, retries {policy.retries}")
+    if (result == 'ok' and recovers.calls == 3 and retries_after_recovery == 2
+            and gave_up and throttled.calls == 3 and policy.retries == 4
+            and raised and invalid.calls == 1 and breaker.state == CircuitBreaker.CLOSED
+            and is_retryable(aws_error('Unknown', 503)) and not is_retryable(aws_error('AccessDeniedException', 403))):
+        print("✅ 3 attempts for throttling, 1 for validation; 5xx retryable, access denied not")
+        return True
+
+    print("❌ Retry counts are wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Resilience Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Breaker Trips", test_breaker_trips),
+        ("Breaker Cool-Down", test_breaker_cool_down),
+        ("Half-Open Probe", test_half_open_probe),
+        ("Retry Counts", test_retry_counts)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
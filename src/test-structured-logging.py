@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Test script for non-blocking structured logging (structured_logging.py)
+Runs offline against the DynamoDB and Q Business stand-ins, with log lines
+going to an in-memory stream that can be made slow.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import subprocess
+
+os.environ.update({
+    'Q_BUSINESS_APPLICATION_ID': 'logging-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'CHAT_RATE_LIMIT': '0',
+    'QBUSINESS_RETRY_BASE_DELAY': '0.01',
+    'LOG_QUEUE_SIZE': '1000'
+})
+
+import structured_logging
+
+
+class CaptureStream:
+    """Text stream keeping every line; each write() takes delay seconds"""
+
+    def __init__(self):
+        self.delay = 0
+        self.writes = 0
+        self.text = ''
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.writes += 1
+            self.text += text
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def lines(self):
+        with self._lock:
+            return [json.loads(line) for line in self.text.splitlines()]
+
+    def clear(self):
+        with self._lock:
+            self.text = ''
+            self.writes = 0
+
+
+STREAM = CaptureStream()
+# Before the apps are imported, so their configure_logging() calls keep this setup
+structured_logging.configure_logging('logging-test', stream=STREAM)
+
+import logging
+
+logger = logging.getLogger('test')
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_request_lines():
+    """Lines logged by a request carry its id and route; the access line closes it"""
+    print("\n🪪 Testing request ids and access lines...")
+
+    import team_api
+    from dynamodb_stub import LocalTable, make_member
+
+    team_api.team_api.table = LocalTable(make_member(i) for i in range(100))
+    client = team_api.app.test_client()
+    STREAM.clear()
+
+    sent = client.get('/api/team?limit=10', headers={'X-Request-Id': 'req-1234'})
+    generated = client.get('/api/team?category=Professores')
+    structured_logging.flush()
+
+    lines = STREAM.lines()
+    ours = [line for line in lines if line.get('requestId') == 'req-1234']
+    access = [line for line in ours if line['logger'] == 'access']
+    other_id = generated.headers.get('X-Request-Id', '')
+    print(f"   {ours}")
+
+    if (sent.headers.get('X-Request-Id') == 'req-1234' and len(ours) == 2 and access
+            and access[0]['status'] == 200 and access[0]['route'] == '/api/team' and access[0]['latencyMs'] > 0
+            and len(other_id) == 32 and any(line.get('requestId') == other_id for line in lines)):
+        print("✅ The caller's id was reused and echoed; requests without one got a new id")
+        return True
+
+    print("❌ Missing or wrong request fields")
+    return False
+
+
+def test_upstream_error_code():
+    """A failed Q Business call puts its AWS error code on the access line"""
+    print("\n⛔ Testing upstream error codes...")
+
+    import chatbot_backend
+    from qbusiness_stub import QBusinessStub
+
+    chatbot_backend.chatbot.q_business_client = QBusinessStub(throttle_rate=1.0, seed=1)
+    client = chatbot_backend.app.test_client()
+    STREAM.clear()
+
+    response = client.post('/chat', json={'message': 'Quem coordena o Data IESB?', 'cache': False})
+    structured_logging.flush()
+    access = [line for line in STREAM.lines() if line['logger'] == 'access']
+    print(f"   {access}")
+
+    if access and access[-1]['status'] == response.status_code >= 500 and \
+            access[-1].get('upstreamErrorCode') == 'ThrottlingException':
+        print("✅ ThrottlingException recorded for the failed chat request")
+        return True
+
+    print("❌ Upstream error code not logged")
+    return False
+
+
+def test_deferred_formatting():
+    """Messages are formatted on the writer thread, and not at all below the log level"""
+    print("\n⏳ Testing deferred formatting...")
+
+    formatted_on = []
+
+    class Expensive:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return 'expensive'
+
+    STREAM.clear()
+    logger.debug('Never written: %s', Expensive())
+    logger.info('Written later: %s', Expensive())
+    wait_for(lambda: 'Written later' in STREAM.text)
+
+    print(f"   formatted on {formatted_on}")
+    if formatted_on == ['log-writer'] and 'Written later: expensive' in STREAM.text:
+        print("✅ Formatted once, by the writer thread")
+        return True
+
+    print("❌ Formatting happened on the request thread or for a filtered record")
+    return False
+
+
+def test_slow_stream_does_not_block():
+    """A slow stream delays the writer, not the request; queued lines are written in batches"""
+    print("\n🐢 Testing a slow log stream...")
+
+    STREAM.clear()
+    STREAM.delay = 0.05
+    start = time.perf_counter()
+    for i in range(200):
+        logger.info('Line %s', i)
+    logging_ms = (time.perf_counter() - start) * 1000
+
+    dropped_before = structured_logging.log_stats()['dropped']
+    for i in range(2000):
+        logger.info('Flood %s', i)
+    dropped = structured_logging.log_stats()['dropped'] - dropped_before
+    flood_ms = (time.perf_counter() - start) * 1000 - logging_ms
+
+    structured_logging.flush(10)
+    STREAM.delay = 0
+    lines = STREAM.text.count('Line ')
+
+    print(f"   200 lines logged in {logging_ms:.1f} ms, written with {STREAM.writes} writes; "
+          f"flood of 2000: {flood_ms:.1f} ms, {dropped} dropped")
+    if logging_ms < 50 and lines == 200 and STREAM.writes < 20 and dropped > 0 and flood_ms < 500:
+        print("✅ Logging never waited for the stream; a full queue dropped lines instead of blocking")
+        return True
+
+    print("❌ Logging blocked or lost lines below the queue limit")
+    return False
+
+
+def test_lambda_flush():
+    """The Lambda returns only after its lines are written, so a frozen environment loses none"""
+    print("\n❄️  Testing the Lambda flush...")
+
+    import io
+    import contextlib
+    import lambda_team_api
+    from dynamodb_stub import LocalTable, make_member
+
+    class Context:
+        aws_request_id = 'lambda-req-1'
+
+    lambda_team_api._table = LocalTable(make_member(i) for i in range(100))
+    event = {'httpMethod': 'GET', 'resource': '/api/team', 'queryStringParameters': {'limit': '5'}}
+    STREAM.clear()
+    STREAM.delay = 0.05
+
+    with contextlib.redirect_stdout(io.StringIO()) as stdout:
+        response = lambda_team_api.lambda_handler(event, Context())
+    written = [line for line in STREAM.lines() if line.get('requestId') == 'lambda-req-1']
+    STREAM.delay = 0
+    emf = json.loads(stdout.getvalue())
+
+    print(f"   {written}")
+    if (response['statusCode'] == 200 and written and written[0]['route'] == '/api/team'
+            and structured_logging.log_stats()['queued'] == 0
+            and emf['requestId'] == 'lambda-req-1' and emf['route'] == '/api/team'):
+        print("✅ Lines were written before the handler returned; the EMF line carries the same id and route")
+        return True
+
+    print("❌ Lines still queued when the handler returned")
+    return False
+
+
+CHILD = '''
+import sys, time, logging
+import structured_logging
+
+class SlowStderr:
+    def write(self, text):
+        time.sleep(0.2)
+        return sys.__stderr__.write(text)
+
+    def flush(self):
+        sys.__stderr__.flush()
+
+structured_logging.configure_logging('sigterm-test', stream=SlowStderr())
+for i in range(50):
+    logging.getLogger('child').info('Line %s', i)
+print('ready', flush=True)
+time.sleep(30)
+'''
+
+
+def test_flush_on_sigterm():
+    """docker stop (SIGTERM) exits cleanly and writes every queued line first"""
+    print("\n🛑 Testing shutdown on SIGTERM...")
+
+    process = subprocess.Popen([sys.executable, '-c', CHILD], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    process.stdout.readline()
+    process.send_signal(signal.SIGTERM)
+    _, stderr = process.communicate(timeout=20)
+    lines = [json.loads(line) for line in stderr.splitlines() if line.startswith('{')]
+
+    print(f"   exit code {process.returncode}, {len(lines)} lines")
+    if process.returncode == 128 + signal.SIGTERM and [line['message'] for line in lines] == \
+            [f'Line {i}' for i in range(50)]:
+        print("✅ All 50 queued lines written, in order, before exiting")
+        return True
+
+    print(f"❌ {stderr[-500:]}")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Structured Logging Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Request Ids And Access Lines", test_request_lines),
+        ("Upstream Error Codes", test_upstream_error_code),
+        ("Deferred Formatting", test_deferred_formatting),
+        ("Slow Stream Does Not Block", test_slow_stream_does_not_block),
+        ("Lambda Flush", test_lambda_flush),
+        ("Flush On SIGTERM", test_flush_on_sigterm)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Test script for the served team roster (team_data.RosterSnapshot, GET /api/team
+and the team Lambda)
+Runs entirely offline against the local DynamoDB stand-in (dynamodb_stub.py)
+"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import base64
+import threading
+from contextlib import redirect_stdout
+
+os.environ.update({
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'ACCESS_LOG': 'false'
+})
+
+import team_api
+import lambda_team_api
+from dynamodb_stub import LocalTable, make_member
+from team_data import RosterSnapshot
+
+MEMBER_COUNT = 200
+
+
+def use_table(count=MEMBER_COUNT):
+    """Serve /api/team from a fresh local table and an empty snapshot; returns the table"""
+    table = LocalTable(make_member(i) for i in range(count))
+    team_api.team_api.table = table
+    team_api.team_api.roster = RosterSnapshot(team_api.team_api.get_team_members)
+    return table
+
+
+class Loader:
+    """Roster loader counting its calls; each call can be delayed or fail"""
+
+    def __init__(self):
+        self.members = [{'name': 'Ana'}]
+        self.calls = 0
+        self.delay = 0
+        self.error = None
+        self.started = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        time.sleep(self.delay)
+        if self.error:
+            return {'error': self.error}
+        return {'success': True, 'data': list(self.members)}
+
+
+def test_snapshot_etag():
+    """The ETag is a hash of the roster: stable across reloads, different once the roster changes"""
+    print("\n🏷️  Testing snapshot ETags...")
+
+    loader = Loader()
+    roster = RosterSnapshot(loader, ttl=60, stale_ttl=60)
+    first, _ = roster.get()
+    again, _ = roster.get()
+    roster.invalidate()
+    reloaded, _ = roster.get()
+    loader.members.append({'name': 'Bruno'})
+    roster.invalidate()
+    changed, _ = roster.get()
+
+    print(f"   {first.etag} -> {reloaded.etag} (same roster), {changed.etag} (one more member)")
+    if (again is first and loader.calls == 3 and reloaded.etag == first.etag and changed.etag != first.etag
+            and json.loads(changed.body)['data'][-1] == {'name': 'Bruno'}):
+        print("✅ Cached between requests; reloading the same roster kept its ETag, a change replaced it")
+        return True
+
+    print("❌ Snapshot ETags are wrong")
+    return False
+
+
+def test_conditional_get():
+    """GET /api/team sends ETag and Cache-Control, answers 304 to a matching If-None-Match, per coding"""
+    print("\n📨 Testing conditional GET /api/team...")
+
+    table = use_table()
+    client = team_api.app.test_client()
+    first = client.get('/api/team')
+    etag = first.headers['ETag']
+    not_modified = client.get('/api/team', headers={'If-None-Match': etag})
+    gzipped = client.get('/api/team', headers={'Accept-Encoding': 'gzip'})
+    gzip_not_modified = client.get('/api/team', headers={'Accept-Encoding': 'gzip',
+                                                         'If-None-Match': gzipped.headers['ETag']})
+    # The identity ETag does not match the gzip bytes
+    other_coding = client.get('/api/team', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    members = first.get_json()['data']
+    print(f"   {first.status_code} ETag {etag}, {first.headers['Cache-Control']}")
+    print(f"   If-None-Match: {not_modified.status_code}, gzip: {gzipped.headers.get('Content-Encoding')} "
+          f"ETag {gzipped.headers['ETag']} -> {gzip_not_modified.status_code}, other coding: {other_coding.status_code}")
+    if (first.status_code == 200 and len(members) == MEMBER_COUNT
+            and first.headers['Cache-Control'] == 'public, max-age=60, stale-while-revalidate=300'
+            and 'Accept-Encoding' in first.headers['Vary']
+            and not_modified.status_code == 304 and not_modified.get_data() == b'' and not_modified.headers['ETag'] == etag
+            and gzipped.headers.get('Content-Encoding') == 'gzip' and gzipped.headers['ETag'] != etag
+            and json.loads(gzip.decompress(gzipped.get_data())) == first.get_json()
+            and gzip_not_modified.status_code == 304 and other_coding.status_code == 200
+            and table.scan_calls == 1):
+        print("✅ One scan served every request; matching ETags got 304 without a body")
+        return True
+
+    print("❌ Conditional GET is wrong")
+    return False
+
+
+def test_background_refresh():
+    """A stale snapshot is served at once while one background reload replaces it"""
+    print("\n🔄 Testing stale-while-revalidate...")
+
+    loader = Loader()
+    roster = RosterSnapshot(loader, ttl=0.05, stale_ttl=5)
+    first, _ = roster.get()
+    time.sleep(0.1)
+
+    loader.members.append({'name': 'Bruno'})
+    loader.delay = 0.2
+    loader.started.clear()
+    start = time.perf_counter()
+    stale = [roster.get()[0] for _ in range(5)]
+    served_in = time.perf_counter() - start
+    loader.started.wait(1)
+    time.sleep(0.3)
+    fresh, _ = roster.get()
+
+    # A failed refresh keeps serving the last good snapshot
+    time.sleep(0.1)
+    loader.delay = 0
+    loader.error = 'Database error'
+    kept, error = roster.get()
+    time.sleep(0.05)
+
+    print(f"   5 stale reads in {served_in * 1000:.1f} ms, loads {loader.calls}, "
+          f"refreshed: {fresh.etag != first.etag}, after a failed refresh: {kept.etag == fresh.etag}")
+    if (all(snapshot is first for snapshot in stale) and served_in < 0.1 and fresh.etag != first.etag
+            and kept is fresh and error is None and loader.calls == 3 and roster.get()[0] is fresh):
+        print("✅ Stale reads did not wait for DynamoDB; a single refresh ran in the background")
+        return True
+
+    print("❌ Background refresh did not behave as expected")
+    return False
+
+
+def test_expired_snapshot_reloads():
+    """Past stale_ttl the roster reloads inline, and a load error without a snapshot is a 500"""
+    print("\n⏰ Testing expiry and load errors...")
+
+    loader = Loader()
+    roster = RosterSnapshot(loader, ttl=0.01, stale_ttl=0.02)
+    first, _ = roster.get()
+    time.sleep(0.05)
+    loader.members.append({'name': 'Bruno'})
+    second, _ = roster.get()
+
+    use_table()
+    team_api.team_api.roster = RosterSnapshot(lambda: {'error': 'Database error', 'message': 'Tabela indisponível'})
+    failed = team_api.app.test_client().get('/api/team')
+
+    print(f"   reloaded inline: {second.etag != first.etag}, failed load: {failed.status_code} {failed.get_json()}")
+    if (second.etag != first.etag and loader.calls == 2 and failed.status_code == 500
+            and failed.get_json()['error'] == 'Database error'):
+        print("✅ The expired snapshot was replaced before answering; the error reached the client as 500")
+        return True
+
+    print("❌ Expired snapshots are handled incorrectly")
+    return False
+
+
+def invoke_lambda(**headers):
+    """Call the Lambda handler for GET /api/team, keeping its EMF line off the test output"""
+    event = {'httpMethod': 'GET', 'path': '/api/team', 'resource': '/api/team', 'headers': headers}
+    with redirect_stdout(io.StringIO()):
+        return lambda_team_api.lambda_handler(event, None)
+
+
+def test_lambda_compression():
+    """With TEAM_LAMBDA_COMPRESSION the Lambda returns base64 gzip for clients that accept it, else plain JSON"""
+    print("\n🗜️  Testing Lambda response compression...")
+
+    compression = lambda_team_api.RESPONSE_COMPRESSION
+    lambda_team_api._table = LocalTable(make_member(i) for i in range(MEMBER_COUNT))
+    lambda_team_api._roster.invalidate()
+    try:
+        lambda_team_api.RESPONSE_COMPRESSION = False
+        off = invoke_lambda(**{'Accept-Encoding': 'gzip'})
+        lambda_team_api.RESPONSE_COMPRESSION = True
+        plain = invoke_lambda()
+        identity = invoke_lambda(**{'Accept-Encoding': 'identity'})
+        gzipped = invoke_lambda(**{'accept-encoding': 'gzip, deflate'})
+        not_modified = invoke_lambda(**{'Accept-Encoding': 'gzip', 'If-None-Match': gzipped['headers']['ETag']})
+    finally:
+        lambda_team_api.RESPONSE_COMPRESSION = compression
+
+    decoded = json.loads(gzip.decompress(base64.b64decode(gzipped['body'])))
+    expected = json.loads(plain['body'])
+    print(f"   plain {len(plain['body'])} bytes, gzip {len(gzipped['body'])} base64 chars, "
+          f"304 on its ETag: {not_modified['statusCode']}")
+    if (not off.get('isBase64Encoded') and 'Content-Encoding' not in off['headers'] and json.loads(off['body']) == expected
+            and not plain.get('isBase64Encoded') and len(expected['data']) == MEMBER_COUNT
+            and not identity.get('isBase64Encoded') and 'Content-Encoding' not in identity['headers']
+            and gzipped['isBase64Encoded'] and gzipped['headers']['Content-Encoding'] == 'gzip'
+            and gzipped['headers']['Vary'] == 'Accept-Encoding' and gzipped['headers']['ETag'] != plain['headers']['ETag']
+            and decoded == expected and len(gzipped['body']) < len(plain['body'])
+            and not_modified['statusCode'] == 304 and not_modified['body'] == ''):
+        print("✅ The decoded gzip body equals the plain JSON; off by default and for identity-only clients")
+        return True
+
+    print("❌ Lambda compression is wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Team API Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Snapshot ETag", test_snapshot_etag),
+        ("Conditional GET", test_conditional_get),
+        ("Background Refresh", test_background_refresh),
+        ("Expired Snapshot", test_expired_snapshot_reloads),
+        ("Lambda Compression", test_lambda_compression)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Test script for the team member bulk import (team_import.py)
+Runs entirely offline against the local DynamoDB stand-in (dynamodb_stub.py)
+"""
+
+import os
+import sys
+import csv
+import json
+import tempfile
+from decimal import Decimal
+
+from dynamodb_stub import LocalTable, make_member
+from team_data import normalize_member
+from team_import import run_import
+
+MEMBER_COUNT = 3000
+
+
+def write_csv(path, members):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['email', 'nome', 'cargo', 'categoria', 'linkedin'])
+        writer.writeheader()
+        for member in members:
+            writer.writerow({
+                'email': member['email'],
+                'nome': member['name'],
+                'cargo': member['role'],
+                'categoria': member['category'],
+                'linkedin': member.get('linkedin') or ''
+            })
+
+
+def make_members(count):
+    return [make_member(i) for i in range(count)]
+
+
+def test_csv_and_json_mapping():
+    """CSV (Portuguese headers) and API-shaped JSON map to the items the API reads back"""
+    print("\n🗂️  Testing CSV and JSON mapping...")
+
+    members = make_members(50)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'members.csv')
+        write_csv(csv_path, members)
+        csv_table = LocalTable()
+        csv_report = run_import(csv_table, csv_path, max_wcu=0)
+
+        # The API's own response (normalized members, grouped by category) can be re-imported
+        json_path = os.path.join(tmp, 'members.json')
+        grouped = {}
+        for member in members:
+            grouped.setdefault(member['category'], []).append(normalize_member(member))
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'success': True, 'data': grouped}, f, ensure_ascii=False)
+        json_table = LocalTable()
+        json_report = run_import(json_table, json_path, max_wcu=0)
+
+    expected = [normalize_member(member) for member in members]
+    from_csv = [normalize_member(csv_table.get(member['email'])) for member in members]
+    from_json = [normalize_member(json_table.get(member['email'])) for member in members]
+    stored_fields = set(json_table.get(members[0]['email']))
+
+    if (from_csv == expected and from_json == expected and csv_report['written'] == 50
+            and json_report['written'] == 50 and not {'id', 'active'} & stored_fields):
+        print("✅ Both formats round-trip through normalize_member; derived fields are not stored")
+        return True
+
+    print(f"❌ CSV report {csv_report}, JSON report {json_report}, stored fields {stored_fields}")
+    return False
+
+
+def test_invalid_and_duplicate_records():
+    """Rows without an email are reported; the last row for an email wins"""
+    print("\n🚫 Testing invalid and duplicate records...")
+
+    records = [
+        {'email': 'ana@iesb.edu.br', 'name': 'Ana', 'role': 'Aluna'},
+        {'email': '', 'name': 'Sem email'},
+        {'email': 'ana@iesb.edu.br', 'name': 'Ana Souza', 'role': 'Pesquisadora', 'category': 'Pesquisadores'}
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'members.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+        table = LocalTable()
+        report = run_import(table, path, max_wcu=0)
+
+    stored = table.get('ana@iesb.edu.br')
+    if (report['invalid'] == 1 and report['invalidRecords'][0]['source'] == '#2' and report['duplicates'] == 1
+            and stored['name'] == 'Ana Souza' and stored['category'] == 'Pesquisadores'):
+        print("✅ 1 invalid record reported by position, duplicate resolved to the last row")
+        return True
+
+    print(f"❌ Report {report}, stored {stored}")
+    return False
+
+
+def test_json_numbers():
+    """Fractional numbers in JSON are stored as Decimal instead of failing their batch"""
+    print("\n🔢 Testing numeric attributes from JSON...")
+
+    records = [normalize_member(member) for member in make_members(30)]
+    records[3]['ordem'] = 2
+    records[4]['cargaHoraria'] = 12.5
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'members.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+        table = LocalTable()
+        report = run_import(table, path, max_wcu=0)
+        again = run_import(table, path, max_wcu=0)
+
+    stored = table.get(records[4]['email'])
+    if (report['written'] == 30 and not report['failed'] and stored['cargaHoraria'] == Decimal('12.5')
+            and table.get(records[3]['email'])['ordem'] == 2 and again['unchanged'] == 30):
+        print("✅ 12.5 stored as Decimal('12.5'); both batches written, and a re-import finds nothing changed")
+        return True
+
+    print(f"❌ Report {report}, stored {stored}")
+    return False
+
+
+def test_unchanged_members_are_skipped():
+    """Reloading the same roster writes nothing; only edited members are rewritten"""
+    print("\n♻️  Testing unchanged member detection...")
+
+    members = make_members(MEMBER_COUNT)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'members.csv')
+        write_csv(path, members)
+        table = LocalTable()
+        first = run_import(table, path, max_wcu=0)
+
+        # Attributes set outside the import must survive a re-import
+        table.get(members[0]['email'])['photo'] = 'https://dataiesb.com/img/0.jpg'
+        again = run_import(table, path, max_wcu=0)
+
+        members[1]['role'] = 'Coordenador'
+        members[2]['category'] = 'Coordenação'
+        write_csv(path, members)
+        edited = run_import(table, path, max_wcu=0)
+
+    photo_kept = table.get(members[0]['email']).get('photo') == 'https://dataiesb.com/img/0.jpg'
+    if (first['written'] == MEMBER_COUNT and again['written'] == 0 and again['unchanged'] == MEMBER_COUNT
+            and edited['written'] == 2 and table.get(members[1]['email'])['role'] == 'Coordenador' and photo_kept):
+        print(f"✅ Re-import wrote 0/{MEMBER_COUNT}, an edit wrote 2, extra attributes kept")
+        return True
+
+    print(f"❌ first={first['written']} again={again['written']} edited={edited['written']} photo kept={photo_kept}")
+    return False
+
+
+def test_throttled_table_completes():
+    """Writes beyond the table's capacity come back unprocessed and are retried until all land"""
+    print("\n🐢 Testing unprocessed item retries...")
+
+    members = make_members(1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'members.csv')
+        write_csv(path, members)
+        # The importer is told the table can take far more than it really can
+        table = LocalTable(write_capacity=400, latency=0.002)
+        report = run_import(table, path, workers=8, max_wcu=5000)
+
+    if report['written'] == 1000 and len(table) == 1000 and report['unprocessedRetries'] > 0 and not report['failed']:
+        print(f"✅ All 1000 members written after {report['unprocessedRetries']} unprocessed retries "
+              f"in {report['elapsedSeconds']}s")
+        return True
+
+    print(f"❌ {report}")
+    return False
+
+
+def test_throughput_within_capacity():
+    """A few thousand members load in seconds while staying under the provisioned capacity"""
+    print("\n⚡ Testing throughput and capacity pacing...")
+
+    members = make_members(MEMBER_COUNT)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'members.csv')
+        write_csv(path, members)
+        # Provisioned tables are paced at 80% of their write capacity
+        table = LocalTable(write_capacity=2000, latency=0.01)
+        report = run_import(table, path, workers=8)
+
+    print(f"   {report['itemsPerSecond']} items/s, limit {report['maxWriteUnitsPerSecond']} WCU/s, "
+          f"{report['unprocessedRetries']} unprocessed")
+    if (report['written'] == MEMBER_COUNT and report['maxWriteUnitsPerSecond'] == 1600
+            and report['unprocessedRetries'] == 0 and report['elapsedSeconds'] < 5):
+        print(f"✅ {MEMBER_COUNT} members in {report['elapsedSeconds']}s without exceeding capacity")
+        return True
+
+    print(f"❌ {report}")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Team Import Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("CSV and JSON Mapping", test_csv_and_json_mapping),
+        ("Invalid and Duplicate Records", test_invalid_and_duplicate_records),
+        ("Numeric Attributes From JSON", test_json_numbers),
+        ("Unchanged Members Skipped", test_unchanged_members_are_skipped),
+        ("Unprocessed Item Retries", test_throttled_table_completes),
+        ("Throughput Within Capacity", test_throughput_within_capacity)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
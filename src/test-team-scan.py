@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test script for the team data access layer (scans and category queries)
+Runs entirely offline against the local DynamoDB stand-in (dynamodb_stub.py)
+"""
+
+import sys
+import time
+
+import team_data
+
+from dynamodb_stub import LocalTable, make_member
+from team_data import scan_items, iter_team_members, fetch_members_page
+
+MEMBER_COUNT = 5000
+# ~1 KB per member so the table spans several 1 MB scan pages
+PADDING = 1000
+
+
+def build_table(latency=0.0):
+    return LocalTable((make_member(i, padding=PADDING) for i in range(MEMBER_COUNT)), latency=latency)
+
+
+def test_single_scan_is_truncated():
+    """A single table.scan() only returns the first 1 MB page - the bug being fixed"""
+    print("\n📄 Testing single scan page...")
+
+    table = build_table()
+    response = table.scan()
+
+    if 'LastEvaluatedKey' in response and len(response['Items']) < MEMBER_COUNT:
+        print(f"✅ Single page holds {len(response['Items'])}/{MEMBER_COUNT} members")
+        return True
+
+    print("❌ Table fits in a single page - the test data is too small")
+    return False
+
+
+def test_paginated_scan():
+    """Sequential scan follows LastEvaluatedKey to the end of the table"""
+    print("\n🔁 Testing paginated scan...")
+
+    table = build_table()
+    emails = [item['email'] for item in scan_items(table, total_segments=1)]
+
+    if len(emails) == MEMBER_COUNT and len(set(emails)) == MEMBER_COUNT:
+        print(f"✅ Retrieved all {MEMBER_COUNT} members in {table.scan_calls} pages")
+        return True
+
+    print(f"❌ Retrieved {len(emails)} members ({len(set(emails))} unique), expected {MEMBER_COUNT}")
+    return False
+
+
+def test_parallel_segmented_scan():
+    """Parallel segmented scan returns every member exactly once, faster than sequential"""
+    print("\n⚡ Testing parallel segmented scan...")
+
+    table = build_table(latency=0.02)
+    start = time.perf_counter()
+    sequential = [item['email'] for item in scan_items(table, total_segments=1)]
+    sequential_time = time.perf_counter() - start
+
+    table = build_table(latency=0.02)
+    start = time.perf_counter()
+    parallel = [item['email'] for item in scan_items(table, total_segments=8)]
+    parallel_time = time.perf_counter() - start
+
+    if sorted(parallel) != sorted(sequential) or len(parallel) != MEMBER_COUNT:
+        print(f"❌ Parallel scan returned {len(parallel)} members, expected {MEMBER_COUNT}")
+        return False
+
+    print(f"✅ All {MEMBER_COUNT} members across 8 segments")
+    print(f"   Sequential: {sequential_time * 1000:.0f} ms, parallel: {parallel_time * 1000:.0f} ms")
+    if parallel_time >= sequential_time:
+        print("❌ Parallel scan was not faster than the sequential scan")
+        return False
+    return True
+
+
+def test_normalization():
+    """Members are normalized to the API structure while streaming"""
+    print("\n🧹 Testing member normalization...")
+
+    table = LocalTable([
+        {'email': 'ana@iesb.edu.br', 'name': 'Ana', 'role': 'Professora', 'category': 'Professores', 'bio': 'x' * 50},
+        {'email': 'bruno@iesb.edu.br', 'name': 'Bruno'}
+    ])
+    members = {m['email']: m for m in iter_team_members(table, total_segments=2)}
+
+    expected = {
+        'ana@iesb.edu.br': {
+            'id': 'ana@iesb.edu.br', 'name': 'Ana', 'email': 'ana@iesb.edu.br',
+            'role': 'Professora', 'category': 'Professores', 'active': True
+        },
+        'bruno@iesb.edu.br': {
+            'id': 'bruno@iesb.edu.br', 'name': 'Bruno', 'email': 'bruno@iesb.edu.br',
+            'role': '', 'category': 'Outros', 'active': True
+        }
+    }
+
+    if members == expected:
+        print("✅ Members normalized with defaults and extra attributes dropped")
+        return True
+
+    print(f"❌ Unexpected members: {members}")
+    return False
+
+
+def test_segment_error_propagates():
+    """A failing segment surfaces as an exception instead of a silently short result"""
+    print("\n💥 Testing segment failure...")
+
+    class FailingTable(LocalTable):
+        def scan(self, **kwargs):
+            if kwargs.get('Segment') == 1:
+                raise RuntimeError('segment 1 failed')
+            return super().scan(**kwargs)
+
+    table = FailingTable(make_member(i) for i in range(100))
+    try:
+        list(scan_items(table, total_segments=4))
+    except RuntimeError:
+        print("✅ Segment failure raised to the caller")
+        return True
+
+    print("❌ Segment failure was swallowed")
+    return False
+
+
+def test_category_pagination():
+    """Category pages come from the index Query and the cursor walks the whole section"""
+    print("\n📑 Testing category query pagination...")
+
+    table = build_table()
+    expected = sum(1 for i in range(MEMBER_COUNT) if make_member(i)['category'] == 'Alunos')
+
+    members, cursor, pages = [], None, 0
+    while True:
+        result = fetch_members_page(table, category='Alunos', limit=100, cursor=cursor)
+        members.extend(result['data'])
+        pages += 1
+        cursor = result['nextCursor']
+        if not cursor:
+            break
+
+    emails = {m['email'] for m in members}
+    if table.scan_calls or len(emails) != expected or any(m['category'] != 'Alunos' for m in members):
+        print(f"❌ Got {len(emails)} members ({table.scan_calls} scans), expected {expected} from queries only")
+        return False
+
+    print(f"✅ {expected} members in {pages} pages using {table.query_calls} queries and no scans")
+    return True
+
+
+def test_category_without_index():
+    """Without the category index, a filtered scan serves the same pages and the index is not retried"""
+    print("\n🧭 Testing category fallback without the index...")
+
+    table = LocalTable((make_member(i, padding=PADDING) for i in range(MEMBER_COUNT)), indexes=())
+    expected = {make_member(i)['email'] for i in range(MEMBER_COUNT) if make_member(i)['category'] == 'Alunos'}
+
+    members, cursor, pages = [], None, 0
+    try:
+        while True:
+            result = fetch_members_page(table, category='Alunos', limit=100, cursor=cursor)
+            members.extend(result['data'])
+            pages += 1
+            cursor = result['nextCursor']
+            if not cursor:
+                break
+    finally:
+        index_found = team_data._category_index_found
+        team_data._category_index_found = True
+
+    emails = [m['email'] for m in members]
+    if (set(emails) == expected and len(emails) == len(expected) and table.query_calls == 1
+            and not index_found and all(m['category'] == 'Alunos' for m in members)):
+        print(f"✅ {len(expected)} members in {pages} pages from {table.scan_calls} filtered scans after 1 failed query")
+        return True
+
+    print(f"❌ Got {len(emails)} members, expected {len(expected)}; {table.query_calls} queries")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Team Data Scan Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Single Scan Page", test_single_scan_is_truncated),
+        ("Paginated Scan", test_paginated_scan),
+        ("Parallel Segmented Scan", test_parallel_segmented_scan),
+        ("Normalization", test_normalization),
+        ("Segment Failure", test_segment_error_propagates),
+        ("Category Pagination", test_category_pagination),
+        ("Category Without Index", test_category_without_index)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test script for the prebuilt widget assets (widget_assets.py, GET /widget)
+Runs offline: assets are built from files in a temporary directory, and the
+routes are called through Flask's test client.
+"""
+
+import os
+import sys
+import gzip
+import tempfile
+
+os.environ.update({
+    'Q_BUSINESS_APPLICATION_ID': 'widget-test',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'ACCESS_LOG': 'false'
+})
+
+import chatbot_backend
+from widget_assets import ASSET_CACHE_CONTROL, PAGE_CACHE_CONTROL, STATIC_PREFIX, Asset, WidgetAssets, build_asset
+
+CSS = b'.chatbot-toggle { color: #004a8f; }\n' * 40
+JS = b'function toggleChatbot() { return true; }\n' * 40
+
+
+def build_from(css=CSS, js=JS):
+    """Build WidgetAssets from widget sources written to a temporary directory"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for folder, name, body in (('style', 'chatbot-widget.css', css), ('js', 'chatbot-widget.js', js)):
+            os.makedirs(os.path.join(tmp, folder))
+            with open(os.path.join(tmp, folder, name), 'wb') as f:
+                f.write(body)
+        return WidgetAssets(base_dir=tmp)
+
+
+def asset_named(widget, extension):
+    """(versioned name, asset) of the built file with this extension"""
+    return next((name, asset) for name, asset in widget.assets.items() if name.endswith(extension))
+
+
+def test_prebuilt_from_source():
+    """The stored variants are the source files, under names versioned by their content"""
+    print("\n🏗️  Testing assets built from source...")
+
+    widget = build_from()
+    css_name, css = asset_named(widget, '.css')
+    js_name, js = asset_named(widget, '.js')
+    page = widget.page.variants[None].decode('utf-8')
+
+    edited = build_from(js=JS + '// nova versão\n'.encode('utf-8'))
+    edited_css, _ = asset_named(edited, '.css')
+    edited_js, _ = asset_named(edited, '.js')
+
+    print(f"   {css_name}, {js_name}; after editing the script: {edited_js}")
+    if (css.variants[None] == CSS and gzip.decompress(css.variants['gzip']) == CSS
+            and js.variants[None] == JS and css_name == f'chatbot-widget.{css.etag}.css'
+            and STATIC_PREFIX + css_name in page and STATIC_PREFIX + js_name in page
+            and css.cache_control == ASSET_CACHE_CONTROL and widget.page.cache_control == PAGE_CACHE_CONTROL
+            and edited_js != js_name and edited_css == css_name
+            and edited.page.etag != widget.page.etag):
+        print("✅ Prebuilt bytes match the sources; only the edited file and the page changed name/ETag")
+        return True
+
+    print("❌ Prebuilt assets do not match their sources")
+    return False
+
+
+def test_encoding_negotiation():
+    """br is preferred over gzip when both exist; refused or missing codings fall back"""
+    print("\n🗜️  Testing Accept-Encoding negotiation...")
+
+    plain = build_asset(CSS, 'text/css; charset=utf-8', ASSET_CACHE_CONTROL)
+    # brotli may not be installed here: a stand-in variant checks the preference order
+    with_br = Asset(plain.content_type, plain.etag, plain.cache_control, dict(plain.variants, br=b'br-bytes'))
+
+    cases = {
+        'none': (plain, None),
+        'identity': (plain, 'identity'),
+        'gzip': (plain, 'gzip, deflate'),
+        'gzip refused': (plain, 'gzip;q=0, deflate'),
+        'br without variant': (plain, 'br, gzip'),
+        'br': (with_br, 'gzip, br'),
+    }
+    chosen = {}
+    for label, (asset, accept) in cases.items():
+        status, body, headers = WidgetAssets.select(asset, accept, None)
+        chosen[label] = (status, headers.get('Content-Encoding'), body)
+
+    print(f"   {{{', '.join(f'{label}: {coding}' for label, (_, coding, _) in chosen.items())}}}")
+    if (chosen['none'][1:] == (None, CSS) and chosen['identity'][1:] == (None, CSS)
+            and chosen['gzip'][1] == 'gzip' and gzip.decompress(chosen['gzip'][2]) == CSS
+            and chosen['gzip refused'][1:] == (None, CSS) and chosen['br without variant'][1] == 'gzip'
+            and chosen['br'][1:] == ('br', b'br-bytes') and all(s == 200 for s, _, _ in chosen.values())):
+        print("✅ Each client got the best coding it accepts and the asset has")
+        return True
+
+    print("❌ Encoding negotiation is wrong")
+    return False
+
+
+def test_etag_and_304():
+    """Each coding has its own ETag; a matching If-None-Match (or *) gets 304 without a body"""
+    print("\n🏷️  Testing ETags and 304...")
+
+    asset = build_asset(JS, 'application/javascript; charset=utf-8', ASSET_CACHE_CONTROL)
+    _, _, identity = WidgetAssets.select(asset, None, None)
+    _, _, gzipped = WidgetAssets.select(asset, 'gzip', None)
+    same = WidgetAssets.select(asset, 'gzip', gzipped['ETag'])
+    in_list = WidgetAssets.select(asset, None, f'"stale", {identity["ETag"]}')
+    wildcard = WidgetAssets.select(asset, 'gzip', '*')
+    other_coding = WidgetAssets.select(asset, 'gzip', identity['ETag'])
+
+    print(f"   identity {identity['ETag']}, gzip {gzipped['ETag']}; "
+          f"match {same[0]}, in a list {in_list[0]}, * {wildcard[0]}, other coding {other_coding[0]}")
+    if (identity['ETag'] == f'"{asset.etag}"' and gzipped['ETag'] == f'"{asset.etag}-gzip"'
+            and identity['Vary'] == 'Accept-Encoding'
+            and same[:2] == (304, b'') and same[2]['ETag'] == gzipped['ETag'] and 'Content-Encoding' not in same[2]
+            and in_list[0] == 304 and wildcard[0] == 304
+            and other_coding[0] == 200 and other_coding[2]['Content-Encoding'] == 'gzip'):
+        print("✅ Matching ETags got 304; the identity ETag did not validate the gzip bytes")
+        return True
+
+    print("❌ ETag handling is wrong")
+    return False
+
+
+def test_widget_routes():
+    """GET /widget and /widget/static/<name> serve the prebuilt bytes; unknown names get 404"""
+    print("\n🌐 Testing the widget routes...")
+
+    client = chatbot_backend.app.test_client()
+    widget = chatbot_backend.widget_assets
+    page = client.get('/widget', headers={'Accept-Encoding': 'gzip'})
+    js_name, _ = asset_named(widget, '.js')
+    script = client.get(STATIC_PREFIX + js_name)
+    revalidated = client.get(STATIC_PREFIX + js_name, headers={'If-None-Match': script.headers['ETag']})
+    missing = client.get(STATIC_PREFIX + 'chatbot-widget.0000.js')
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'js', 'chatbot-widget.js'), 'rb') as f:
+        source = f.read()
+
+    print(f"   /widget {page.status_code} {page.headers.get('Content-Encoding')}, {js_name} {script.status_code} "
+          f"{script.headers['Cache-Control']}, revalidated {revalidated.status_code}, unknown {missing.status_code}")
+    if (page.status_code == 200 and page.headers.get('Content-Encoding') == 'gzip'
+            and page.headers['Cache-Control'] == PAGE_CACHE_CONTROL
+            and STATIC_PREFIX + js_name in gzip.decompress(page.get_data()).decode('utf-8')
+            and script.status_code == 200 and script.get_data() == source
+            and script.headers['Cache-Control'] == ASSET_CACHE_CONTROL
+            and revalidated.status_code == 304 and revalidated.get_data() == b''
+            and missing.status_code == 404 and missing.get_json()['error'] == 'Not found'):
+        print("✅ The page and script came from the prebuilt assets; 304 and 404 as expected")
+        return True
+
+    print("❌ Widget routes are wrong")
+    return False
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Widget Assets Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Prebuilt From Source", test_prebuilt_from_source),
+        ("Encoding Negotiation", test_encoding_negotiation),
+        ("ETag And 304", test_etag_and_304),
+        ("Widget Routes", test_widget_routes)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"\n❌ Unexpected error in {test_name}: {str(e)}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 50)
+    print("📊 Test Results Summary:")
+    print("=" * 50)
+
+    passed = 0
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} {test_name}")
+        if result:
+            passed += 1
+
+    print(f"\nPassed: {passed}/{len(results)} tests")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Prebuilt assets for the standalone chatbot widget
+The widget page, stylesheet and script are read, rendered and compressed once
+at startup; requests only pick the stored bytes for the client's encoding.
+"""
+
+import os
+import gzip
+import hashlib
+from collections import namedtuple
+
+from api_response import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_PREFIX = '/widget/static/'
+
+# The page references versioned asset URLs, so it is revalidated often while the
+# assets themselves never change under a given URL
+PAGE_CACHE_CONTROL = f"public, max-age={int(os.getenv('WIDGET_MAX_AGE', 300))}"
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+WIDGET_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Q Business Chatbot Widget</title>
+    <link rel="stylesheet" href="{css_url}">
+</head>
+<body>
+    <button class="chatbot-toggle" onclick="toggleChatbot()">💬</button>
+
+    <div class="chatbot-container" id="chatbotContainer">
+        <div class="chatbot-header">
+            <h3>Assistente Q Business</h3>
+            <button onclick="toggleChatbot()" style="background: none; border: none; color: white; font-size: 18px; cursor: pointer;">×</button>
+        </div>
+
+        <div class="chatbot-messages" id="chatbotMessages">
+            <div class="message bot-message">
+                Olá! Sou seu assistente baseado no Amazon Q Business. Como posso ajudá-lo com informações sobre nossos parceiros?
+            </div>
+        </div>
+
+        <div class="chatbot-input">
+            <input type="text" id="messageInput" placeholder="Digite sua pergunta..." onkeypress="handleKeyPress(event)">
+            <button onclick="sendMessage()">Enviar</button>
+        </div>
+    </div>
+
+    <script src="{js_url}"></script>
+</body>
+</html>
+"""
+
+Asset = namedtuple('Asset', ['content_type', 'etag', 'cache_control', 'variants'])
+
+
+def build_asset(body, content_type, cache_control):
+    """Hash and precompress an asset body"""
+    variants = {None: body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    etag = hashlib.sha256(body).hexdigest()[:16]
+    return Asset(content_type, etag, cache_control, variants)
+
+
+def versioned_name(filename, etag):
+    """chatbot-widget.js -> chatbot-widget.<hash>.js"""
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{etag}{ext}'
+
+
+class WidgetAssets:
+    def __init__(self, base_dir=BASE_DIR):
+        """Read, render and compress the widget files"""
+        self.assets = {}
+
+        css = self._add_file(os.path.join(base_dir, 'style', 'chatbot-widget.css'), 'text/css; charset=utf-8')
+        js = self._add_file(os.path.join(base_dir, 'js', 'chatbot-widget.js'), 'application/javascript; charset=utf-8')
+
+        page = WIDGET_PAGE.format(css_url=STATIC_PREFIX + css, js_url=STATIC_PREFIX + js)
+        self.page = build_asset(page.encode('utf-8'), 'text/html; charset=utf-8', PAGE_CACHE_CONTROL)
+
+    def _add_file(self, path, content_type):
+        with open(path, 'rb') as f:
+            asset = build_asset(f.read(), content_type, ASSET_CACHE_CONTROL)
+        name = versioned_name(os.path.basename(path), asset.etag)
+        self.assets[name] = asset
+        return name
+
+    @staticmethod
+    def select(asset, accept_encoding, if_none_match):
+        """
+        Choose the response for an asset
+
+        Returns:
+            tuple: (status, body, headers)
+        """
+        accepted = accepted_encodings(accept_encoding)
+        encoding = next((e for e in ('br', 'gzip') if e in accepted and e in asset.variants), None)
+
+        # Each encoding is a different representation, so it gets its own strong ETag
+        etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+        headers = {
+            'Content-Type': asset.content_type,
+            'Cache-Control': asset.cache_control,
+            'ETag': etag,
+            'Vary': 'Accept-Encoding'
+        }
+
+        if if_none_match and (etag in if_none_match or if_none_match.strip() == '*'):
+            return 304, b'', headers
+
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, asset.variants[encoding], headers